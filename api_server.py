@@ -0,0 +1,353 @@
+# ============================================================================
+# LEAF GUARD AI - HTTP Inference API
+# Standalone asyncio HTTP/1.1 service for clients that cannot use the
+# Streamlit UI (mobile app, field traps). The event loop only parses
+# requests and writes responses; decoding runs in a thread pool and the
+# forward pass in the shared micro-batching scheduler, so images from
+# concurrent requests end up in the same batch.
+#
+#   POST /v1/predict[?top_k=3]   raw image body (Content-Type: image/*) or
+#                                multipart/form-data with one or more files
+#   GET  /healthz, /readyz,      same handlers as the probe server
+#        /metrics
+#
+#   python api_server.py --port 8000
+#   curl -F image=@leaf.jpg http://localhost:8000/v1/predict
+# ============================================================================
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import parse_qs, urlsplit
+
+import config
+import inference
+import metrics
+import preprocessing
+import probes
+import tta
+import upload_gate
+from prediction_cache import PredictionCache, cache_key
+from runtime import default_runtime
+from scheduler import MicroBatchScheduler
+
+logger = logging.getLogger(__name__)
+
+MAX_HEADERS = 100
+
+REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    411: 'Length Required',
+    413: 'Payload Too Large',
+    415: 'Unsupported Media Type',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+
+class HTTPError(Exception):
+    """Request problem reported to the client with ``status``"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ============================================================================
+# REQUEST PARSING
+# ============================================================================
+
+_BOUNDARY = re.compile(r'boundary="?([^";]+)"?')
+_FILENAME = re.compile(rb'filename="([^"]*)"')
+
+
+def parse_multipart(body, content_type):
+    """Return (filename, bytes) for every file part of a multipart body"""
+    match = _BOUNDARY.search(content_type)
+    if not match:
+        raise HTTPError(400, "multipart body without boundary")
+    delimiter = b'--' + match.group(1).encode()
+    files = []
+    # Preamble before the first delimiter and the epilogue after '--' are ignored
+    for part in body.split(delimiter)[1:]:
+        if part.startswith(b'--'):
+            break
+        head, sep, data = part.partition(b'\r\n\r\n')
+        if not sep:
+            raise HTTPError(400, "malformed multipart part")
+        if data.endswith(b'\r\n'):
+            data = data[:-2]
+        filename = _FILENAME.search(head)
+        if filename is None:
+            # Plain form fields carry no image
+            continue
+        files.append((filename.group(1).decode('utf-8', 'replace'), data))
+    return files
+
+
+def parse_images(headers, body):
+    """Images in a request: multipart files or the raw body"""
+    content_type = headers.get('content-type', '')
+    if content_type.startswith('multipart/form-data'):
+        images = parse_multipart(body, content_type)
+    elif content_type.startswith(('image/', 'application/octet-stream')) or not content_type:
+        images = [('image', body)] if body else []
+    else:
+        raise HTTPError(415, f"unsupported content type '{content_type}'")
+    if not images:
+        raise HTTPError(400, "no image in request")
+    if len(images) > config.API_MAX_IMAGES:
+        raise HTTPError(413, f"at most {config.API_MAX_IMAGES} images per request")
+    return images
+
+
+async def read_request(reader, max_body):
+    """Read one request; None when the client closed the connection"""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(400, "malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise HTTPError(400, "too many headers")
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    body = b''
+    if method == 'POST':
+        if 'chunked' in headers.get('transfer-encoding', '').lower() or 'content-length' not in headers:
+            raise HTTPError(411, "Content-Length required")
+        try:
+            length = int(headers['content-length'])
+        except ValueError:
+            raise HTTPError(400, "invalid Content-Length")
+        if length > max_body:
+            raise HTTPError(413, f"request body larger than {max_body} bytes")
+        body = await reader.readexactly(length)
+    return method, target, version, headers, body
+
+
+# ============================================================================
+# INFERENCE
+# ============================================================================
+
+class InferenceService:
+    """Model, batching scheduler and prediction cache shared by all clients"""
+
+    def __init__(self, runtime=None, workers=None, class_names=None):
+        self.runtime = runtime or default_runtime()
+        self.executor = ThreadPoolExecutor(workers or os.cpu_count(), thread_name_prefix='leaf-guard-api')
+        self.class_names = class_names or inference.load_class_names()
+        self.cache = PredictionCache(config.PREDICTION_CACHE_SIZE, config.PREDICTION_CACHE_TTL_S) \
+            if config.PREDICTION_CACHE_SIZE else None
+        if self.cache is not None:
+            metrics.track_cache(self.cache)
+        self._model = None
+        self._scheduler = None
+
+    async def model(self):
+        """Loaded model; the first call waits for the load off the event loop"""
+        if self._model is None:
+            try:
+                model = await asyncio.get_running_loop().run_in_executor(self.executor, self.runtime.get)
+            except Exception as e:
+                raise HTTPError(503, f"model unavailable: {e}")
+            if self._model is None:
+                self._scheduler = MicroBatchScheduler(
+                    lambda batch: inference.predict_array(model, batch),
+                    concurrency=getattr(model, 'concurrency', 1)
+                )
+                self._model = model
+        return self._model
+
+    @staticmethod
+    def _decode(data, version):
+        """Check the header, then decode, validate and hash one upload (runs in the thread pool)"""
+        source = BytesIO(data)
+        try:
+            upload_gate.inspect(source)
+        except upload_gate.UploadRejected as e:
+            return None, None, str(e)
+        prepared = preprocessing.prepare(source)
+        with metrics.stage('validate'):
+            valid, message = preprocessing.validate_prepared(prepared)
+        if not valid:
+            metrics.REJECTIONS.inc(reason='invalid_image')
+            return None, None, message
+        return prepared, cache_key(prepared.pixels, version), message
+
+    async def predict(self, filename, data, top_k):
+        """Top-k predictions for one image, or an error entry"""
+        model = await self.model()
+        loop = asyncio.get_running_loop()
+        try:
+            prepared, key, message = await loop.run_in_executor(
+                self.executor, self._decode, data, inference.model_version(model)
+            )
+        except Exception as e:
+            return {'filename': filename, 'error': f"cannot decode image: {e}"}
+        if prepared is None:
+            return {'filename': filename, 'error': message}
+
+        probabilities = self.cache.get(key) if self.cache is not None else None
+        if self.cache is not None:
+            metrics.CACHE_LOOKUPS.inc(result='miss' if probabilities is None else 'hit')
+        if probabilities is None:
+            start = time.perf_counter()
+            try:
+                probabilities = await asyncio.wrap_future(self._scheduler.submit(prepared.pixels))
+            except Exception:
+                metrics.STAGE_ERRORS.inc(stage='inference')
+                raise
+            finally:
+                metrics.STAGE_SECONDS.observe(time.perf_counter() - start, stage='inference')
+            self.runtime.record_inference(time.perf_counter() - start)
+            if self.cache is not None:
+                self.cache.put(key, probabilities)
+
+        results = inference.top_k_predictions(probabilities, self.class_names, top_k)
+        augmented = tta.should_apply(results)
+        if augmented:
+            # One extra batched pass over flipped/rotated/cropped views
+            probabilities = await loop.run_in_executor(
+                self.executor, tta.refine, model, prepared.pixels, probabilities, self.cache
+            )
+            results = inference.top_k_predictions(probabilities, self.class_names, top_k)
+        low_confidence = inference.is_low_confidence(results)
+        if low_confidence:
+            metrics.REJECTIONS.inc(reason='low_confidence')
+        return {
+            'filename': filename,
+            'predictions': results,
+            'low_confidence': low_confidence,
+            'augmented': augmented,
+        }
+
+    async def predict_many(self, images, top_k):
+        """Predict every image concurrently so they share scheduler batches"""
+        results = await asyncio.gather(*(self.predict(name, data, top_k) for name, data in images))
+        return {'model_version': inference.model_version(self._model), 'results': results}
+
+
+# ============================================================================
+# HTTP SERVER
+# ============================================================================
+
+def wants_keep_alive(version, headers):
+    connection = headers.get('connection', '').lower()
+    if version == 'HTTP/1.1':
+        return connection != 'close'
+    return connection == 'keep-alive'
+
+
+def json_response(status, payload):
+    return status, 'application/json', json.dumps(payload).encode()
+
+
+class APIServer:
+    """asyncio HTTP/1.1 front end with keep-alive"""
+
+    def __init__(self, service, max_body=None):
+        self.service = service
+        self.max_body = max_body or int(config.API_MAX_BODY_MB * 1024 * 1024)
+
+    async def dispatch(self, method, target, headers, body):
+        url = urlsplit(target)
+        if url.path == '/v1/predict':
+            if method != 'POST':
+                raise HTTPError(405, "use POST")
+            query = parse_qs(url.query)
+            try:
+                top_k = max(1, min(int(query.get('top_k', [inference.TOP_K])[0]), len(self.service.class_names)))
+            except ValueError:
+                raise HTTPError(400, "top_k must be an integer")
+            images = parse_images(headers, body)
+            return json_response(200, await self.service.predict_many(images, top_k))
+
+        handler = probes.ROUTES.get(url.path)
+        if handler is None:
+            raise HTTPError(404, "not found")
+        if method != 'GET':
+            raise HTTPError(405, "use GET")
+        return handler()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await read_request(reader, self.max_body)
+                    if request is None:
+                        break
+                    method, target, version, headers, body = request
+                    keep_alive = wants_keep_alive(version, headers)
+                    status, content_type, payload = await self.dispatch(method, target, headers, body)
+                except HTTPError as e:
+                    status, content_type, payload = json_response(e.status, {'error': str(e)})
+                except Exception:
+                    logger.exception("Request failed")
+                    status, content_type, payload = json_response(500, {'error': 'internal error'})
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        logger.info("Inference API listening on %s:%s", *server.sockets[0].getsockname()[:2])
+        async with server:
+            await server.serve_forever()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Leaf Guard HTTP inference API")
+    parser.add_argument('--host', default=config.API_HOST)
+    parser.add_argument('--port', type=int, default=config.API_PORT)
+    parser.add_argument('--workers', type=int, default=config.API_WORKERS,
+                        help="Decode threads (0 = one per CPU)")
+    parser.add_argument('--class-names', default=inference.CLASS_NAMES_PATH)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    runtime = default_runtime()
+    runtime.start_background()
+    service = InferenceService(runtime, args.workers, inference.load_class_names(args.class_names))
+    try:
+        asyncio.run(APIServer(service).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
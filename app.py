@@ -6,14 +6,32 @@
 # ============================================================================
 
 import streamlit as st
-import tensorflow as tf
-from tensorflow import keras
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import numpy as np
-from PIL import Image
 import os
+import tempfile
+import time
+import uuid
 from datetime import datetime
-import base64
-from io import BytesIO
+
+import config
+import history_export
+import i18n
+import inference
+import metrics
+import preprocessing
+import probes
+import static_assets
+import stream_scan
+import tiling
+import tta
+import upload_gate
+from history_store import IMAGE_EXTENSIONS, IMAGES, HistoryStore, make_thumbnail
+from knowledge_index import KnowledgeIndex
+from prediction_cache import PredictionCache, cache_key
+from preprocessing import PreparedImage
+from runtime import default_runtime
+from scheduler import MicroBatchScheduler
 
 # ============================================================================
 # PAGE CONFIGURATION
@@ -33,398 +51,21 @@ st.set_page_config(
 
 
 # ============================================================================
-# COMPREHENSIVE TRANSLATIONS
+# TRANSLATIONS
 # ============================================================================
 
-TRANSLATIONS = {
-    'english': {
-        'title': 'LEAF GUARD AI',
-        'subtitle': 'Advanced Agricultural Intelligence Platform',
-        'tagline': 'Empowering Farmers with AI-Driven Precision Agriculture',
-        'scan': 'Scan & Detect',
-        'cost_calc': 'Cost Calculator',
-        'crop_calendar': 'Crop Calendar',
-        'history': 'History',
-        'detectable_diseases': 'Detectable Diseases',
-        'upload_image': 'Upload Plant Image',
-        'drag_drop': 'Drag and drop or click to upload',
-        'upload_help': 'Upload a clear image of the affected leaf for instant AI analysis',
-        'uploaded_image': 'Uploaded Image',
-        'ai_analysis': 'AI Analysis',
-        'analyze_disease': 'Analyze Disease',
-        'analyzing': 'AI is analyzing your image...',
-        'confidence_level': 'Confidence Level',
-        'detection_probabilities': 'Detection Probabilities',
-        'disease_symptoms': 'Disease Symptoms',
-        'organic_treatment': 'Organic Treatment',
-        'chemical_treatment': 'Chemical Treatment',
-        'prevention_strategies': 'Prevention Strategies',
-        'key_facts': 'Key Facts',
-        'analysis_complete': 'Analysis complete! Results saved to history.',
-        'upload_to_begin': 'Upload a leaf image to begin AI analysis',
-        'upload_guidelines': 'Upload Guidelines',
-        'guideline_1': 'Use well-lit, clear images',
-        'guideline_2': 'Focus on the affected leaf area',
-        'guideline_3': 'Capture the entire leaf when possible',
-        'guideline_4': 'Avoid blurry or extremely dark images',
-        'guideline_5': 'One leaf per image for best accuracy',
-        'disease_database': 'Comprehensive Disease Database',
-        'database_desc': 'Our advanced AI model can accurately identify 10+ plant diseases across major agricultural crops. Simply upload a clear photograph of the affected leaf for instant diagnosis and treatment recommendations.',
-        'best_practices': 'Best Practices for Accurate Detection',
-        'lighting': 'Lighting',
-        'lighting_desc': 'Take photos in bright, natural daylight',
-        'focus': 'Focus',
-        'focus_desc': 'Ensure the affected area is clearly visible',
-        'distance': 'Distance',
-        'distance_desc': 'Capture from 6-12 inches away',
-        'angle': 'Angle',
-        'angle_desc': 'Photograph straight on, not at an angle',
-        'background': 'Background',
-        'background_desc': 'Use plain background if possible',
-        'cost_calculator': 'Treatment Cost Calculator',
-        'input_parameters': 'Input Parameters',
-        'select_disease': 'Select Disease for Treatment Cost Estimation',
-        'affected_area': 'Affected Area (acres)',
-        'area_help': 'Enter the total area requiring treatment',
-        'treatment_preference': 'Treatment Preference',
-        'treatment_help': 'Select your preferred treatment approach',
-        'organic': 'Organic',
-        'chemical': 'Chemical',
-        'integrated': 'Integrated (Both)',
-        'calculate_cost': 'Calculate Treatment Cost',
-        'cost_analysis': 'Cost Analysis for',
-        'acres': 'acre(s)',
-        'total_cost': 'Total Estimated Cost',
-        'cost_breakdown': 'Detailed Cost Breakdown',
-        'materials': 'Materials',
-        'labor': 'Labor',
-        'equipment': 'Equipment',
-        'treatment_protocol': 'Treatment Protocol',
-        'selected_treatment': 'Selected Treatment:',
-        'recommended_products': 'Recommended Products:',
-        'cost_note': 'Note: Costs are estimates based on current market rates. Actual costs may vary by location, disease severity, and product availability.',
-        'cost_components': 'Cost Components',
-        'materials_list': 'Fungicides/Bactericides',
-        'copper_compounds': 'Copper compounds',
-        'organic_treatments': 'Organic treatments',
-        'protective_equipment': 'Protective equipment',
-        'application_time': 'Application time',
-        'plant_removal': 'Infected plant removal',
-        'field_monitoring': 'Field monitoring',
-        'post_treatment': 'Post-treatment care',
-        'sprayers': 'Sprayers & applicators',
-        'hand_tools': 'Hand tools',
-        'safety_gear': 'Safety gear',
-        'storage': 'Storage containers',
-        'savings_tips': 'Savings Tips',
-        'tip_1': 'Implement preventive measures early',
-        'tip_2': 'Join farmer cooperatives for bulk discounts',
-        'tip_3': 'Early detection reduces treatment costs',
-        'tip_4': 'Practice crop rotation to minimize disease',
-        'crop_planning': 'Comprehensive Crop Planning Guide',
-        'select_crop': 'Select Crop for Detailed Information',
-        'growing_guide': 'Complete Growing Guide',
-        'planting_season': 'Planting Season',
-        'harvest_season': 'Harvest Season',
-        'optimal_temp': 'Optimal Temperature',
-        'water_requirements': 'Water Requirements',
-        'plant_spacing': 'Plant Spacing',
-        'soil_ph': 'Soil pH',
-        'days_to_harvest': 'Days to Harvest',
-        'best_season': 'Best Season',
-        'monthly_action': 'Monthly Action Plan',
-        'planting': 'Planting:',
-        'planting_desc': 'Review calendar above for suitable crops this month',
-        'maintenance': 'Maintenance:',
-        'maintenance_desc': 'Regular monitoring for pests and diseases',
-        'soil_prep': 'Soil Preparation:',
-        'soil_prep_desc': 'Prepare beds for upcoming planting',
-        'fertilization': 'Fertilization:',
-        'fertilization_desc': 'Follow growth stage-specific schedule',
-        'scan_history': 'Scan History & Performance Analytics',
-        'no_history': 'No Scan History Available',
-        'no_history_desc': 'Start by scanning a leaf in the Scan & Detect tab to build your analysis history.',
-        'total_scans': 'Total Scans',
-        'avg_confidence': 'Average Confidence',
-        'clear_history': 'Clear All History',
-        'history_cleared': 'History cleared successfully!',
-        'disease_stats': 'Disease Detection Statistics',
-        'scan_records': 'Detailed Scan Records',
-        'confidence': 'Confidence:',
-        'showing_latest': 'Showing latest 20 of',
-        'total_scans_text': 'total scans.',
-        'model_accuracy': 'Model Accuracy',
-        'detectable': 'Detectable Diseases',
-        'tomato': 'Tomato',
-        'potato': 'Potato',
-        'pepper': 'Pepper',
-        'corn': 'Corn',
-        'severity_high': 'High',
-        'severity_medium': 'Medium',
-        'severity_low': 'Low',
-    },
-    'hindi': {
-        'title': 'लीफ गार्ड AI',
-        'subtitle': 'उन्नत कृषि बुद्धिमत्ता मंच',
-        'tagline': 'AI-संचालित सटीक कृषि के साथ किसानों को सशक्त बनाना',
-        'scan': 'स्कैन और पहचान',
-        'cost_calc': 'लागत कैलकुलेटर',
-        'crop_calendar': 'फसल कैलेंडर',
-        'history': 'इतिहास',
-        'detectable_diseases': 'पहचानने योग्य रोग',
-        'upload_image': 'पौधे की छवि अपलोड करें',
-        'drag_drop': 'खींचें और छोड़ें या अपलोड करने के लिए क्लिक करें',
-        'upload_help': 'तत्काल AI विश्लेषण के लिए प्रभावित पत्ती की स्पष्ट छवि अपलोड करें',
-        'uploaded_image': 'अपलोड की गई छवि',
-        'ai_analysis': 'AI विश्लेषण',
-        'analyze_disease': 'रोग का विश्लेषण करें',
-        'analyzing': 'AI आपकी छवि का विश्लेषण कर रहा है...',
-        'confidence_level': 'विश्वास स्तर',
-        'detection_probabilities': 'पहचान संभावनाएं',
-        'disease_symptoms': 'रोग के लक्षण',
-        'organic_treatment': 'जैविक उपचार',
-        'chemical_treatment': 'रासायनिक उपचार',
-        'prevention_strategies': 'रोकथाम रणनीतियां',
-        'key_facts': 'मुख्य तथ्य',
-        'analysis_complete': 'विश्लेषण पूर्ण! परिणाम इतिहास में सहेजे गए।',
-        'upload_to_begin': 'AI विश्लेषण शुरू करने के लिए पत्ती की छवि अपलोड करें',
-        'upload_guidelines': 'अपलोड दिशानिर्देश',
-        'guideline_1': 'अच्छी रोशनी वाली स्पष्ट छवियों का उपयोग करें',
-        'guideline_2': 'प्रभावित पत्ती क्षेत्र पर ध्यान केंद्रित करें',
-        'guideline_3': 'जब संभव हो तो पूरी पत्ती को कैप्चर करें',
-        'guideline_4': 'धुंधली या बहुत अंधेरी छवियों से बचें',
-        'guideline_5': 'सर्वोत्तम सटीकता के लिए प्रति छवि एक पत्ती',
-        'disease_database': 'व्यापक रोग डेटाबेस',
-        'database_desc': 'हमारा उन्नत AI मॉडल प्रमुख कृषि फसलों में 10+ पौधों की बीमारियों को सटीक रूप से पहचान सकता है। तत्काल निदान और उपचार सिफारिशों के लिए बस प्रभावित पत्ती की एक स्पष्ट तस्वीर अपलोड करें।',
-        'best_practices': 'सटीक पहचान के लिए सर्वोत्तम प्रथाएं',
-        'lighting': 'प्रकाश',
-        'lighting_desc': 'उज्ज्वल, प्राकृतिक दिन के उजाले में फोटो लें',
-        'focus': 'फोकस',
-        'focus_desc': 'सुनिश्चित करें कि प्रभावित क्षेत्र स्पष्ट रूप से दिखाई दे',
-        'distance': 'दूरी',
-        'distance_desc': '6-12 इंच दूर से कैप्चर करें',
-        'angle': 'कोण',
-        'angle_desc': 'सीधे फोटो लें, कोण पर नहीं',
-        'background': 'पृष्ठभूमि',
-        'background_desc': 'यदि संभव हो तो सादे पृष्ठभूमि का उपयोग करें',
-        'cost_calculator': 'उपचार लागत कैलकुलेटर',
-        'input_parameters': 'इनपुट पैरामीटर',
-        'select_disease': 'उपचार लागत अनुमान के लिए रोग चुनें',
-        'affected_area': 'प्रभावित क्षेत्र (एकड़)',
-        'area_help': 'उपचार की आवश्यकता वाले कुल क्षेत्र दर्ज करें',
-        'treatment_preference': 'उपचार वरीयता',
-        'treatment_help': 'अपनी पसंदीदा उपचार विधि चुनें',
-        'organic': 'जैविक',
-        'chemical': 'रासायनिक',
-        'integrated': 'एकीकृत (दोनों)',
-        'calculate_cost': 'उपचार लागत की गणना करें',
-        'cost_analysis': 'लागत विश्लेषण',
-        'acres': 'एकड़',
-        'total_cost': 'कुल अनुमानित लागत',
-        'cost_breakdown': 'विस्तृत लागत विवरण',
-        'materials': 'सामग्री',
-        'labor': 'श्रम',
-        'equipment': 'उपकरण',
-        'treatment_protocol': 'उपचार प्रोटोकॉल',
-        'selected_treatment': 'चयनित उपचार:',
-        'recommended_products': 'अनुशंसित उत्पाद:',
-        'cost_note': 'नोट: लागत वर्तमान बाजार दरों के आधार पर अनुमान हैं। वास्तविक लागत स्थान, रोग की गंभीरता और उत्पाद उपलब्धता के अनुसार भिन्न हो सकती है।',
-        'cost_components': 'लागत घटक',
-        'materials_list': 'फफूंदनाशक/जीवाणुनाशक',
-        'copper_compounds': 'तांबा यौगिक',
-        'organic_treatments': 'जैविक उपचार',
-        'protective_equipment': 'सुरक्षात्मक उपकरण',
-        'application_time': 'आवेदन का समय',
-        'plant_removal': 'संक्रमित पौधे को हटाना',
-        'field_monitoring': 'क्षेत्र निगरानी',
-        'post_treatment': 'उपचार के बाद देखभाल',
-        'sprayers': 'स्प्रेयर और एप्लीकेटर',
-        'hand_tools': 'हाथ के औजार',
-        'safety_gear': 'सुरक्षा गियर',
-        'storage': 'भंडारण कंटेनर',
-        'savings_tips': 'बचत युक्तियाँ',
-        'tip_1': 'जल्दी निवारक उपाय लागू करें',
-        'tip_2': 'थोक छूट के लिए किसान सहकारी समितियों में शामिल हों',
-        'tip_3': 'प्रारंभिक पहचान उपचार लागत कम करती है',
-        'tip_4': 'रोग को कम करने के लिए फसल चक्र का अभ्यास करें',
-        'crop_planning': 'व्यापक फसल योजना गाइड',
-        'select_crop': 'विस्तृत जानकारी के लिए फसल चुनें',
-        'growing_guide': 'संपूर्ण उगाने की गाइड',
-        'planting_season': 'रोपण का मौसम',
-        'harvest_season': 'कटाई का मौसम',
-        'optimal_temp': 'इष्टतम तापमान',
-        'water_requirements': 'पानी की आवश्यकताएं',
-        'plant_spacing': 'पौधे की दूरी',
-        'soil_ph': 'मिट्टी pH',
-        'days_to_harvest': 'कटाई के दिन',
-        'best_season': 'सर्वोत्तम मौसम',
-        'monthly_action': 'मासिक कार्य योजना',
-        'planting': 'रोपण:',
-        'planting_desc': 'इस महीने उपयुक्त फसलों के लिए ऊपर कैलेंडर देखें',
-        'maintenance': 'रखरखाव:',
-        'maintenance_desc': 'कीटों और रोगों के लिए नियमित निगरानी',
-        'soil_prep': 'मिट्टी की तैयारी:',
-        'soil_prep_desc': 'आगामी रोपण के लिए बेड तैयार करें',
-        'fertilization': 'उर्वरक:',
-        'fertilization_desc': 'वृद्धि चरण-विशिष्ट अनुसूची का पालन करें',
-        'scan_history': 'स्कैन इतिहास और प्रदर्शन विश्लेषण',
-        'no_history': 'कोई स्कैन इतिहास उपलब्ध नहीं',
-        'no_history_desc': 'अपना विश्लेषण इतिहास बनाने के लिए स्कैन और पहचान टैब में एक पत्ती को स्कैन करके शुरू करें।',
-        'total_scans': 'कुल स्कैन',
-        'avg_confidence': 'औसत विश्वास',
-        'clear_history': 'सभी इतिहास साफ़ करें',
-        'history_cleared': 'इतिहास सफलतापूर्वक साफ़ हो गया!',
-        'disease_stats': 'रोग पहचान सांख्यिकी',
-        'scan_records': 'विस्तृत स्कैन रिकॉर्ड',
-        'confidence': 'विश्वास:',
-        'showing_latest': 'नवीनतम 20 दिखा रहे हैं',
-        'total_scans_text': 'कुल स्कैन।',
-        'model_accuracy': 'मॉडल सटीकता',
-        'detectable': 'पहचानने योग्य रोग',
-        'tomato': 'टमाटर',
-        'potato': 'आलू',
-        'pepper': 'मिर्च',
-        'corn': 'मक्का',
-        'severity_high': 'उच्च',
-        'severity_medium': 'मध्यम',
-        'severity_low': 'निम्न',
-    },
-    'bengali': {
-        'title': 'লীফ গার্ড AI',
-        'subtitle': 'উন্নত কৃষি বুদ্ধিমত্তা প্ল্যাটফর্ম',
-        'tagline': 'AI-চালিত নির্ভুল কৃষির মাধ্যমে কৃষকদের ক্ষমতায়ন',
-        'scan': 'স্ক্যান এবং সনাক্ত করুন',
-        'cost_calc': 'খরচ ক্যালকুলেটর',
-        'crop_calendar': 'ফসল ক্যালেন্ডার',
-        'history': 'ইতিহাস',
-        'detectable_diseases': 'সনাক্তযোগ্য রোগ',
-        'upload_image': 'উদ্ভিদের ছবি আপলোড করুন',
-        'drag_drop': 'টেনে আনুন এবং ড্রপ করুন বা আপলোড করতে ক্লিক করুন',
-        'upload_help': 'তাত্ক্ষণিক AI বিশ্লেষণের জন্য প্রভাবিত পাতার একটি স্পষ্ট ছবি আপলোড করুন',
-        'uploaded_image': 'আপলোড করা ছবি',
-        'ai_analysis': 'AI বিশ্লেষণ',
-        'analyze_disease': 'রোগ বিশ্লেষণ করুন',
-        'analyzing': 'AI আপনার ছবি বিশ্লেষণ করছে...',
-        'confidence_level': 'আত্মবিশ্বাসের স্তর',
-        'detection_probabilities': 'সনাক্তকরণ সম্ভাবনা',
-        'disease_symptoms': 'রোগের লক্ষণ',
-        'organic_treatment': 'জৈব চিকিৎসা',
-        'chemical_treatment': 'রাসায়নিক চিকিৎসা',
-        'prevention_strategies': 'প্রতিরোধ কৌশল',
-        'key_facts': 'মূল তথ্য',
-        'analysis_complete': 'বিশ্লেষণ সম্পূর্ণ! ফলাফল ইতিহাসে সংরক্ষিত।',
-        'upload_to_begin': 'AI বিশ্লেষণ শুরু করতে একটি পাতার ছবি আপলোড করুন',
-        'upload_guidelines': 'আপলোড নির্দেশিকা',
-        'guideline_1': 'ভাল আলোযুক্ত, পরিষ্কার ছবি ব্যবহার করুন',
-        'guideline_2': 'প্রভাবিত পাতার এলাকায় ফোকাস করুন',
-        'guideline_3': 'সম্ভব হলে সম্পূর্ণ পাতা ক্যাপচার করুন',
-        'guideline_4': 'ঝাপসা বা অত্যন্ত অন্ধকার ছবি এড়িয়ে চলুন',
-        'guideline_5': 'সর্বোত্তম নির্ভুলতার জন্য প্রতি ছবিতে একটি পাতা',
-        'disease_database': 'বিস্তৃত রোগ ডেটাবেস',
-        'database_desc': 'আমাদের উন্নত AI মডেল প্রধান কৃষি ফসলের মধ্যে 10+ উদ্ভিদ রোগ সঠিকভাবে সনাক্ত করতে পারে। তাত্ক্ষণিক নির্ণয় এবং চিকিৎসা সুপারিশের জন্য শুধুমাত্র প্রভাবিত পাতার একটি স্পষ্ট ছবি আপলোড করুন।',
-        'best_practices': 'সঠিক সনাক্তকরণের জন্য সেরা অনুশীলন',
-        'lighting': 'আলো',
-        'lighting_desc': 'উজ্জ্বল, প্রাকৃতিক দিনের আলোতে ফটো তুলুন',
-        'focus': 'ফোকাস',
-        'focus_desc': 'নিশ্চিত করুন যে প্রভাবিত এলাকা স্পষ্টভাবে দৃশ্যমান',
-        'distance': 'দূরত্ব',
-        'distance_desc': '6-12 ইঞ্চি দূর থেকে ক্যাপচার করুন',
-        'angle': 'কোণ',
-        'angle_desc': 'সরাসরি ফটোগ্রাফ করুন, কোণে নয়',
-        'background': 'পটভূমি',
-        'background_desc': 'সম্ভব হলে সাধারণ পটভূমি ব্যবহার করুন',
-        'cost_calculator': 'চিকিৎসা খরচ ক্যালকুলেটর',
-        'input_parameters': 'ইনপুট প্যারামিটার',
-        'select_disease': 'চিকিৎসা খরচ অনুমানের জন্য রোগ নির্বাচন করুন',
-        'affected_area': 'প্রভাবিত এলাকা (একর)',
-        'area_help': 'চিকিৎসার প্রয়োজন মোট এলাকা লিখুন',
-        'treatment_preference': 'চিকিৎসা পছন্দ',
-        'treatment_help': 'আপনার পছন্দের চিকিৎসা পদ্ধতি নির্বাচন করুন',
-        'organic': 'জৈব',
-        'chemical': 'রাসায়নিক',
-        'integrated': 'সমন্বিত (উভয়)',
-        'calculate_cost': 'চিকিৎসা খরচ গণনা করুন',
-        'cost_analysis': 'খরচ বিশ্লেষণ',
-        'acres': 'একর',
-        'total_cost': 'মোট আনুমানিক খরচ',
-        'cost_breakdown': 'বিস্তারিত খরচ বিবরণ',
-        'materials': 'উপকরণ',
-        'labor': 'শ্রম',
-        'equipment': 'সরঞ্জাম',
-        'treatment_protocol': 'চিকিৎসা প্রোটোকল',
-        'selected_treatment': 'নির্বাচিত চিকিৎসা:',
-        'recommended_products': 'প্রস্তাবিত পণ্য:',
-        'cost_note': 'নোট: খরচ বর্তমান বাজার হারের উপর ভিত্তি করে অনুমান। প্রকৃত খরচ অবস্থান, রোগের তীব্রতা এবং পণ্য প্রাপ্যতার উপর নির্ভর করে পরিবর্তিত হতে পারে।',
-        'cost_components': 'খরচ উপাদান',
-        'materials_list': 'ছত্রাকনাশক/ব্যাকটেরিয়ানাশক',
-        'copper_compounds': 'তামা যৌগ',
-        'organic_treatments': 'জৈব চিকিৎসা',
-        'protective_equipment': 'সুরক্ষামূলক সরঞ্জাম',
-        'application_time': 'প্রয়োগের সময়',
-        'plant_removal': 'সংক্রমিত উদ্ভিদ অপসারণ',
-        'field_monitoring': 'মাঠ পর্যবেক্ষণ',
-        'post_treatment': 'চিকিৎসা পরবর্তী যত্ন',
-        'sprayers': 'স্প্রেয়ার এবং অ্যাপ্লিকেটর',
-        'hand_tools': 'হাতের সরঞ্জাম',
-        'safety_gear': 'নিরাপত্তা গিয়ার',
-        'storage': 'সংরক্ষণ পাত্র',
-        'savings_tips': 'সঞ্চয় টিপস',
-        'tip_1': 'প্রাথমিক প্রতিরোধমূলক ব্যবস্থা প্রয়োগ করুন',
-        'tip_2': 'থোক ছাড়ের জন্য কৃষক সমবায়ে যোগ দিন',
-        'tip_3': 'প্রাথমিক সনাক্তকরণ চিকিৎসা খরচ হ্রাস করে',
-        'tip_4': 'রোগ কমাতে ফসল ঘূর্ণন অনুশীলন করুন',
-        'crop_planning': 'বিস্তৃত ফসল পরিকল্পনা গাইড',
-        'select_crop': 'বিস্তারিত তথ্যের জন্য ফসল নির্বাচন করুন',
-        'growing_guide': 'সম্পূর্ণ ক্রমবর্ধমান গাইড',
-        'planting_season': 'রোপণ মৌসুম',
-        'harvest_season': 'ফসল কাটার মৌসুম',
-        'optimal_temp': 'সর্বোত্তম তাপমাত্রা',
-        'water_requirements': 'জলের প্রয়োজনীয়তা',
-        'plant_spacing': 'উদ্ভিদ দূরত্ব',
-        'soil_ph': 'মাটি pH',
-        'days_to_harvest': 'ফসল কাটার দিন',
-        'best_season': 'সেরা মৌসুম',
-        'monthly_action': 'মাসিক কর্ম পরিকল্পনা',
-        'planting': 'রোপণ:',
-        'planting_desc': 'এই মাসে উপযুক্ত ফসলের জন্য উপরে ক্যালেন্ডার পর্যালোচনা করুন',
-        'maintenance': 'রক্ষণাবেক্ষণ:',
-        'maintenance_desc': 'কীটপতঙ্গ এবং রোগের জন্য নিয়মিত পর্যবেক্ষণ',
-        'soil_prep': 'মাটি প্রস্তুতি:',
-        'soil_prep_desc': 'আগামী রোপণের জন্য বিছানা প্রস্তুত করুন',
-        'fertilization': 'সার:',
-        'fertilization_desc': 'বৃদ্ধির পর্যায়-নির্দিষ্ট সময়সূচী অনুসরণ করুন',
-        'scan_history': 'স্ক্যান ইতিহাস এবং কর্মক্ষমতা বিশ্লেষণ',
-        'no_history': 'কোন স্ক্যান ইতিহাস উপলব্ধ নেই',
-        'no_history_desc': 'আপনার বিশ্লেষণ ইতিহাস তৈরি করতে স্ক্যান এবং সনাক্ত করুন ট্যাবে একটি পাতা স্ক্যান করে শুরু করুন।',
-        'total_scans': 'মোট স্ক্যান',
-        'avg_confidence': 'গড় আত্মবিশ্বাস',
-        'clear_history': 'সমস্ত ইতিহাস সাফ করুন',
-        'history_cleared': 'ইতিহাস সফলভাবে সাফ হয়েছে!',
-        'disease_stats': 'রোগ সনাক্তকরণ পরিসংখ্যান',
-        'scan_records': 'বিস্তারিত স্ক্যান রেকর্ড',
-        'confidence': 'আত্মবিশ্বাস:',
-        'showing_latest': 'সর্বশেষ 20 দেখাচ্ছে',
-        'total_scans_text': 'মোট স্ক্যান।',
-        'model_accuracy': 'মডেল নির্ভুলতা',
-        'detectable': 'সনাক্তযোগ্য রোগ',
-        'tomato': 'টমেটো',
-        'potato': 'আলু',
-        'pepper': 'মরিচ',
-        'corn': 'ভুট্টা',
-        'severity_high': 'উচ্চ',
-        'severity_medium': 'মাঝারি',
-        'severity_low': 'নিম্ন',
-    }
-}
+@st.cache_resource
+def get_translations():
+    """Translation catalogs (locales/*.json), each loaded on first use"""
+    return i18n.Catalogs(config.LOCALES_DIR, hot_reload=config.I18N_HOT_RELOAD)
 
 # ============================================================================
 # ENHANCED WARM COLOR SCHEME CSS WITH FIXED DROPDOWN VISIBILITY
 # ============================================================================
 
-def load_css():
-    st.markdown("""
-    <meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=5.0, user-scalable=yes">
-    <style>
+VIEWPORT_META = '<meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=5.0, user-scalable=yes">'
+
+APP_CSS = """
         @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800;900&display=swap');
         
         * {
@@ -1162,9 +803,17 @@ def load_css():
                 min-height: 44px !important;
             }
         }
-        
-    </style>
-    """, unsafe_allow_html=True)
+"""
+
+@st.cache_resource
+def get_stylesheet():
+    """Minify and content-hash the app stylesheet once per process"""
+    return static_assets.build_stylesheet('leaf_guard', APP_CSS)
+
+def load_css():
+    """Apply the stylesheet: a cached static file if served, else inline"""
+    tag = static_assets.stylesheet_tag(get_stylesheet(), st.get_option('server.enableStaticServing'))
+    st.markdown(VIEWPORT_META + tag, unsafe_allow_html=True)
 
 # ============================================================================
 # SESSION STATE
@@ -1172,8 +821,18 @@ def load_css():
 
 if 'language' not in st.session_state:
     st.session_state.language = 'english'
-if 'scan_history' not in st.session_state:
-    st.session_state.scan_history = []
+if 'history_id' not in st.session_state:
+    # Kept in the URL so a browser finds its history again after a reload.
+    # The id is the only key to the history: whoever has the URL can read
+    # and clear it, so it is not shown anywhere else in the UI
+    st.session_state.history_id = st.query_params.get('history') or uuid.uuid4().hex
+    st.query_params['history'] = st.session_state.history_id
+
+# Scan records per History tab page, read from the SQLite history store
+HISTORY_PAGE_SIZE = 20
+
+# Latest buckets shown in the History tab's trend chart, per granularity
+ANALYTICS_BUCKETS = {'day': 30, 'week': 26, 'hour': 48}
 
 # ============================================================================
 # DETECTABLE DISEASES DATABASE
@@ -1207,34 +866,50 @@ DETECTABLE_DISEASES = {
 # ============================================================================
 
 @st.cache_resource
+def get_runtime():
+    """Process-wide model runtime; TensorFlow is imported on first use"""
+    runtime = default_runtime()
+    if config.PROBE_PORT:
+        # Readiness is only meaningful if the model loads without a click
+        runtime.start_background()
+        probes.start_probe_server()
+    return runtime
+
 def load_model():
-    """Load the trained disease detection model"""
+    """Load the trained disease detection model via the configured backend"""
     try:
-        # Suppress TensorFlow warnings
-        import os
-        os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
-        
-        # Load model with compile=False to avoid version issues
-        model = keras.models.load_model('leaf_guard_best.h5', compile=False)
-        
-        # Recompile with current TensorFlow version
-        model.compile(
-            optimizer='adam',
-            loss='categorical_crossentropy',
-            metrics=['accuracy']
-        )
-        
-        return model
+        return get_runtime().get()
     except Exception as e:
+        metrics.STAGE_ERRORS.inc(stage='model_load')
         st.error(f"Model loading error: {str(e)}")
         return None
 
+@st.cache_resource
+def get_scheduler(_model):
+    """Shared micro-batching scheduler in front of the cached model"""
+    # A replica pool takes one batch per replica at a time
+    return MicroBatchScheduler(
+        lambda batch: inference.predict_array(_model, batch),
+        concurrency=getattr(_model, 'concurrency', 1)
+    )
+
+@st.cache_resource
+def get_prediction_cache():
+    """Prediction cache shared by all sessions"""
+    cache = PredictionCache(config.PREDICTION_CACHE_SIZE, config.PREDICTION_CACHE_TTL_S)
+    metrics.track_cache(cache)
+    return cache
+
+@st.cache_resource
+def get_history_store():
+    """Disk-backed scan history shared by all sessions"""
+    return HistoryStore(config.HISTORY_DIR)
+
 @st.cache_data
 def load_class_names():
     """Load class names from file"""
     try:
-        with open('class_names.txt', 'r') as f:
-            return [line.strip() for line in f.readlines()]
+        return inference.load_class_names()
     except FileNotFoundError:
         st.warning("Class names file not found. Using default classes.")
         return []
@@ -1392,97 +1067,194 @@ def load_crop_calendar():
 # HELPER FUNCTIONS
 # ============================================================================
 
-def get_disease_info(disease_name, disease_db):
-    """Get detailed information for a disease"""
-    for key in disease_db:
-        if key in disease_name.lower():
-            return disease_db[key]
-    return disease_db['default']
+@st.cache_resource
+def get_knowledge_index():
+    """Class index -> disease record, display name and severity (built once)"""
+    index = KnowledgeIndex(load_class_names(), load_disease_db(), DETECTABLE_DISEASES)
+    index.log_report()
+    return index
 
-def preprocess_image(image):
-    """Preprocess image for model prediction"""
+def prepare_image(image):
+    """Decode and normalize an upload once for both validation and inference"""
     try:
-        # Convert to RGB (handles RGBA, L, P modes)
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Resize to model input size
-        img = image.resize((224, 224))
-        
-        # Convert to array and normalize
-        img_array = np.array(img, dtype=np.float32) / 255.0
-        
-        # Add batch dimension
-        img_array = np.expand_dims(img_array, axis=0)
-        
-        return img_array
+        return preprocessing.prepare(image)
     except Exception as e:
         st.error(f"Error processing image: {str(e)}")
         return None
+
+def preprocess_image(image):
+    """Preprocess image for model prediction"""
+    prepared = prepare_image(image)
+    if prepared is None:
+        return None
+    # Add batch dimension
+    return prepared.pixels[np.newaxis]
     
 def validate_image(image):
-    """Validate if image is likely a plant leaf"""
+    """Validate if image is likely a plant leaf (PIL image or PreparedImage)"""
     try:
-        # Convert to RGB if needed
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Check image dimensions
-        width, height = image.size
-        
-        if width < 50 or height < 50:
-            return False, "Image is too small. Please upload a larger image (minimum 50x50 pixels)."
-        
-        if width > 4000 or height > 4000:
-            return False, "Image is too large. Please upload a smaller image (maximum 4000x4000 pixels)."
-        
-        # Check if image is mostly green (basic leaf detection)
-        img_array = np.array(image.resize((100, 100)))
-        
-        # Calculate average color channels
-        r_avg = np.mean(img_array[:, :, 0])
-        g_avg = np.mean(img_array[:, :, 1])
-        b_avg = np.mean(img_array[:, :, 2])
-        
-        # Very basic check: leaves usually have more green
-        # This is a loose check - you can adjust thresholds
-        if g_avg < 50 and r_avg < 50 and b_avg < 50:
-            return False, "⚠️ Warning: Image appears very dark. Please upload a well-lit image."
-        
-        return True, "Image validated successfully"
+        if not isinstance(image, PreparedImage):
+            image = preprocessing.prepare(image)
+        with metrics.stage('validate'):
+            is_valid, message = preprocessing.validate_prepared(image)
+        if not is_valid:
+            metrics.REJECTIONS.inc(reason='invalid_image')
+        return is_valid, message
         
     except Exception as e:
         return False, f"Error validating image: {str(e)}"
 
 def predict_disease(model, image, class_names):
-    """Predict disease from image and return top 3 predictions"""
+    """Predict disease from image (PIL image or PreparedImage) and return top 3 predictions"""
     try:
-        processed_img = preprocess_image(image)
-        
-        if processed_img is None:
-            return None
-        
-        # Make prediction
-        predictions = model.predict(processed_img, verbose=0)
-        
-        # Get top 3 predictions
-        top_3_idx = np.argsort(predictions[0])[-3:][::-1]
-        
-        results = [{
-            'disease': class_names[idx],
-            'confidence': float(predictions[0][idx]) * 100
-        } for idx in top_3_idx]
-        
-        # Check if top prediction confidence is too low
-        if results[0]['confidence'] < 30:
-            st.warning("⚠️ **Low Confidence Detection**: The uploaded image may not be a plant leaf or the disease is not in our database. Please upload a clear image of an affected leaf.")
-        
+        pixels = image.pixels if isinstance(image, PreparedImage) else inference.preprocess_image(image)
+        
+        # Repeat scans of the same photo skip the forward pass
+        cache = get_prediction_cache()
+        key = cache_key(pixels, inference.model_version(model))
+        probabilities = cache.get(key) if config.PREDICTION_CACHE_SIZE else None
+        if config.PREDICTION_CACHE_SIZE:
+            metrics.CACHE_LOOKUPS.inc(result='miss' if probabilities is None else 'hit')
+        
+        if probabilities is None:
+            # Concurrent sessions are coalesced into one batched forward pass
+            start = time.perf_counter()
+            with metrics.stage('inference'):
+                probabilities = get_scheduler(model).predict(pixels, timeout=config.SCHEDULER_TIMEOUT_S)
+            get_runtime().record_inference(time.perf_counter() - start)
+            if config.PREDICTION_CACHE_SIZE:
+                cache.put(key, probabilities)
+        
+        results = inference.top_k_predictions(probabilities, class_names)
+        
+        # Borderline result: re-score flipped/rotated/cropped views in one batch
+        if tta.should_apply(results):
+            probabilities = tta.refine(model, pixels, probabilities,
+                                       cache if config.PREDICTION_CACHE_SIZE else None)
+            results = inference.top_k_predictions(probabilities, class_names)
+        
+        warn_if_low_confidence(results)
         return results
         
     except Exception as e:
         st.error(f"Prediction error: {str(e)}")
         return None
 
+def predict_disease_tiled(model, image, class_names):
+    """High-resolution prediction over overlapping tiles of the leaf
+    
+    Returns (top 3 predictions, TiledPrediction with the lesion map). All
+    tiles go to the model as one batch, so this bypasses the scheduler.
+    """
+    try:
+        with metrics.stage('tiled_inference'):
+            prediction = tiling.predict_tiled(
+                image, lambda batch: inference.predict_array(model, batch), class_names
+            )
+        results = inference.top_k_predictions(prediction.probabilities, class_names)
+        warn_if_low_confidence(results)
+        return results, prediction
+        
+    except Exception as e:
+        st.error(f"Prediction error: {str(e)}")
+        return None, None
+
+def warn_if_low_confidence(results):
+    """Flag a top prediction below the model's confidence threshold"""
+    if inference.is_low_confidence(results):
+        metrics.REJECTIONS.inc(reason='low_confidence')
+        st.warning("⚠️ **Low Confidence Detection**: The uploaded image may not be a plant leaf or the disease is not in our database. Please upload a clear image of an affected leaf.")
+
+def render_analytics(history_store, history_id, knowledge, t):
+    """Per-disease, per-crop, over-time and confidence breakdowns of one history"""
+    st.markdown(f"### {t['analytics']}")
+    scans_label = t['total_scans']
+    
+    breakdown = history_store.by_disease(history_id)
+    by_crop = {}
+    for name, (scans, _) in breakdown.items():
+        crop = knowledge.lookup(name).crop
+        by_crop[crop] = by_crop.get(crop, 0) + scans
+    
+    col_disease, col_crop = st.columns([3, 2])
+    with col_disease:
+        st.markdown(f"**{t['scans_by_disease']}**")
+        st.bar_chart({scans_label: {
+            knowledge.lookup(name).display_name: scans for name, (scans, _) in breakdown.items()
+        }}, horizontal=True)
+    with col_crop:
+        st.markdown(f"**{t['scans_by_crop']}**")
+        st.bar_chart({scans_label: by_crop})
+    
+    granularity = st.radio(
+        t['scan_trend'], list(ANALYTICS_BUCKETS), format_func=lambda g: t[f'per_{g}'],
+        horizontal=True, key='analytics_granularity'
+    )
+    timeline = history_store.timeline(history_id, granularity, ANALYTICS_BUCKETS[granularity])
+    per_disease = {}
+    for bucket, counts in timeline.items():
+        for name, scans in counts.items():
+            per_disease.setdefault(knowledge.lookup(name).display_name, {})[bucket] = scans
+    st.bar_chart(per_disease)
+    
+    st.markdown(f"**{t['confidence_distribution']}**")
+    bins = history_store.confidence_histogram(history_id)
+    width = 100 // len(bins)
+    st.bar_chart({scans_label: {
+        f"{i * width:02d}–{(i + 1) * width}%": count for i, count in enumerate(bins)
+    }})
+
+
+def save_scan(image, disease, confidence, original=None):
+    """Append a scan to the history store
+    
+    The thumbnail is encoded once here; ``original`` (the uploaded bytes) is
+    stored as-is and only read back when a history record is expanded.
+    """
+    with metrics.stage('history_save'):
+        record = get_history_store().add(
+            st.session_state.history_id, disease, confidence, make_thumbnail(image),
+            image=(original, IMAGE_EXTENSIONS.get(image.format, 'img')) if original else None
+        )
+    return record
+
+def scan_video(video_file, class_names, t):
+    """Scan an uploaded video: sampled, de-duplicated frames in batches"""
+    model = load_model()
+    if model is None:
+        return
+    knowledge = get_knowledge_index()
+    scanner = stream_scan.StreamScanner(
+        lambda batch: inference.predict_array(model, batch), class_names, preview_side=480
+    )
+    latest = st.empty()
+    rows = []
+    # OpenCV reads from a path, not from the upload buffer
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(video_file.name)[1]) as tmp:
+        tmp.write(video_file.getbuffer())
+        tmp.flush()
+        try:
+            with metrics.stage('video_scan'):
+                for result in scanner.scan(stream_scan.video_frames(tmp.name, stats=scanner.stats)):
+                    top = result.results[0]
+                    name = knowledge[top['index']].display_name
+                    latest.image(result.preview, caption=f"{result.timestamp:.1f}s · {name} · {top['confidence']:.1f}%")
+                    rows.append({'Time (s)': round(result.timestamp, 1), 'Disease': name,
+                                 'Confidence': f"{top['confidence']:.1f}%"})
+        except RuntimeError as e:
+            st.error(str(e))
+            return
+    stats = scanner.stats
+    st.caption(f"{stats.scanned} {t['video_frames_analyzed']} · {stats.duplicates} {t['video_duplicates_skipped']}")
+    if rows:
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+
+def record_session_memory():
+    """Report this session's session_state size to the metrics endpoint"""
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        metrics.SESSION_MEMORY.record(ctx.session_id, metrics.deep_sizeof(st.session_state.to_dict()))
+
 def calculate_treatment_cost(disease_info, acres):
     """Calculate treatment cost for given acreage"""
     costs = disease_info.get('cost_per_acre', {'materials': 100, 'labor': 80, 'equipment': 40})
@@ -1505,16 +1277,17 @@ def main():
     """Main application function"""
     load_css()
     
+    translations = get_translations()
     lang = st.session_state.language
-    t = TRANSLATIONS[lang]
+    t = translations.catalog(lang)
     
     # Header with language selector
     col1, col2 = st.columns([9, 1])
     
     with col2:
         with st.container():
-            lang_options = ['english', 'hindi', 'bengali']
-            lang_display = {'english': 'EN', 'hindi': 'हिं', 'bengali': 'বাং'}
+            lang_display = translations.languages()
+            lang_options = list(lang_display)
             
             selected_lang = st.selectbox(
                 "Language",
@@ -1537,17 +1310,22 @@ def main():
     </div>
     """, unsafe_allow_html=True)
     
-    # Load resources
-    model = load_model()
+    # Load resources (the model itself is loaded on the first analysis)
+    get_runtime()
+    history_store = get_history_store()
+    history_id = st.session_state.history_id
+    total_scans = history_store.count(history_id)
     class_names = load_class_names()
     disease_db = load_disease_db()
     crop_calendar = load_crop_calendar()
     
-    if not model or not class_names:
+    if not class_names:
         st.error("**System Error**: Unable to load AI model or class definitions. Please ensure all required files are present.")
         st.info("**Required files**: `leaf_guard_best.h5`, `class_names.txt`")
         return
     
+    knowledge = get_knowledge_index()
+    
     # Stats Banner
     st.markdown('<div class="stats-banner">', unsafe_allow_html=True)
     cols = st.columns(3)
@@ -1571,7 +1349,7 @@ def main():
     with cols[2]:
         st.markdown(f"""
         <div class="stat-card">
-            <div class="stat-value">{len(st.session_state.scan_history)}</div>
+            <div class="stat-value">{total_scans}</div>
             <div class="stat-label">{t['total_scans']}</div>
         </div>
         """, unsafe_allow_html=True)
@@ -1604,28 +1382,49 @@ def main():
             )
             
             if uploaded_file:
-                image = Image.open(uploaded_file)
-                st.image(image, use_container_width=True, caption=t['uploaded_image'])
+                try:
+                    # Header only: bad, oversized and bomb files stop here
+                    upload_gate.inspect(uploaded_file)
+                    # Decoded at preview size; analysis re-opens the upload
+                    # lazily so each step decodes only the size it needs
+                    preview = upload_gate.open_reduced(uploaded_file)
+                except (upload_gate.UploadRejected, preprocessing.DecodeBudgetExceeded) as e:
+                    st.error(f"❌ {e}")
+                    uploaded_file = None
+                else:
+                    st.image(preview, use_container_width=True, caption=t['uploaded_image'])
         
         with col2:
             if uploaded_file:
                 st.markdown(f"#### {t['ai_analysis']}")
+                tiled_mode = st.toggle(t['tiled_analysis'], value=config.TILED_INFERENCE, help=t['tiled_help'], key='tiled_mode')
                 
                 if st.button(t['analyze_disease'], use_container_width=True, type="primary"):
+                    # Decode once; validation and inference share the pixels
+                    prepared = prepare_image(upload_gate.open_lazy(uploaded_file))
+                    
                     # Validate image first
-                    is_valid, validation_message = validate_image(image)
+                    is_valid, validation_message = validate_image(prepared) if prepared else (False, "❌ Failed to analyze image. Please try again with a different image.")
                     
                     if not is_valid:
                         st.error(validation_message)
                     else:
                         with st.spinner(t['analyzing']):
-                            results = predict_disease(model, image, class_names)
+                            model = load_model()
+                            tiled_prediction = None
+                            if not model:
+                                results = None
+                            elif tiled_mode:
+                                results, tiled_prediction = predict_disease_tiled(model, upload_gate.open_lazy(uploaded_file), class_names)
+                            else:
+                                results = predict_disease(model, prepared, class_names)
                             
                             if results is None:
                                 st.error("❌ Failed to analyze image. Please try again with a different image.")
                             else:
                                 disease = results[0]['disease']
                                 confidence = results[0]['confidence']
+                                entry = knowledge[results[0]['index']]
                                 
                                 # Warn if confidence is low
                                 if confidence < 50:
@@ -1646,10 +1445,11 @@ def main():
                                     """)
                                 
                                 # Main Result Card
+                                severity_badge = f'<span class="severity-badge severity-{entry.severity.lower()}">{t[entry.severity_key]}</span>' if entry.severity else ''
                                 st.markdown(f"""
                                 <div class="result-card fade-in">
                                     <div style="text-align: center;">
-                                        <div class="disease-badge">{disease.replace('___', ' ').replace('_', ' ').title()}</div>
+                                        <div class="disease-badge">{entry.display_name}</div>{severity_badge}
                                     </div>
                                     <div class="confidence-meter">
                                         <div class="confidence-value">{confidence:.2f}%</div>
@@ -1658,18 +1458,21 @@ def main():
                                 </div>
                                 """, unsafe_allow_html=True)
                                 
+                                if tiled_prediction is not None:
+                                    st.image(tiling.lesion_overlay(upload_gate.open_lazy(uploaded_file), tiled_prediction), caption=t['lesion_map'], use_container_width=True)
+                                
                                 # Top 3 Predictions
                                 st.markdown(f"### {t['detection_probabilities']}")
                                 for i, result in enumerate(results, 1):
                                     col_a, col_b = st.columns([3, 1])
                                     with col_a:
-                                        st.write(f"**{i}. {result['disease'].replace('___', ' ').replace('_', ' ').title()}**")
+                                        st.write(f"**{i}. {knowledge[result['index']].display_name}**")
                                         st.progress(result['confidence'] / 100)
                                     with col_b:
                                         st.metric("", f"{result['confidence']:.1f}%")
                                 
                                 # Get disease information
-                                info = get_disease_info(disease, disease_db)
+                                info = entry.record
                                 
                                 # Symptoms
                                 st.markdown(f"""
@@ -1716,24 +1519,8 @@ def main():
                                 # Save to history (only if confidence is reasonable)
                                 if confidence >= 30:  # Only save if confidence is at least 30%
                                     try:
-                                        buffered = BytesIO()
-                                        # Convert to RGB before saving
-                                        if image.mode != 'RGB':
-                                            image = image.convert('RGB')
-                                        image.save(buffered, format="PNG")
-                                        img_str = base64.b64encode(buffered.getvalue()).decode()
-                                        
-                                        st.session_state.scan_history.insert(0, {
-                                            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                            'image': img_str,
-                                            'disease': disease,
-                                            'confidence': confidence
-                                        })
-                                        
-                                        # Keep only last 100 scans
-                                        if len(st.session_state.scan_history) > 100:
-                                            st.session_state.scan_history = st.session_state.scan_history[:100]
-                                        
+                                        # The thumbnail comes from the already decoded preview
+                                        save_scan(preview, disease, confidence, uploaded_file.getvalue())
                                         st.success(t['analysis_complete'])
                                     except Exception as e:
                                         st.warning(f"⚠️ Analysis complete, but couldn't save to history: {str(e)}")
@@ -1753,6 +1540,14 @@ def main():
                 
                 for guideline in guidelines:
                     st.success(guideline)
+        
+        # Recorded walk-throughs: frames are sampled and near-duplicates skipped
+        # (only offered when OpenCV is installed to decode them)
+        if stream_scan.video_available():
+            with st.expander(t['video_scan']):
+                video_file = st.file_uploader(t['video_upload'], type=['mp4', 'mov', 'avi', 'mkv', 'webm'], key='video_upload')
+                if video_file and st.button(t['video_start'], key='video_start_btn'):
+                    scan_video(video_file, class_names, t)
     
     # ========================================
     # TAB 2: DETECTABLE DISEASES
@@ -2003,33 +1798,38 @@ def main():
         st.markdown(f"### {t['scan_history']}")
         
         # Add download history button
-        if len(st.session_state.scan_history) > 0:
-            # Create downloadable CSV
-            import pandas as pd
-            
-            history_df = pd.DataFrame([
-                {
-                    'Timestamp': scan['timestamp'],
-                    'Disease': scan['disease'].replace('___', ' ').replace('_', ' ').title(),
-                    'Confidence': f"{scan['confidence']:.2f}%"
-                }
-                for scan in st.session_state.scan_history
-            ])
+        if total_scans > 0:
+            col_download, col_format, col_thumbs = st.columns([1, 1, 2])
             
-            csv = history_df.to_csv(index=False)
-            
-            col_download, col_stats = st.columns([1, 3])
+            with col_format:
+                export_format = st.selectbox(
+                    t['export_format'], history_export.available_formats(),
+                    format_func=str.upper, key='export_format', label_visibility='collapsed'
+                )
+            with col_thumbs:
+                export_thumbnails = st.checkbox(t['export_thumbnails'], key='export_thumbnails')
             
             with col_download:
+                # The file is only built when the button is clicked; Streamlit
+                # keeps it in memory, so only the newest EXPORT_MAX_ROWS scans
+                extension, mime = history_export.FORMATS[export_format]
                 st.download_button(
                     label="📥 Download History",
-                    data=csv,
-                    file_name=f"leaf_guard_history_{datetime.now().strftime('%Y%m%d')}.csv",
-                    mime="text/csv",
+                    data=lambda: history_export.export_bytes(
+                        history_store, history_id, export_format, export_thumbnails,
+                        label=lambda name: knowledge.lookup(name).display_name,
+                        max_rows=config.EXPORT_MAX_ROWS
+                    ),
+                    file_name=f"leaf_guard_history_{datetime.now().strftime('%Y%m%d')}.{extension}",
+                    mime=mime,
+                    on_click='ignore',
                     use_container_width=True
                 )
+            
+            if total_scans > config.EXPORT_MAX_ROWS:
+                st.caption(f"{t['export_limited']} ({config.EXPORT_MAX_ROWS:,})")
         
-        if len(st.session_state.scan_history) == 0:
+        if total_scans == 0:
             st.markdown(f"""
             <div class="info-section" style="text-align: center; padding: 2.5rem;">
                 <div class="section-title">{t['no_history']}</div>
@@ -2041,37 +1841,57 @@ def main():
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                st.metric(t['total_scans'], len(st.session_state.scan_history))
+                st.metric(t['total_scans'], total_scans)
             
             with col2:
-                avg_confidence = sum([s['confidence'] for s in st.session_state.scan_history]) / len(st.session_state.scan_history)
+                avg_confidence = history_store.summary(history_id)['avg_confidence']
                 st.metric(t['avg_confidence'], f"{avg_confidence:.1f}%")
             
             with col3:
                 if st.button(t['clear_history'], use_container_width=True, key='clear_history_btn'):
-                    st.session_state.scan_history = []
+                    # Delete the rows and blobs, then start a fresh history id so
+                    # the old ?history= URL no longer names anything
+                    history_store.delete_history(history_id)
+                    st.session_state.history_id = uuid.uuid4().hex
+                    st.query_params['history'] = st.session_state.history_id
+                    st.session_state.history_cursors = []
                     st.success(t['history_cleared'])
                     st.rerun()
             
+            # Analytics come from rollups the store updates on every save,
+            # so they cost the same for ten scans or a hundred thousand
+            render_analytics(history_store, history_id, knowledge, t)
+            
             # Detailed Scan History
             st.markdown(f"### {t['scan_records']}")
             
-            for idx, scan in enumerate(st.session_state.scan_history[:20]):
+            # Keyset pagination: a stack of "before id" cursors, one per page
+            # already left behind. Every page, the first included, is read
+            # from the store so scans saved from other tabs show up
+            cursors = st.session_state.setdefault('history_cursors', [])
+            page_scans = history_store.page(history_id, HISTORY_PAGE_SIZE, cursors[-1] if cursors else None)
+            
+            for idx, scan in enumerate(page_scans):
                 col_img, col_info = st.columns([1, 2])
                 
                 with col_img:
                     try:
-                        img_data = base64.b64decode(scan['image'])
-                        img = Image.open(BytesIO(img_data))
-                        st.image(img, use_container_width=True)
+                        st.image(history_store.read_blob(scan['thumb']), use_container_width=True)
                     except:
                         st.info("Image preview unavailable")
+                    
+                    # The original upload is only read from disk when asked for
+                    if scan.get('image') and st.toggle("🔍 Full image", key=f"full_{scan['id']}"):
+                        try:
+                            st.image(history_store.read_blob(scan['image'], kind=IMAGES), use_container_width=True)
+                        except:
+                            st.info("Image preview unavailable")
                 
                 with col_info:
                     st.markdown(f"""
                     <div class="feature-card">
                         <div style="font-size: 1.3rem; font-weight: 700; color: #FFD700; margin-bottom: 0.65rem;">
-                            {scan['disease'].replace('___', ' ').replace('_', ' ').title()}
+                            {knowledge.lookup(scan['disease']).display_name}
                         </div>
                         <div style="display: flex; gap: 1rem; margin: 0.85rem 0; flex-wrap: wrap;">
                             <div style="background: rgba(255, 215, 0, 0.2); padding: 0.45rem 0.95rem; border-radius: 8px; border: 1px solid rgba(255, 215, 0, 0.4);">
@@ -2084,11 +1904,30 @@ def main():
                     </div>
                     """, unsafe_allow_html=True)
                 
-                if idx < len(st.session_state.scan_history) - 1:
+                if idx < len(page_scans) - 1:
                     st.markdown("---")
             
-            if len(st.session_state.scan_history) > 20:
-                st.info(f"{t['showing_latest']} {len(st.session_state.scan_history)} {t['total_scans_text']}")
+            if total_scans > HISTORY_PAGE_SIZE:
+                first = len(cursors) * HISTORY_PAGE_SIZE + 1
+                last = first + len(page_scans) - 1
+                col_prev, col_page, col_next = st.columns([1, 2, 1])
+                
+                with col_prev:
+                    if st.button("◀", disabled=not cursors, use_container_width=True, key='history_prev_btn'):
+                        cursors.pop()
+                        st.rerun()
+                
+                with col_page:
+                    st.markdown(
+                        f"<div style='text-align: center;'>{first}–{last} / {total_scans} {t['total_scans_text']}</div>",
+                        unsafe_allow_html=True
+                    )
+                
+                with col_next:
+                    has_more = bool(page_scans) and last < total_scans
+                    if st.button("▶", disabled=not has_more, use_container_width=True, key='history_next_btn'):
+                        cursors.append(page_scans[-1]['id'])
+                        st.rerun()
     
     # Footer
     st.markdown("---")
@@ -2101,6 +1940,8 @@ def main():
         </div>
     </div>
     """, unsafe_allow_html=True)
+    
+    record_session_memory()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
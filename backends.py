@@ -0,0 +1,126 @@
+# ============================================================================
+# LEAF GUARD AI - Runtime Backends
+# The same network can be served from the original Keras .h5 file, an
+# exported SavedModel, or a (float16 / int8 quantized) TFLite model.
+# Artifacts are produced by export_model.py; the backend is chosen by
+# LEAF_GUARD_BACKEND / LEAF_GUARD_MODEL_PATH (see config.py).
+# ============================================================================
+
+import threading
+
+import numpy as np
+
+import config
+import inference
+from inference import InferenceBackend
+
+EXPORT_DIR = 'exported'
+
+DEFAULT_PATHS = {
+    'keras': inference.MODEL_PATH,
+    'savedmodel': f'{EXPORT_DIR}/leaf_guard_savedmodel',
+    'tflite': f'{EXPORT_DIR}/leaf_guard_int8.tflite',
+}
+
+
+class KerasBackend(InferenceBackend):
+    """Original .h5 model executed through the compiled tf.function path"""
+
+    kind = 'keras'
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.model = inference.load_model(path)
+
+    def predict_array(self, batch):
+        return inference.predict_array(self.model, batch)
+
+
+class SavedModelBackend(InferenceBackend):
+    """Exported SavedModel, called through its serving signature"""
+
+    kind = 'savedmodel'
+
+    def __init__(self, path):
+        super().__init__(path)
+        import tensorflow as tf
+        self._loaded = tf.saved_model.load(path)
+        self._serve = self._loaded.signatures['serving_default']
+        self._input_name = next(iter(self._serve.structured_input_signature[1]))
+
+    def predict_array(self, batch):
+        outputs = self._serve(**{self._input_name: batch})
+        return next(iter(outputs.values())).numpy()
+
+
+def _tflite_interpreter(path, num_threads):
+    """Prefer the slim LiteRT / tflite_runtime packages on edge boxes, else full TF"""
+    kwargs = {'model_path': path}
+    if num_threads:
+        kwargs['num_threads'] = num_threads
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter(**kwargs)
+
+
+class TFLiteBackend(InferenceBackend):
+    """TFLite model (float32, float16 or int8 post-training quantized)
+
+    Quantized input/output tensors are (de)quantized here using the scale
+    and zero point stored in the model, so callers always exchange float32.
+    The interpreter is not thread-safe and is guarded by a lock.
+    """
+
+    kind = 'tflite'
+
+    def __init__(self, path, num_threads=None):
+        super().__init__(path)
+        self._lock = threading.Lock()
+        self._interpreter = _tflite_interpreter(path, num_threads or config.TFLITE_THREADS)
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch_size = None
+
+    def _resize(self, batch_size):
+        if batch_size != self._batch_size:
+            shape = [batch_size] + list(self._input['shape'][1:])
+            self._interpreter.resize_tensor_input(self._input['index'], shape)
+            self._interpreter.allocate_tensors()
+            self._batch_size = batch_size
+
+    def predict_array(self, batch):
+        with self._lock:
+            self._resize(len(batch))
+            in_dtype = self._input['dtype']
+            if in_dtype != np.float32:
+                scale, zero_point = self._input['quantization']
+                info = np.iinfo(in_dtype)
+                batch = np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(in_dtype)
+            self._interpreter.set_tensor(self._input['index'], batch)
+            self._interpreter.invoke()
+            out = self._interpreter.get_tensor(self._output['index'])
+        if self._output['dtype'] != np.float32:
+            scale, zero_point = self._output['quantization']
+            out = (out.astype(np.float32) - zero_point) * scale
+        return out
+
+
+BACKENDS = {
+    'keras': KerasBackend,
+    'savedmodel': SavedModelBackend,
+    'tflite': TFLiteBackend,
+}
+
+
+def load_backend(kind=None, path=None):
+    """Load the configured backend (raises on unknown kind or missing file)"""
+    kind = (kind or config.BACKEND).lower()
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown backend '{kind}'. Choose one of: {', '.join(sorted(BACKENDS))}")
+    return BACKENDS[kind](path or config.MODEL_PATH or DEFAULT_PATHS[kind])
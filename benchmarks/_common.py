@@ -0,0 +1,33 @@
+# ============================================================================
+# LEAF GUARD AI - Shared Benchmark Helpers
+# One synthetic corpus and one timing method for every benchmark script, so
+# their numbers stay comparable.
+# ============================================================================
+
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+
+def synthetic_jpeg(side, seed=0):
+    """Leaf-coloured noise upscaled to ``side`` and encoded as JPEG"""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 255, (64, 64, 3), dtype=np.uint8)
+    small[..., 1] = np.maximum(small[..., 1], 120)
+    image = Image.fromarray(small).resize((side, side), Image.BILINEAR)
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def time_calls(fn, repeats):
+    """Median and p95 wall time of ``fn()`` in milliseconds (after one warm-up)"""
+    fn()  # warm-up: tracing / pipeline construction is not measured
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {'median_ms': float(np.median(samples)), 'p95_ms': float(np.percentile(samples, 95))}
@@ -0,0 +1,45 @@
+# ============================================================================
+# LEAF GUARD AI - Inference Latency Benchmark
+# Compares Keras model.predict against the compiled tf.function path used
+# by inference.predict_array, for single images and batches.
+#
+#   python benchmarks/bench_inference.py --model leaf_guard_best.h5
+# ============================================================================
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import inference  # noqa: E402
+from _common import time_calls  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="model.predict vs compiled inference latency")
+    parser.add_argument('--model', default=inference.MODEL_PATH)
+    parser.add_argument('--batch-sizes', default='1,8,32')
+    parser.add_argument('--repeats', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    model = inference.load_model(args.model)
+    paths = {
+        'model.predict': lambda b: model.predict(b, batch_size=len(b), verbose=0),
+        'compiled': lambda b: inference.predict_array(model, b),
+    }
+
+    print(f"{'batch':>5}  {'path':<14} {'median ms':>10} {'p95 ms':>8} {'ms/img':>8}")
+    rng = np.random.default_rng(0)
+    for size in (int(s) for s in args.batch_sizes.split(',')):
+        batch = rng.random((size, inference.IMG_SIZE[1], inference.IMG_SIZE[0], 3), dtype=np.float32)
+        for name, fn in paths.items():
+            stats = time_calls(lambda: fn(batch), args.repeats)
+            median, p95 = stats['median_ms'], stats['p95_ms']
+            print(f"{size:>5}  {name:<14} {median:>10.2f} {p95:>8.2f} {median / size:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
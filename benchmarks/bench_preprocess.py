@@ -0,0 +1,105 @@
+# ============================================================================
+# LEAF GUARD AI - Preprocessing Benchmark
+# Per-image CPU time and peak memory of the original preprocessing
+# (full decode, convert, resize, /255, expand_dims, plus a second 100x100
+# resize for validation) versus the single-pass preprocessing module
+# (downscale-on-decode into a preallocated batch buffer).
+#
+#   python benchmarks/bench_preprocess.py --sizes 1000,2000,4000
+# ============================================================================
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import preprocessing  # noqa: E402
+from _common import synthetic_jpeg  # noqa: E402
+
+
+def legacy(data):
+    """The original app.py path: preprocess_image + validate_image"""
+    image = Image.open(BytesIO(data))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    batch = np.expand_dims(np.array(image.resize((224, 224)), dtype=np.float32) / 255.0, axis=0)
+    check = np.array(image.resize((100, 100)))
+    return batch, check[:, :, 0].mean(), check[:, :, 1].mean(), check[:, :, 2].mean()
+
+
+def single_pass(data, buffer):
+    buffer.reset()
+    prepared = buffer.add(BytesIO(data))
+    return preprocessing.validate_prepared(prepared)
+
+
+def peak_rss_kib():
+    """Peak resident memory of this process in KiB
+
+    VmHWM is reset by exec; ru_maxrss is inherited from the parent on
+    Linux, so it is only a fallback for other platforms.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_variant(variant, path, repeats):
+    """Measure one variant in this (fresh) process and return a result dict"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    buffer = preprocessing.BatchBuffer(1)
+    fn = (lambda: legacy(data)) if variant == 'legacy' else (lambda: single_pass(data, buffer))
+    start = time.process_time()
+    for _ in range(repeats):
+        fn()
+    cpu_ms = (time.process_time() - start) * 1000 / repeats
+    return {'variant': variant, 'cpu_ms_per_image': cpu_ms, 'peak_rss_mb': peak_rss_kib() / 1024}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Legacy vs single-pass preprocessing")
+    parser.add_argument('--sizes', default='1000,2000,4000', help="Square image sides to test")
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--child', nargs=2, metavar=('VARIANT', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_variant(args.child[0], args.child[1], args.repeats)))
+        return
+
+    print(f"{'side':>5}  {'variant':<12} {'cpu ms/img':>10} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for side in (int(s) for s in args.sizes.split(',')):
+            # Encode in the parent so children never hold a full-size image
+            path = os.path.join(tmp, f'{side}.jpg')
+            with open(path, 'wb') as f:
+                f.write(synthetic_jpeg(side))
+            for variant in ('legacy', 'single_pass'):
+                # Fresh interpreter per measurement so peak RSS is not shared
+                out = subprocess.run(
+                    [sys.executable, __file__, '--repeats', str(args.repeats), '--child', variant, path],
+                    check=True, capture_output=True, text=True
+                ).stdout
+                result = json.loads(out)
+                print(f"{side:>5}  {variant:<12} {result['cpu_ms_per_image']:>10.2f} {result['peak_rss_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
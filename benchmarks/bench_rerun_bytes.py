@@ -0,0 +1,90 @@
+# ============================================================================
+# LEAF GUARD AI - Rerun Payload Benchmark
+# Bytes of ForwardMsg protobufs the server sends to the browser for one
+# rerun of the app, with the stylesheet injected the original way
+# (unminified inline <style>), minified inline, and as a <link> to the
+# content-hashed static file.
+#
+#   python benchmarks/bench_rerun_bytes.py
+# ============================================================================
+
+import argparse
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import streamlit as st  # noqa: E402
+from streamlit import config as st_config  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner  # noqa: E402
+
+import static_assets  # noqa: E402
+
+APP_PATH = os.path.join(ROOT, 'app.py')
+
+# mode -> (minify, static serving)
+MODES = {
+    'legacy': (False, False),
+    'inline_min': (True, False),
+    'static_link': (True, True),
+}
+
+real_minify = static_assets.minify_css
+
+
+def record_messages():
+    """Patch the test script runner to keep every run's ForwardMsgs"""
+    runs = []
+    original = LocalScriptRunner.forward_msgs
+
+    def forward_msgs(self):
+        msgs = original(self)
+        runs.append(list(msgs))
+        return msgs
+
+    LocalScriptRunner.forward_msgs = forward_msgs
+    return runs
+
+
+def is_stylesheet(msg):
+    if not msg.HasField('delta') or not msg.delta.HasField('new_element'):
+        return False
+    body = msg.delta.new_element.markdown.body
+    return '<style>' in body or 'rel="stylesheet"' in body
+
+
+def measure(mode, runs, reruns):
+    minify, static_serving = MODES[mode]
+    static_assets.minify_css = real_minify if minify else (lambda css: css)
+    st_config.set_option('server.enableStaticServing', static_serving)
+    st.cache_resource.clear()
+
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.run()
+    del runs[:]
+    for _ in range(reruns):
+        at.run()
+    totals = [sum(m.ByteSize() for m in msgs) for msgs in runs]
+    css = [sum(m.ByteSize() for m in msgs if is_stylesheet(m)) for msgs in runs]
+    return sum(totals) / len(totals), sum(css) / len(css)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bytes sent per rerun by stylesheet mode")
+    parser.add_argument('--reruns', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('LEAF_GUARD_HISTORY_DIR', tempfile.mkdtemp(prefix='leaf_guard_history_'))
+    runs = record_messages()
+
+    print(f"{'mode':<12} {'bytes/rerun':>12} {'stylesheet':>11}")
+    for mode in MODES:
+        total, css = measure(mode, runs, args.reruns)
+        print(f"{mode:<12} {total:>12,.0f} {css:>11,.0f}")
+
+
+if __name__ == "__main__":
+    main()
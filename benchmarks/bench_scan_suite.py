@@ -0,0 +1,198 @@
+# ============================================================================
+# LEAF GUARD AI - Scan Path Benchmark Suite
+# Times every stage of the app's scan flow on a fixed synthetic corpus at
+# several resolutions up to the 4000x4000 validation limit, writes the
+# results to a JSON baseline and compares later runs against it.
+#
+#   python benchmarks/bench_scan_suite.py --save benchmarks/baseline.json
+#   python benchmarks/bench_scan_suite.py --compare benchmarks/baseline.json --threshold 0.10
+#
+# Stages: decode, validate, preprocess, predict (batch 1-64), top-k,
+# history save (thumbnail + original into the history store) and history
+# CSV export. Only medians are compared; p95 is recorded for context.
+# ============================================================================
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import config  # noqa: E402
+import inference  # noqa: E402
+import preprocessing  # noqa: E402
+from _common import synthetic_jpeg, time_calls  # noqa: E402
+from history_store import HistoryStore, make_thumbnail  # noqa: E402
+
+SIDES = (256, 1000, 2000, preprocessing.MAX_SIDE)
+BATCH_SIZES = (1, 2, 4, 8, 16, 32, 64)
+HISTORY_ROWS = 1000
+
+
+# ============================================================================
+# STAGES
+# ============================================================================
+
+def bench_image_stages(results, sides, repeats):
+    """decode / validate / preprocess / history save for each resolution"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(tmp)
+        for side in sides:
+            data = synthetic_jpeg(side, seed=side)
+            prepared = preprocessing.prepare(BytesIO(data))
+
+            def decode():
+                with Image.open(BytesIO(data)) as image:
+                    image.load()
+
+            def save(counter=itertools.count()):
+                # Blobs are content-addressed: a unique suffix per call makes
+                # every repeat write both files instead of hitting existing ones
+                suffix = str(next(counter)).encode()
+                image = Image.open(BytesIO(data))
+                thumb, ext = make_thumbnail(image)
+                store.add('bench', 'Tomato___Late_blight', 91.5, (thumb + suffix, ext), image=(data + suffix, 'jpg'))
+
+            results[f'decode/{side}px'] = time_calls(decode, repeats)
+            results[f'validate/{side}px'] = time_calls(lambda: preprocessing.validate_prepared(prepared), repeats)
+            results[f'preprocess/{side}px'] = time_calls(lambda: preprocessing.prepare(BytesIO(data)), repeats)
+            results[f'history_save/{side}px'] = time_calls(save, repeats)
+        store.close()
+
+
+def bench_model_stages(results, model, class_names, batch_sizes, repeats):
+    """Forward pass per batch size and top-k post-processing"""
+    rng = np.random.default_rng(0)
+    for size in batch_sizes:
+        batch = rng.random((size, preprocessing.IMG_SIZE[1], preprocessing.IMG_SIZE[0], 3), dtype=np.float32)
+        results[f'predict/batch{size}'] = time_calls(lambda: inference.predict_array(model, batch), repeats)
+    probabilities = inference.predict_array(model, batch[:1])[0]
+    results['top_k'] = time_calls(lambda: inference.top_k_predictions(probabilities, class_names), repeats)
+
+
+def bench_history_export(results, repeats, rows=HISTORY_ROWS):
+    """History tab CSV download over ``rows`` stored scans"""
+    import history_export
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(tmp)
+        thumbnail = make_thumbnail(Image.open(BytesIO(synthetic_jpeg(256, seed=0))))
+        for i in range(rows):
+            store.add('bench', 'Tomato___Late_blight', 50 + i % 50, thumbnail)
+
+        def export():
+            return history_export.export_bytes(store, 'bench', 'csv')
+
+        results[f'csv_export/{rows}rows'] = time_calls(export, repeats)
+        store.close()
+
+
+def environment(model):
+    """Host and library versions stored with the baseline"""
+    import PIL
+    meta = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pillow': PIL.__version__,
+        'model': inference.model_version(model) if model is not None else None,
+    }
+    if 'tensorflow' in sys.modules:
+        meta['tensorflow'] = sys.modules['tensorflow'].__version__
+    return meta
+
+
+# ============================================================================
+# BASELINE / COMPARE
+# ============================================================================
+
+def compare(current, baseline, threshold, min_delta_ms=0.0):
+    """Stages whose median is more than ``threshold`` slower than the baseline
+
+    Changes smaller than ``min_delta_ms`` are ignored so microsecond-scale
+    stages do not flag on timer noise.
+    """
+    regressions = []
+    print(f"{'stage':<24} {'baseline ms':>12} {'current ms':>11} {'change':>8}")
+    for stage, result in current.items():
+        before = baseline.get(stage)
+        if before is None:
+            print(f"{stage:<24} {'-':>12} {result['median_ms']:>11.3f} {'new':>8}")
+            continue
+        change = result['median_ms'] / before['median_ms'] - 1 if before['median_ms'] else 0.0
+        slower = result['median_ms'] - before['median_ms']
+        flag = '  REGRESSION' if change > threshold and slower > min_delta_ms else ''
+        print(f"{stage:<24} {before['median_ms']:>12.3f} {result['median_ms']:>11.3f} {change:>+7.1%}{flag}")
+        if flag:
+            regressions.append(stage)
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end scan path benchmark suite")
+    parser.add_argument('--sides', default=','.join(map(str, SIDES)), help="Square image sides to test")
+    parser.add_argument('--batch-sizes', default=','.join(map(str, BATCH_SIZES)))
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--backend', default=None, help="keras, savedmodel or tflite (default: config)")
+    parser.add_argument('--model', default=None, help="Model artifact (default: per backend)")
+    parser.add_argument('--class-names', default=inference.CLASS_NAMES_PATH)
+    parser.add_argument('--skip-model', action='store_true', help="Skip predict and top-k stages")
+    parser.add_argument('--save', help="Write results to this baseline JSON file")
+    parser.add_argument('--compare', help="Baseline JSON file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Flag stages whose median grew by more than this fraction")
+    parser.add_argument('--min-delta-ms', type=float, default=0.5,
+                        help="Ignore slowdowns smaller than this many milliseconds")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sides = [int(s) for s in args.sides.split(',')]
+    batch_sizes = [int(s) for s in args.batch_sizes.split(',')]
+
+    results = {}
+    bench_image_stages(results, sides, args.repeats)
+    model = None
+    if not args.skip_model:
+        import backends
+        model = backends.load_backend(args.backend, args.model)
+        bench_model_stages(results, model, inference.load_class_names(args.class_names), batch_sizes, args.repeats)
+    bench_history_export(results, args.repeats)
+
+    report = {'environment': environment(model), 'backend': args.backend or config.BACKEND, 'results': results}
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline['environment'] != report['environment']:
+            print("Note: baseline was recorded on a different environment", file=sys.stderr)
+        regressions = compare(results, baseline['results'], args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) regressed by more than {args.threshold:.0%}: "
+                  f"{', '.join(regressions)}", file=sys.stderr)
+            return 1
+        return 0
+
+    print(f"{'stage':<24} {'median ms':>10} {'p95 ms':>8}")
+    for stage, result in results.items():
+        print(f"{stage:<24} {result['median_ms']:>10.3f} {result['p95_ms']:>8.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
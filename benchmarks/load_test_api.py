@@ -0,0 +1,127 @@
+# ============================================================================
+# LEAF GUARD AI - HTTP API Load Test
+# Drives api_server.py with N keep-alive clients posting images back to
+# back and reports throughput and latency percentiles per concurrency level.
+# Start the server with the prediction cache off, otherwise images repeated
+# across requests are answered from the cache instead of the model.
+#
+#   LEAF_GUARD_PREDICTION_CACHE_SIZE=0 python api_server.py --port 8000 &
+#   python benchmarks/load_test_api.py --concurrency 1,4,16,64 --duration 10
+# ============================================================================
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from _common import synthetic_jpeg
+
+
+def build_request(url, images):
+    """Raw POST bytes: the image as the body, or multipart for several"""
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else '')
+    if len(images) == 1:
+        content_type, body = 'image/jpeg', images[0]
+    else:
+        boundary = 'leafguardloadtest'
+        chunks = []
+        for i, data in enumerate(images):
+            chunks.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="{i}.jpg"\r\n'
+                f'Content-Type: image/jpeg\r\n\r\n'.encode() + data + b'\r\n'
+            )
+        content_type, body = f'multipart/form-data; boundary={boundary}', b''.join(chunks) + f'--{boundary}--\r\n'.encode()
+    head = (f"POST {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n")
+    return head.encode() + body
+
+
+async def read_response(reader):
+    """Status code and body of one response"""
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def client(url, requests, offset, deadline, latencies, errors):
+    """One keep-alive connection sending requests until ``deadline``"""
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    try:
+        for i in range(offset, sys.maxsize):
+            start = time.perf_counter()
+            writer.write(requests[i % len(requests)])
+            await writer.drain()
+            status, body = await read_response(reader)
+            if status != 200 or any('error' in r for r in json.loads(body)['results']):
+                errors.append(status)
+            else:
+                latencies.append(time.perf_counter() - start)
+            if time.perf_counter() >= deadline:
+                break
+    finally:
+        writer.close()
+
+
+async def run_level(url, requests, concurrency, duration):
+    latencies, errors = [], []
+    start = time.perf_counter()
+    deadline = start + duration
+    step = max(len(requests) // concurrency, 1)
+    await asyncio.gather(*(
+        client(url, requests, n * step, deadline, latencies, errors) for n in range(concurrency)
+    ))
+    return latencies, errors, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput and latency of the HTTP inference API")
+    parser.add_argument('--url', default='http://127.0.0.1:8000/v1/predict')
+    parser.add_argument('--image', help="Image to post (default: distinct synthetic 640x640 JPEGs)")
+    parser.add_argument('--distinct', type=int, default=32, help="Synthetic images to cycle through")
+    parser.add_argument('--images-per-request', type=int, default=1)
+    parser.add_argument('--concurrency', default='1,2,4,8,16,32')
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per concurrency level")
+    args = parser.parse_args(argv)
+
+    if args.image:
+        with open(args.image, 'rb') as f:
+            images = [f.read()]
+    else:
+        images = [synthetic_jpeg(640, seed=seed) for seed in range(args.distinct)]
+    requests = [
+        build_request(args.url, [images[(i + j) % len(images)] for j in range(args.images_per_request)])
+        for i in range(0, len(images), args.images_per_request)
+    ]
+
+    # One untimed request so model loading is not part of the first level
+    asyncio.run(run_level(args.url, requests, 1, 0))
+
+    print(f"{'clients':>7} {'requests':>9} {'errors':>7} {'req/s':>8} {'img/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for concurrency in (int(c) for c in args.concurrency.split(',')):
+        latencies, errors, elapsed = asyncio.run(run_level(args.url, requests, concurrency, args.duration))
+        if not latencies:
+            print(f"{concurrency:>7} {0:>9} {len(errors):>7}", file=sys.stderr)
+            continue
+        p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+        rate = len(latencies) / elapsed
+        print(f"{concurrency:>7} {len(latencies):>9} {len(errors):>7} {rate:>8.1f} "
+              f"{rate * args.images_per_request:>8.1f} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+# ============================================================================
+# LEAF GUARD AI - Bulk Scanner (command line)
+# Classifies whole folders of leaf photos and streams top-k predictions to
+# JSONL or CSV as batches finish. Memory use is bounded by the batch size and
+# the number of in-flight decodes, not by the folder size. Images within a
+# few pHash bits of one already scanned (burst shots, the same plant shot
+# twice) reuse its prediction instead of running the model again.
+#
+#   python bulk_scan.py /data/field_42 -o field_42.jsonl
+#   python bulk_scan.py uploads.txt --format csv --workers 8 > field.csv
+#   python bulk_scan.py /data/field_43 --hash-index surveys.npz   # reuse across runs
+# ============================================================================
+
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import backends
+import config
+import inference
+import preprocessing
+from hash_index import MultiIndexHash
+from perceptual_hash import phash
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+# ============================================================================
+# INPUT DISCOVERY
+# ============================================================================
+
+def iter_directory(root):
+    """Lazily yield image paths under ``root`` in a stable order"""
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = sorted(os.scandir(current), key=lambda e: e.name)
+        except OSError as e:
+            print(f"Skipping unreadable directory {current}: {e}", file=sys.stderr)
+            continue
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                yield entry.path
+        stack.extend(reversed(subdirs))
+
+
+def iter_manifest(manifest_path):
+    """Yield image paths listed one per line in a manifest file
+
+    Blank lines and lines starting with '#' are ignored. Relative paths are
+    resolved against the manifest's directory.
+    """
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, 'r') as f:
+        for line in f:
+            path = line.strip()
+            if not path or path.startswith('#'):
+                continue
+            yield path if os.path.isabs(path) else os.path.join(base, path)
+
+
+def iter_sources(source):
+    """Yield image paths from a directory or a manifest file"""
+    if os.path.isdir(source):
+        return iter_directory(source)
+    return iter_manifest(source)
+
+
+# ============================================================================
+# DECODE / PREPROCESS (runs in the worker pool)
+# ============================================================================
+
+def load_and_preprocess(path, out, hashed=False):
+    """Decode one file straight into the preallocated slot ``out``
+
+    Returns ``(path, prepared, error, image_hash)``; decode failures are
+    reported per file instead of aborting the whole scan. ``image_hash`` is
+    the pHash of the prepared pixels when ``hashed``, else None.
+    """
+    try:
+        prepared = preprocessing.prepare_into(path, out)
+        return path, prepared, None, phash(prepared.pixels) if hashed else None
+    except Exception as e:
+        return path, None, str(e), None
+
+
+def iter_preprocessed(paths, workers, max_in_flight, hashed=False):
+    """Preprocess paths in a thread pool, keeping at most ``max_in_flight`` pending
+
+    Workers write into a ring of ``max_in_flight`` preallocated slots. A
+    slot is reused only after its result has been yielded and consumed, so
+    no per-image arrays are allocated. Results are yielded in input order
+    so output rows are reproducible.
+    """
+    slots = np.empty((max_in_flight, inference.IMG_SIZE[1], inference.IMG_SIZE[0], 3), dtype=np.float32)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i, path in enumerate(paths):
+            pending.append(pool.submit(load_and_preprocess, path, slots[i % max_in_flight], hashed))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# ============================================================================
+# NEAR-DUPLICATE REUSE
+# ============================================================================
+
+class ReuseIndex:
+    """Predictions of scanned images, looked up by perceptual hash
+
+    An image within ``distance`` pHash bits of an indexed one reuses its
+    probabilities. Entries are added when their image is queued for the
+    model, so duplicates inside the same batch are caught too; their
+    probabilities are filled in once the batch has run.
+    """
+
+    def __init__(self, distance, version=None):
+        self.distance = distance
+        self.version = version
+        self.index = MultiIndexHash()
+        self.paths = []
+        self.probabilities = []
+        self.reused = 0
+
+    def __len__(self):
+        return len(self.index)
+
+    def match(self, image_hash):
+        """Entry number of the closest indexed image, or None"""
+        found = self.index.nearest(image_hash, self.distance)
+        return None if found is None else found[0]
+
+    def add(self, image_hash, path, probabilities=None):
+        self.paths.append(path)
+        self.probabilities.append(probabilities)
+        return self.index.add(image_hash)
+
+    def save(self, path):
+        """Write the finished entries to an .npz file"""
+        done = [i for i, row in enumerate(self.probabilities) if row is not None]
+        np.savez(
+            path,
+            version=np.array(self.version or ''),
+            hashes=self.index.hashes[done],
+            paths=np.array([self.paths[i] for i in done], dtype=str),
+            probabilities=np.array([self.probabilities[i] for i in done], dtype=np.float32),
+        )
+
+    @classmethod
+    def load(cls, path, distance, version=None):
+        """Index saved by ``save``; empty if missing or made by another model"""
+        reuse = cls(distance, version)
+        if not os.path.exists(path):
+            return reuse
+        with np.load(path) as data:
+            if str(data['version']) != (version or ''):
+                print(f"Ignoring {path}: built with a different model", file=sys.stderr)
+                return reuse
+            reuse.index.extend(data['hashes'])
+            reuse.paths = data['paths'].tolist()
+            reuse.probabilities = list(data['probabilities'])
+        return reuse
+
+
+# ============================================================================
+# OUTPUT WRITERS
+# ============================================================================
+
+class JsonlWriter:
+    """Write one JSON object per scanned image"""
+
+    def __init__(self, stream, top_k):
+        self.stream = stream
+
+    def write(self, path, results, error, reused_from=None):
+        row = {'path': path, 'predictions': results, 'error': error,
+               'reused': reused_from is not None, 'reused_from': reused_from}
+        self.stream.write(json.dumps(row) + '\n')
+
+
+class CsvWriter:
+    """Write one CSV row per scanned image with rank-numbered columns"""
+
+    def __init__(self, stream, top_k):
+        self.top_k = top_k
+        self.writer = csv.writer(stream)
+        header = ['path']
+        for rank in range(1, top_k + 1):
+            header += [f'disease_{rank}', f'confidence_{rank}']
+        self.writer.writerow(header + ['error', 'reused', 'reused_from'])
+
+    def write(self, path, results, error, reused_from=None):
+        row = [path]
+        for rank in range(self.top_k):
+            if results and rank < len(results):
+                row += [results[rank]['disease'], f"{results[rank]['confidence']:.4f}"]
+            else:
+                row += ['', '']
+        self.writer.writerow(row + [error or '', int(reused_from is not None), reused_from or ''])
+
+
+WRITERS = {'jsonl': JsonlWriter, 'csv': CsvWriter}
+
+
+# ============================================================================
+# SCAN LOOP
+# ============================================================================
+
+def scan(paths, model, class_names, writer, batch_size=inference.DEFAULT_BATCH_SIZE,
+         workers=4, top_k=inference.TOP_K, flush=None, reuse=None):
+    """Classify ``paths`` and hand every row to ``writer`` as batches finish
+
+    With a ``reuse`` index, near-duplicates of already scanned images are
+    written with the earlier prediction and never reach the model.
+    Returns ``(scanned, failed)`` counts.
+    """
+    batch = preprocessing.BatchBuffer(batch_size)
+    batch_paths = []
+    batch_entries = []
+    # (path, entry) reusing an image still waiting in the batch
+    deferred = []
+    scanned = failed = 0
+
+    def write_reused(path, entry):
+        results = inference.top_k_predictions(reuse.probabilities[entry], class_names, top_k)
+        writer.write(path, results, None, reuse.paths[entry])
+        reuse.reused += 1
+
+    def run_batch():
+        probabilities = inference.predict_array(model, batch.view())
+        for path, entry, row in zip(batch_paths, batch_entries, probabilities):
+            if entry is not None:
+                reuse.probabilities[entry] = row
+            writer.write(path, inference.top_k_predictions(row, class_names, top_k), None)
+        for path, entry in deferred:
+            write_reused(path, entry)
+        batch.reset()
+        batch_paths.clear()
+        batch_entries.clear()
+        deferred.clear()
+        if flush:
+            flush()
+
+    preprocessed = iter_preprocessed(paths, workers, max_in_flight=batch_size * 2, hashed=reuse is not None)
+    for path, prepared, error, image_hash in preprocessed:
+        if error is not None:
+            writer.write(path, None, error)
+            failed += 1
+            continue
+        scanned += 1
+        entry = None
+        if reuse is not None:
+            match = reuse.match(image_hash)
+            if match is not None:
+                if reuse.probabilities[match] is None:
+                    deferred.append((path, match))
+                else:
+                    write_reused(path, match)
+                continue
+            entry = reuse.add(image_hash, path)
+        batch.add_array(prepared.pixels)
+        batch_paths.append(path)
+        batch_entries.append(entry)
+        if batch.full:
+            run_batch()
+
+    if batch_paths:
+        run_batch()
+    return scanned, failed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk leaf disease scanner")
+    parser.add_argument('source', help="Directory of images or manifest file (one path per line)")
+    parser.add_argument('-o', '--output', default='-', help="Output file (default: stdout)")
+    parser.add_argument('--format', choices=sorted(WRITERS), help="Output format (default: from extension, else jsonl)")
+    parser.add_argument('--batch-size', type=int, default=inference.DEFAULT_BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4, help="Decode/preprocess threads")
+    parser.add_argument('--top-k', type=int, default=inference.TOP_K)
+    parser.add_argument('--backend', choices=sorted(backends.BACKENDS), help="Runtime backend (default: LEAF_GUARD_BACKEND)")
+    parser.add_argument('--model', help="Model artifact for the backend (default: LEAF_GUARD_MODEL_PATH)")
+    parser.add_argument('--class-names', default=inference.CLASS_NAMES_PATH)
+    parser.add_argument('--dedup-distance', type=int, default=config.BULK_DEDUP_DISTANCE,
+                        help="Reuse the prediction of an image within this many pHash bits (negative: off)")
+    parser.add_argument('--no-dedup', action='store_true', help="Run the model on every image")
+    parser.add_argument('--hash-index', help="Load and save the near-duplicate index here (.npz)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    fmt = args.format
+    if fmt is None:
+        fmt = 'csv' if args.output.lower().endswith('.csv') else 'jsonl'
+
+    model = backends.load_backend(args.backend, args.model)
+    class_names = inference.load_class_names(args.class_names)
+
+    reuse = None
+    if not args.no_dedup and args.dedup_distance >= 0:
+        version = inference.model_version(model)
+        if args.hash_index:
+            reuse = ReuseIndex.load(args.hash_index, args.dedup_distance, version)
+        else:
+            reuse = ReuseIndex(args.dedup_distance, version)
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    try:
+        writer = WRITERS[fmt](out, args.top_k)
+        scanned, failed = scan(
+            iter_sources(args.source), model, class_names, writer,
+            batch_size=args.batch_size, workers=args.workers, top_k=args.top_k,
+            flush=out.flush, reuse=reuse
+        )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if reuse is not None and args.hash_index:
+        reuse.save(args.hash_index)
+
+    reused = f", {reuse.reused} reused near-duplicate predictions" if reuse is not None else ""
+    print(f"Scanned {scanned} images ({failed} failed{reused})", file=sys.stderr)
+    return 0 if scanned or not failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+# ============================================================================
+# LEAF GUARD AI - Runtime Configuration
+# Tunable knobs, overridable through LEAF_GUARD_* environment variables so
+# the same image can be tuned per deployment without code changes.
+# ============================================================================
+
+import os
+
+
+def env_int(name, default):
+    """Read an integer setting from the environment"""
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def env_float(name, default):
+    """Read a float setting from the environment"""
+    value = os.environ.get(name)
+    return float(value) if value not in (None, '') else default
+
+
+def env_bool(name, default):
+    """Read a boolean setting ('1', 'true', 'yes', 'on') from the environment"""
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_int_list(name, default):
+    """Read a comma-separated list of integers from the environment"""
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return list(default)
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def env_str_list(name, default):
+    """Read a comma-separated list of strings from the environment"""
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return list(default)
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def env_str(name, default):
+    """Read a string setting from the environment"""
+    value = os.environ.get(name)
+    return value if value not in (None, '') else default
+
+
+# ============================================================================
+# MICRO-BATCHING SCHEDULER
+# ============================================================================
+
+# Largest batch the scheduler hands to the model in one forward pass
+MAX_BATCH_SIZE = env_int('LEAF_GUARD_MAX_BATCH_SIZE', 16)
+
+# How long the first request of a batch may wait for company (milliseconds)
+MAX_WAIT_MS = env_float('LEAF_GUARD_MAX_WAIT_MS', 5.0)
+
+# Seconds an app session waits for its batched prediction before giving up
+SCHEDULER_TIMEOUT_S = env_float('LEAF_GUARD_SCHEDULER_TIMEOUT_S', 60.0)
+
+
+# ============================================================================
+# MODEL BACKEND
+# ============================================================================
+
+# Runtime used to execute the network: 'keras', 'savedmodel' or 'tflite'
+BACKEND = env_str('LEAF_GUARD_BACKEND', 'keras')
+
+# Model artifact for the chosen backend (defaults per backend in backends.py)
+MODEL_PATH = env_str('LEAF_GUARD_MODEL_PATH', None)
+
+# Interpreter threads for the TFLite backend (0 = runtime default)
+TFLITE_THREADS = env_int('LEAF_GUARD_TFLITE_THREADS', 0)
+
+# Start importing TensorFlow and loading the model in a background thread as
+# soon as the app starts, instead of on the first "Analyze" click
+BACKGROUND_LOAD = env_bool('LEAF_GUARD_BACKGROUND_LOAD', False)
+
+# Model copies in separate processes, each pinned to its own slice of CPU
+# cores (0 or 1 = one in-process model); `python model_pool.py --autotune`
+# finds the best split for a host
+MODEL_REPLICAS = env_int('LEAF_GUARD_MODEL_REPLICAS', 0)
+
+# Intra-op threads per replica (0 = the number of cores in its slice)
+REPLICA_THREADS = env_int('LEAF_GUARD_REPLICA_THREADS', 0)
+
+# Seconds a failed model load is re-raised before the next request (or the
+# background loader) tries again
+MODEL_RETRY_S = env_float('LEAF_GUARD_MODEL_RETRY_S', 30.0)
+
+
+# ============================================================================
+# WARM-UP & READINESS
+# ============================================================================
+
+# Dummy batch sizes run right after loading so tracing and kernel selection
+# happen before the first real request
+WARMUP_BATCH_SIZES = env_int_list('LEAF_GUARD_WARMUP_BATCH_SIZES', [1, MAX_BATCH_SIZE])
+
+# Port for the /healthz and /readyz probe server (0 = disabled)
+PROBE_PORT = env_int('LEAF_GUARD_PROBE_PORT', 0)
+PROBE_HOST = env_str('LEAF_GUARD_PROBE_HOST', '0.0.0.0')
+
+
+# ============================================================================
+# PREDICTION CACHE
+# ============================================================================
+
+# Cached prediction rows kept in memory (0 disables the cache)
+PREDICTION_CACHE_SIZE = env_int('LEAF_GUARD_PREDICTION_CACHE_SIZE', 1024)
+
+# Seconds before a cached prediction must be recomputed
+PREDICTION_CACHE_TTL_S = env_float('LEAF_GUARD_PREDICTION_CACHE_TTL_S', 3600.0)
+
+
+# ============================================================================
+# UPLOAD GATE
+# ============================================================================
+
+# Largest width x height accepted, checked from the file header before any
+# decoding (the 4000x4000 validation limit by default)
+UPLOAD_MAX_PIXELS = env_int('LEAF_GUARD_UPLOAD_MAX_PIXELS', 16_000_000)
+
+# Long side of the decoded upload preview; JPEGs decode straight at about
+# this size instead of full resolution
+UPLOAD_PREVIEW_SIDE = env_int('LEAF_GUARD_UPLOAD_PREVIEW_SIDE', 800)
+
+# Megapixels that may be decoded at once across all sessions (about 4 bytes
+# each); further decodes wait for room
+DECODE_BUDGET_MPX = env_float('LEAF_GUARD_DECODE_BUDGET_MPX', 48.0)
+
+# Seconds a decode waits for room before the upload is refused as busy
+DECODE_TIMEOUT_S = env_float('LEAF_GUARD_DECODE_TIMEOUT_S', 30.0)
+
+
+# ============================================================================
+# SCAN HISTORY
+# ============================================================================
+
+# Directory holding the SQLite history database and thumbnail files
+HISTORY_DIR = env_str('LEAF_GUARD_HISTORY_DIR', 'history')
+
+# Newest scans included by the app's "Download History" button; Streamlit
+# holds the whole file in memory, so bigger exports use history_export.py
+EXPORT_MAX_ROWS = env_int('LEAF_GUARD_EXPORT_MAX_ROWS', 5000)
+
+
+# ============================================================================
+# TRANSLATIONS
+# ============================================================================
+
+# Directory with languages.json and one <language>.json catalog per language
+LOCALES_DIR = env_str('LEAF_GUARD_LOCALES_DIR', 'locales')
+
+# Pick up edited catalog files without a restart (one stat() per lookup)
+I18N_HOT_RELOAD = env_bool('LEAF_GUARD_I18N_HOT_RELOAD', True)
+
+
+# ============================================================================
+# HTTP INFERENCE API
+# ============================================================================
+
+# Bind address of api_server.py
+API_HOST = env_str('LEAF_GUARD_API_HOST', '0.0.0.0')
+API_PORT = env_int('LEAF_GUARD_API_PORT', 8000)
+
+# Threads decoding uploads off the event loop (0 = one per CPU)
+API_WORKERS = env_int('LEAF_GUARD_API_WORKERS', 0)
+
+# Largest accepted request body (megabytes) and images per request
+API_MAX_BODY_MB = env_float('LEAF_GUARD_API_MAX_BODY_MB', 32.0)
+API_MAX_IMAGES = env_int('LEAF_GUARD_API_MAX_IMAGES', 16)
+
+
+# ============================================================================
+# TILED INFERENCE
+# ============================================================================
+
+# Default state of the "high-resolution analysis" toggle in the app
+TILED_INFERENCE = env_bool('LEAF_GUARD_TILED_INFERENCE', False)
+
+# Long side (pixels) the leaf region is resized to before cutting 224px tiles
+TILE_WORKING_SIDE = env_int('LEAF_GUARD_TILE_WORKING_SIDE', 896)
+
+# Fraction of a tile shared with its neighbour
+TILE_OVERLAP = env_float('LEAF_GUARD_TILE_OVERLAP', 0.25)
+
+# How tile scores become the image result: 'max' (per class) or 'mean'
+TILE_POOLING = env_str('LEAF_GUARD_TILE_POOLING', 'max')
+
+# Working image plus float32 tile batch (megabytes); above it the tiles
+# are split across several forward passes
+TILE_MEMORY_MB = env_float('LEAF_GUARD_TILE_MEMORY_MB', 64.0)
+
+
+# ============================================================================
+# TEST-TIME AUGMENTATION
+# ============================================================================
+
+# 'auto' re-scores borderline predictions, 'always' every scan, 'off' never
+TTA_MODE = env_str('LEAF_GUARD_TTA_MODE', 'auto')
+
+# In 'auto' mode, top confidence (%) below which TTA runs (the app's
+# low-confidence warning threshold)
+TTA_BELOW_CONFIDENCE = env_float('LEAF_GUARD_TTA_BELOW_CONFIDENCE', 50.0)
+
+# In 'auto' mode, top confidence (%) at or above which TTA runs. Matches the
+# cutoff for saving a scan to history, so averaging can never lift a
+# sub-threshold guess over it
+TTA_ABOVE_CONFIDENCE = env_float('LEAF_GUARD_TTA_ABOVE_CONFIDENCE', 30.0)
+
+# Views averaged by TTA, run as one batch (see tta.AUGMENTATIONS)
+TTA_AUGMENTATIONS = env_str_list('LEAF_GUARD_TTA_AUGMENTATIONS', [
+    'identity', 'hflip', 'vflip', 'rot90', 'rot270', 'crop_center', 'crop_tl', 'crop_br'
+])
+
+
+# ============================================================================
+# VIDEO / CAMERA STREAMS
+# ============================================================================
+
+# Frames taken per second of video; the rest are skipped undecoded
+STREAM_SAMPLE_FPS = env_float('LEAF_GUARD_STREAM_SAMPLE_FPS', 4.0)
+
+# A sampled frame within this many dHash bits (of 64) of the last scanned
+# frame is treated as the same view and skipped
+STREAM_DEDUP_DISTANCE = env_int('LEAF_GUARD_STREAM_DEDUP_DISTANCE', 6)
+
+# Preprocessed frames waiting for the model; a live source sheds the
+# oldest frame when this is full instead of falling behind
+STREAM_QUEUE_SIZE = env_int('LEAF_GUARD_STREAM_QUEUE_SIZE', 8)
+
+# Most frames per forward pass
+STREAM_BATCH_SIZE = env_int('LEAF_GUARD_STREAM_BATCH_SIZE', 8)
+
+
+# ============================================================================
+# BULK SCANNING
+# ============================================================================
+
+# An image within this many pHash bits (of 64) of one already scanned in
+# the same run (or in the --hash-index file) reuses its prediction;
+# negative runs the model on every image
+BULK_DEDUP_DISTANCE = env_int('LEAF_GUARD_BULK_DEDUP_DISTANCE', 6)
@@ -0,0 +1,175 @@
+# ============================================================================
+# LEAF GUARD AI - Model Export & Quantization
+# Builds SavedModel and TFLite (float16 / int8 post-training quantized)
+# artifacts from leaf_guard_best.h5 and reports the accuracy delta of every
+# artifact against the float Keras model on a held-out folder laid out as
+# <eval-dir>/<class name>/<image>.
+#
+#   python export_model.py --calibration-dir data/calib --eval-dir data/holdout
+# ============================================================================
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+import backends
+import inference
+import preprocessing
+from bulk_scan import iter_directory
+
+FORMATS = ('savedmodel', 'float16', 'int8')
+
+# Number of calibration images used to pick int8 quantization ranges
+CALIBRATION_SAMPLES = 200
+
+
+# ============================================================================
+# EXPORT
+# ============================================================================
+
+def export_savedmodel(model, out_dir):
+    """Write a SavedModel with a (None, 224, 224, 3) serving signature"""
+    if hasattr(model, 'export'):
+        # Keras 3
+        model.export(out_dir)
+    else:
+        import tensorflow as tf
+        tf.saved_model.save(model, out_dir, signatures=inference.compiled_predictor(model))
+    return out_dir
+
+
+def representative_dataset(paths, limit=CALIBRATION_SAMPLES):
+    """Calibration generator for int8 quantization, one image per step"""
+    def generate():
+        for path in paths[:limit]:
+            yield [preprocessing.prepare(path).pixels[None]]
+    return generate
+
+
+def convert_tflite(saved_model_dir, mode, calibration_paths=None):
+    """Convert a SavedModel to TFLite bytes ('float16' or 'int8' quantized)"""
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if mode == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif mode == 'int8':
+        if not calibration_paths:
+            raise ValueError("int8 quantization needs calibration images (--calibration-dir)")
+        converter.representative_dataset = representative_dataset(calibration_paths)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    else:
+        raise ValueError(f"Unknown TFLite mode '{mode}'")
+    return converter.convert()
+
+
+# ============================================================================
+# EVALUATION
+# ============================================================================
+
+def iter_labeled(eval_dir, class_names):
+    """Yield (path, class index) for every image under a known class folder"""
+    for idx, name in enumerate(class_names):
+        class_dir = os.path.join(eval_dir, name)
+        if os.path.isdir(class_dir):
+            for path in iter_directory(class_dir):
+                yield path, idx
+
+
+def evaluate(backend, samples, batch_size=inference.DEFAULT_BATCH_SIZE):
+    """Top-1 predictions and seconds per image for ``backend`` on ``samples``"""
+    predictions = []
+    elapsed = 0.0
+    for chunk in inference.iter_batches(samples, batch_size):
+        batch = inference.stack_batch([path for path, _ in chunk])
+        start = time.perf_counter()
+        probabilities = backend.predict_array(batch)
+        elapsed += time.perf_counter() - start
+        predictions.extend(np.argmax(probabilities, axis=1).tolist())
+    return np.array(predictions), elapsed / max(len(samples), 1)
+
+
+def artifact_size_mb(path):
+    """Size of a file or directory tree in megabytes"""
+    if os.path.isfile(path):
+        return os.path.getsize(path) / 1e6
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total / 1e6
+
+
+def report(artifacts, eval_dir, class_names, batch_size):
+    """Print accuracy, agreement and latency of each artifact vs. the float model"""
+    samples = list(iter_labeled(eval_dir, class_names))
+    if not samples:
+        print(f"No labeled images found under {eval_dir}", file=sys.stderr)
+        return
+    labels = np.array([label for _, label in samples])
+
+    reference = None
+    print(f"\nHeld-out set: {len(samples)} images from {eval_dir}")
+    print(f"{'artifact':<12} {'size MB':>8} {'top-1':>8} {'delta':>8} {'agree':>8} {'ms/img':>8}")
+    for name, (kind, path) in artifacts.items():
+        predicted, seconds = evaluate(backends.load_backend(kind, path), samples, batch_size)
+        accuracy = float(np.mean(predicted == labels)) * 100
+        if reference is None:
+            reference = (accuracy, predicted)
+        delta = accuracy - reference[0]
+        agreement = float(np.mean(predicted == reference[1])) * 100
+        print(f"{name:<12} {artifact_size_mb(path):>8.2f} {accuracy:>7.2f}% {delta:>+7.2f}pp "
+              f"{agreement:>7.2f}% {seconds * 1000:>8.2f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export and quantize the Leaf Guard model")
+    parser.add_argument('--model', default=inference.MODEL_PATH, help="Source Keras .h5 model")
+    parser.add_argument('--class-names', default=inference.CLASS_NAMES_PATH)
+    parser.add_argument('--out', default=backends.EXPORT_DIR, help="Output directory")
+    parser.add_argument('--formats', default=','.join(FORMATS),
+                        help=f"Comma-separated subset of: {', '.join(FORMATS)}")
+    parser.add_argument('--calibration-dir', help="Images used to calibrate int8 ranges")
+    parser.add_argument('--eval-dir', help="Held-out folder (<class>/<image>) for the accuracy report")
+    parser.add_argument('--batch-size', type=int, default=inference.DEFAULT_BATCH_SIZE)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    formats = [f.strip() for f in args.formats.split(',') if f.strip()]
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        print(f"Unknown format(s): {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    os.makedirs(args.out, exist_ok=True)
+    model = inference.load_model(args.model)
+    class_names = inference.load_class_names(args.class_names)
+
+    # TFLite conversion always starts from the SavedModel
+    saved_dir = export_savedmodel(model, os.path.join(args.out, 'leaf_guard_savedmodel'))
+    print(f"SavedModel  -> {saved_dir}")
+    artifacts = {'keras': ('keras', args.model)}
+    if 'savedmodel' in formats:
+        artifacts['savedmodel'] = ('savedmodel', saved_dir)
+
+    calibration = list(iter_directory(args.calibration_dir)) if args.calibration_dir else None
+    for mode in ('float16', 'int8'):
+        if mode not in formats:
+            continue
+        path = os.path.join(args.out, f'leaf_guard_{mode}.tflite')
+        with open(path, 'wb') as f:
+            f.write(convert_tflite(saved_dir, mode, calibration))
+        print(f"TFLite {mode:<7} -> {path}")
+        artifacts[mode] = ('tflite', path)
+
+    if args.eval_dir:
+        report(artifacts, args.eval_dir, class_names, args.batch_size)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
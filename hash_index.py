@@ -0,0 +1,148 @@
+# ============================================================================
+# LEAF GUARD AI - Near-Duplicate Hash Index
+# Hamming-radius lookups over millions of 64-bit perceptual hashes using
+# multi-index hashing: each hash is cut into 16-bit substrings, and every
+# substring position keeps its own sorted table. By the pigeonhole
+# principle two hashes within r bits agree to within r // 4 bits on at
+# least one substring, so a query probes only those few table ranges and
+# verifies the candidates with a vectorized popcount.
+#
+#   index = MultiIndexHash()
+#   entry = index.add(phash(image))
+#   index.nearest(phash(other), radius=6)   # -> (entry, distance) or None
+# ============================================================================
+
+from itertools import combinations
+
+import numpy as np
+
+BITS = 64
+CHUNKS = 4
+CHUNK_BITS = BITS // CHUNKS
+
+# New entries are scanned linearly until there are this many (or 1/32 of
+# the index), then merged into the sorted tables in one pass
+MIN_MERGE = 1024
+
+_POPCOUNT8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+_FLIPS = {}
+
+
+def popcount(values):
+    """Set bits per element of a uint64 array"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    return _POPCOUNT8[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def _flip_masks(radius):
+    """Every CHUNK_BITS-bit mask with at most ``radius`` bits set"""
+    if radius not in _FLIPS:
+        masks = [0]
+        for bits in range(1, radius + 1):
+            masks.extend(sum(1 << b for b in chosen) for chosen in combinations(range(CHUNK_BITS), bits))
+        _FLIPS[radius] = np.array(masks, dtype=np.uint16)
+    return _FLIPS[radius]
+
+
+def _chunk(hashes, position):
+    shift = np.uint64(CHUNK_BITS * (CHUNKS - 1 - position))
+    return ((hashes >> shift) & np.uint64((1 << CHUNK_BITS) - 1)).astype(np.uint16)
+
+
+class MultiIndexHash:
+    """Append-only index of 64-bit hashes with Hamming-radius search
+
+    Entries are numbered from 0 in insertion order; callers keep their
+    payload (prediction, path, ...) in a list under the same number. Memory
+    is about 32 bytes per entry (the hash plus a uint16 key and uint32 entry
+    number per substring table).
+    """
+
+    def __init__(self, hashes=None):
+        self._hashes = np.zeros(1024, dtype=np.uint64)
+        self._size = 0
+        # Entries [0, _indexed) are in the sorted tables, the rest are scanned
+        self._indexed = 0
+        self._keys = [np.empty(0, dtype=np.uint16) for _ in range(CHUNKS)]
+        self._ids = [np.empty(0, dtype=np.uint32) for _ in range(CHUNKS)]
+        if hashes is not None:
+            self.extend(hashes)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def hashes(self):
+        """uint64 array of every hash, by entry number"""
+        return self._hashes[:self._size]
+
+    def _reserve(self, count):
+        if self._size + count > len(self._hashes):
+            grown = np.zeros(max(2 * len(self._hashes), self._size + count), dtype=np.uint64)
+            grown[:self._size] = self.hashes
+            self._hashes = grown
+
+    def add(self, value):
+        """Insert one hash (int); returns its entry number"""
+        self._reserve(1)
+        self._hashes[self._size] = value
+        self._size += 1
+        if self._size - self._indexed >= max(MIN_MERGE, self._indexed // 32):
+            self._merge()
+        return self._size - 1
+
+    def extend(self, values):
+        """Insert many hashes at once; returns the first new entry number"""
+        values = np.asarray(values, dtype=np.uint64)
+        first = self._size
+        self._reserve(len(values))
+        self._hashes[first:first + len(values)] = values
+        self._size += len(values)
+        self._merge()
+        return first
+
+    def _merge(self):
+        """Fold the unsorted tail into the sorted tables (linear, not a re-sort)"""
+        new = self._hashes[self._indexed:self._size]
+        if not len(new):
+            return
+        ids = np.arange(self._indexed, self._size, dtype=np.uint32)
+        for position in range(CHUNKS):
+            keys = _chunk(new, position)
+            order = np.argsort(keys, kind='stable')
+            keys = keys[order]
+            at = np.searchsorted(self._keys[position], keys, side='right')
+            self._keys[position] = np.insert(self._keys[position], at, keys)
+            self._ids[position] = np.insert(self._ids[position], at, ids[order])
+        self._indexed = self._size
+
+    def search(self, value, radius):
+        """(entry, distance) pairs within ``radius`` bits of ``value``, closest first"""
+        query = np.uint64(value)
+        candidates = []
+        if self._indexed:
+            masks = _flip_masks(radius // CHUNKS)
+            for position in range(CHUNKS):
+                probes = _chunk(query, position) ^ masks
+                keys = self._keys[position]
+                lo = np.searchsorted(keys, probes, side='left')
+                hi = np.searchsorted(keys, probes, side='right')
+                ids = self._ids[position]
+                candidates.extend(ids[a:b] for a, b in zip(lo, hi) if b > a)
+        if self._size > self._indexed:
+            candidates.append(np.arange(self._indexed, self._size, dtype=np.uint32))
+        if not candidates:
+            return []
+
+        entries = np.unique(np.concatenate(candidates))
+        distances = popcount(self._hashes[entries] ^ query)
+        keep = distances <= radius
+        entries, distances = entries[keep], distances[keep]
+        order = np.argsort(distances, kind='stable')
+        return [(int(entries[i]), int(distances[i])) for i in order]
+
+    def nearest(self, value, radius):
+        """Closest (entry, distance) within ``radius`` bits, or None"""
+        matches = self.search(value, radius)
+        return matches[0] if matches else None
@@ -0,0 +1,203 @@
+# ============================================================================
+# LEAF GUARD AI - Scan History Export
+# Streams one browser's scan history out of the history store in chunks
+# as CSV, JSONL, Parquet or Arrow, optionally with the stored thumbnails
+# embedded. Only one chunk of rows is in memory at a time, so exporting
+# hundreds of thousands of scans to a file keeps memory flat. The app's
+# download button has to hand Streamlit the whole file, so it exports at
+# most config.EXPORT_MAX_ROWS scans; larger histories go through this CLI.
+#
+#   python history_export.py 3f2a... -o history.parquet --thumbnails
+#
+# Parquet and Arrow need pyarrow (pip install pyarrow); CSV and JSONL
+# work without it.
+# ============================================================================
+
+import argparse
+import base64
+import csv
+import importlib.util
+import io
+import itertools
+import json
+import os
+import sys
+import tempfile
+
+import config
+from history_store import HistoryStore
+from knowledge_index import display_name
+
+# Rows fetched from SQLite (and written) per chunk
+CHUNK_SIZE = 1000
+
+FIELDS = ('id', 'timestamp', 'class_name', 'disease', 'confidence')
+
+# format -> (file extension, MIME type)
+FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'jsonl': ('jsonl', 'application/x-ndjson'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('arrow', 'application/vnd.apache.arrow.file'),
+}
+COLUMNAR = ('parquet', 'arrow')
+
+_THUMB_MIME = {'webp': 'image/webp', 'jpg': 'image/jpeg'}
+
+
+def available_formats():
+    """Export formats usable in this environment (columnar ones need pyarrow)"""
+    if importlib.util.find_spec('pyarrow') is None:
+        return [fmt for fmt in FORMATS if fmt not in COLUMNAR]
+    return list(FORMATS)
+
+
+def iter_chunks(store, history_id, thumbnails=False, chunk_size=CHUNK_SIZE, label=display_name,
+                max_rows=None):
+    """Lists of up to ``chunk_size`` export rows, newest scan first
+
+    With ``thumbnails`` each row carries its thumbnail as
+    ``(bytes, extension)``; writers encode it for their format. With
+    ``max_rows`` only that many of the newest scans are exported.
+    """
+    chunk = []
+    records = store.iter_records(history_id, chunk_size)
+    if max_rows is not None:
+        records = itertools.islice(records, max_rows)
+    for record in records:
+        row = {
+            'id': record['id'],
+            'timestamp': record['timestamp'],
+            'class_name': record['disease'],
+            'disease': label(record['disease']),
+            'confidence': record['confidence'],
+        }
+        if thumbnails:
+            row['thumbnail'] = (store.read_blob(record['thumb']), record['thumb'].rsplit('.', 1)[1])
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _data_uri(thumbnail):
+    data, ext = thumbnail
+    return f"data:{_THUMB_MIME.get(ext, 'application/octet-stream')};base64,{base64.b64encode(data).decode()}"
+
+
+# ============================================================================
+# WRITERS (all write bytes to a binary stream)
+# ============================================================================
+
+def write_csv(chunks, out, thumbnails=False):
+    header = FIELDS + (('thumbnail',) if thumbnails else ())
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(header)
+    for chunk in chunks:
+        for row in chunk:
+            values = [row[field] for field in FIELDS]
+            if thumbnails:
+                values.append(_data_uri(row['thumbnail']))
+            writer.writerow(values)
+        out.write(text.getvalue().encode())
+        text.seek(0)
+        text.truncate()
+    if text.tell():
+        out.write(text.getvalue().encode())
+
+
+def write_jsonl(chunks, out, thumbnails=False):
+    for chunk in chunks:
+        lines = []
+        for row in chunk:
+            if thumbnails:
+                row = dict(row, thumbnail=_data_uri(row['thumbnail']))
+            lines.append(json.dumps(row, ensure_ascii=False))
+        out.write(('\n'.join(lines) + '\n').encode())
+
+
+def write_columnar(chunks, out, fmt, thumbnails=False):
+    """Parquet (one row group per chunk) or an Arrow IPC file (one record batch per chunk)"""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise RuntimeError(f"{fmt} export needs pyarrow: pip install pyarrow")
+
+    fields = [
+        ('id', pa.int64()), ('timestamp', pa.string()), ('class_name', pa.string()),
+        ('disease', pa.string()), ('confidence', pa.float64()),
+    ]
+    if thumbnails:
+        fields.append(('thumbnail', pa.binary()))
+    schema = pa.schema(fields)
+
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(out, schema)
+    else:
+        writer = pa.ipc.new_file(out, schema)
+    try:
+        for chunk in chunks:
+            columns = {name: [row[name] for row in chunk] for name in FIELDS}
+            if thumbnails:
+                columns['thumbnail'] = [row['thumbnail'][0] for row in chunk]
+            writer.write_table(pa.table(columns, schema=schema))
+    finally:
+        writer.close()
+
+
+def export(store, history_id, fmt, out, thumbnails=False, chunk_size=CHUNK_SIZE, label=display_name,
+           max_rows=None):
+    """Stream one history into the binary stream ``out`` as ``fmt``"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    chunks = iter_chunks(store, history_id, thumbnails, chunk_size, label, max_rows)
+    if fmt in COLUMNAR:
+        write_columnar(chunks, out, fmt, thumbnails)
+    elif fmt == 'jsonl':
+        write_jsonl(chunks, out, thumbnails)
+    else:
+        write_csv(chunks, out, thumbnails)
+
+
+def export_bytes(store, history_id, fmt, thumbnails=False, label=display_name, max_rows=None):
+    """Whole export as bytes, for download buttons that need the file at once
+
+    The file is written to a temporary file on disk and read back once, so
+    only the finished file (not a growing buffer plus a copy) is in memory.
+    Pass ``max_rows`` to bound that.
+    """
+    with tempfile.TemporaryFile() as out:
+        export(store, history_id, fmt, out, thumbnails, label=label, max_rows=max_rows)
+        out.seek(0)
+        return out.read()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export one scan history")
+    parser.add_argument('history_id', help="History id (the ?history= value in the app URL)")
+    parser.add_argument('-o', '--output', required=True, help="Output file; the format follows the extension")
+    parser.add_argument('--format', choices=sorted(FORMATS), help="Override the format")
+    parser.add_argument('--thumbnails', action='store_true', help="Embed each scan's thumbnail")
+    parser.add_argument('--history-dir', default=config.HISTORY_DIR)
+    args = parser.parse_args(argv)
+
+    fmt = args.format or os.path.splitext(args.output)[1].lstrip('.').lower()
+    if fmt not in FORMATS:
+        parser.error(f"Cannot tell the format from {args.output!r}; pass --format")
+
+    store = HistoryStore(args.history_dir)
+    try:
+        with open(args.output, 'wb') as out:
+            export(store, args.history_id, fmt, out, args.thumbnails)
+        print(f"Exported {store.count(args.history_id)} scans to {args.output}", file=sys.stderr)
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+# ============================================================================
+# LEAF GUARD AI - Scan History Store
+# Disk-backed scan history: metadata lives in SQLite and
+# thumbnails / original uploads are content-addressed files
+# (thumbs/ab/abcdef....webp, images/cd/cdef....jpg), so sessions keep only
+# small references in memory and history survives restarts. Each browser's
+# history is grouped under a ``history_id``; clearing a history deletes its
+# rows and every blob no other scan still references.
+#
+# Analytics never scan the history: every insert also bumps running
+# counts and confidence sums per disease in all-time, hourly, daily and
+# weekly buckets, plus a confidence histogram, in the same transaction.
+# ============================================================================
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from io import BytesIO
+
+from PIL import features
+
+THUMBNAIL_SIZE = (256, 256)
+THUMBNAIL_QUALITY = 75
+
+# WebP is roughly a third smaller than JPEG at equal quality; fall back to
+# JPEG when Pillow was built without libwebp
+THUMBNAIL_FORMAT, THUMBNAIL_EXT = ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    history_id  TEXT NOT NULL,
+    created_at  TEXT NOT NULL,
+    disease     TEXT NOT NULL,
+    confidence  REAL NOT NULL,
+    thumb       TEXT NOT NULL,
+    image       TEXT
+);
+CREATE INDEX IF NOT EXISTS scans_by_history ON scans (history_id, id);
+CREATE INDEX IF NOT EXISTS scans_by_thumb ON scans (thumb);
+CREATE INDEX IF NOT EXISTS scans_by_image ON scans (image);
+
+CREATE TABLE IF NOT EXISTS scan_rollups (
+    history_id      TEXT NOT NULL,
+    granularity     TEXT NOT NULL,
+    bucket          TEXT NOT NULL,
+    disease         TEXT NOT NULL,
+    scans           INTEGER NOT NULL,
+    confidence_sum  REAL NOT NULL,
+    PRIMARY KEY (history_id, granularity, bucket, disease)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS confidence_histogram (
+    history_id  TEXT NOT NULL,
+    disease     TEXT NOT NULL,
+    bin         INTEGER NOT NULL,
+    scans       INTEGER NOT NULL,
+    PRIMARY KEY (history_id, disease, bin)
+) WITHOUT ROWID;
+"""
+
+# Rollup granularities; 'all' has a single '' bucket. Buckets are the
+# local-time prefixes '2026-10-18 14' (hour) and '2026-10-18' (day), and
+# the Monday starting the week for 'week'.
+GRANULARITIES = ('all', 'hour', 'day', 'week')
+
+# Confidence histogram bins: 0-10%, 10-20%, ..., 90-100%
+CONFIDENCE_BINS = 10
+
+# PRAGMA user_version once rollups cover every stored scan
+AGGREGATES_VERSION = 1
+
+_ROLLUP_UPSERT = """
+INSERT INTO scan_rollups (history_id, granularity, bucket, disease, scans, confidence_sum)
+VALUES (?, ?, ?, ?, 1, ?)
+ON CONFLICT (history_id, granularity, bucket, disease)
+DO UPDATE SET scans = scans + 1, confidence_sum = confidence_sum + excluded.confidence_sum
+"""
+
+_HISTOGRAM_UPSERT = """
+INSERT INTO confidence_histogram (history_id, disease, bin, scans) VALUES (?, ?, ?, 1)
+ON CONFLICT (history_id, disease, bin) DO UPDATE SET scans = scans + 1
+"""
+
+COLUMNS = ('id', 'history_id', 'created_at', 'disease', 'confidence', 'thumb', 'image')
+
+# Blob kinds -> subdirectory
+THUMBS = 'thumbs'
+IMAGES = 'images'
+
+IMAGE_EXTENSIONS = {'JPEG': 'jpg', 'MPO': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+
+def time_buckets(created_at):
+    """(granularity, bucket) pairs a 'YYYY-MM-DD HH:MM:SS' timestamp counts towards"""
+    day = datetime.strptime(created_at[:10], "%Y-%m-%d")
+    week = (day - timedelta(days=day.weekday())).strftime("%Y-%m-%d")
+    return [('all', ''), ('hour', created_at[:13]), ('day', created_at[:10]), ('week', week)]
+
+
+def confidence_bin(confidence):
+    return min(max(int(confidence * CONFIDENCE_BINS / 100), 0), CONFIDENCE_BINS - 1)
+
+
+def make_thumbnail(image, size=THUMBNAIL_SIZE):
+    """Encode a small WebP (or JPEG) thumbnail once, at save time
+
+    Returns ``(data, ext)``. ``draft`` lets JPEG sources that are not yet
+    loaded decode straight at thumbnail scale.
+    """
+    if image.format in ('JPEG', 'MPO') and getattr(image, 'tile', None):
+        image.draft('RGB', size)
+    thumb = image.copy()
+    thumb.thumbnail(size)
+    if thumb.mode != 'RGB':
+        thumb = thumb.convert('RGB')
+    buffer = BytesIO()
+    thumb.save(buffer, format=THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY)
+    return buffer.getvalue(), THUMBNAIL_EXT
+
+
+class HistoryStore:
+    """Scan history backed by SQLite and a thumbnail directory
+
+    Safe to share between Streamlit sessions: one connection is used,
+    serialized by a lock, with WAL journaling so readers never block the
+    single writer for long. A second lock orders blob writes against
+    deletes, so a blob is never unlinked while a new scan is adopting it.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._blob_lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, 'history.sqlite3'), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._migrate()
+
+    def _migrate(self):
+        """Add columns introduced after a database was created"""
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(scans)")}
+        if 'image' not in existing:
+            self._conn.execute("ALTER TABLE scans ADD COLUMN image TEXT")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < AGGREGATES_VERSION:
+            self._rebuild_aggregates()
+
+    def _rebuild_aggregates(self):
+        """Recompute all rollups from the scans table (databases from before rollups)"""
+        with self._conn:
+            self._conn.execute("DELETE FROM scan_rollups")
+            self._conn.execute("DELETE FROM confidence_histogram")
+            buckets = {
+                'all': "''",
+                'hour': "substr(created_at, 1, 13)",
+                'day': "substr(created_at, 1, 10)",
+                # 'weekday 0' moves to the coming Sunday (or stays), -6 days is its Monday
+                'week': "date(created_at, 'weekday 0', '-6 days')",
+            }
+            for granularity, bucket in buckets.items():
+                self._conn.execute(
+                    f"INSERT INTO scan_rollups SELECT history_id, ?, {bucket}, disease, COUNT(*), SUM(confidence) "
+                    f"FROM scans GROUP BY history_id, {bucket}, disease", (granularity,)
+                )
+            self._conn.execute(
+                f"INSERT INTO confidence_histogram SELECT history_id, disease, bin, COUNT(*) FROM ("
+                f"SELECT history_id, disease, MIN(MAX(CAST(confidence * {CONFIDENCE_BINS} / 100 AS INTEGER), 0), "
+                f"{CONFIDENCE_BINS - 1}) AS bin FROM scans) GROUP BY history_id, disease, bin"
+            )
+            self._conn.execute(f"PRAGMA user_version = {AGGREGATES_VERSION}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Content-addressed blobs
+    # ------------------------------------------------------------------
+
+    def _blob_path(self, digest, ext, kind):
+        return os.path.join(self.root, kind, digest[:2], f"{digest}.{ext}")
+
+    def put_blob(self, data, ext, kind=THUMBS):
+        """Store bytes under their SHA-256 and return the reference 'digest.ext'"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest, ext, kind)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write-then-rename so readers never see a partial file
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return f"{digest}.{ext}"
+
+    def blob_path(self, ref, kind=THUMBS):
+        digest, ext = ref.rsplit('.', 1)
+        return self._blob_path(digest, ext, kind)
+
+    def read_blob(self, ref, kind=THUMBS):
+        with open(self.blob_path(ref, kind), 'rb') as f:
+            return f.read()
+
+    # ------------------------------------------------------------------
+    # Records
+    # ------------------------------------------------------------------
+
+    def add(self, history_id, disease, confidence, thumbnail, image=None, timestamp=None):
+        """Append one scan and return its record
+
+        ``thumbnail`` and the optional original ``image`` are ``(data, ext)``
+        pairs; the original is stored as uploaded, without re-encoding.
+        """
+        created_at = timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rollups = [(history_id, granularity, bucket, disease, float(confidence))
+                   for granularity, bucket in time_buckets(created_at)]
+        with self._blob_lock:
+            thumb = self.put_blob(*thumbnail, kind=THUMBS)
+            image_ref = self.put_blob(*image, kind=IMAGES) if image else None
+            values = (history_id, created_at, disease, float(confidence), thumb, image_ref)
+            with self._lock, self._conn:
+                cursor = self._conn.execute(
+                    "INSERT INTO scans (history_id, created_at, disease, confidence, thumb, image) VALUES (?, ?, ?, ?, ?, ?)",
+                    values
+                )
+                self._conn.executemany(_ROLLUP_UPSERT, rollups)
+                self._conn.execute(_HISTOGRAM_UPSERT, (history_id, disease, confidence_bin(confidence)))
+        return self._record(dict(zip(COLUMNS, (cursor.lastrowid,) + values)))
+
+    def delete_history(self, history_id):
+        """Delete every scan of a history and the blobs only it referenced
+
+        Blobs are content-addressed and shared between identical uploads,
+        so a file is only unlinked once no remaining row points at it.
+        Returns the number of scans deleted.
+        """
+        with self._blob_lock:
+            with self._lock, self._conn:
+                refs = self._conn.execute(
+                    "SELECT DISTINCT thumb, image FROM scans WHERE history_id = ?", (history_id,)
+                ).fetchall()
+                deleted = self._conn.execute("DELETE FROM scans WHERE history_id = ?", (history_id,)).rowcount
+                self._conn.execute("DELETE FROM scan_rollups WHERE history_id = ?", (history_id,))
+                self._conn.execute("DELETE FROM confidence_histogram WHERE history_id = ?", (history_id,))
+                orphans = set()
+                for thumb, image in refs:
+                    if not self._conn.execute("SELECT 1 FROM scans WHERE thumb = ? LIMIT 1", (thumb,)).fetchone():
+                        orphans.add((thumb, THUMBS))
+                    if image and not self._conn.execute("SELECT 1 FROM scans WHERE image = ? LIMIT 1", (image,)).fetchone():
+                        orphans.add((image, IMAGES))
+            for ref, kind in orphans:
+                try:
+                    os.remove(self.blob_path(ref, kind))
+                except FileNotFoundError:
+                    pass
+        return deleted
+
+    @staticmethod
+    def _record(row):
+        """Shape a row like the entries app.py keeps in session state"""
+        row = dict(row)
+        row['timestamp'] = row.pop('created_at')
+        return row
+
+    def page(self, history_id, limit=20, before_id=None):
+        """Newest-first page of records; pass the last id to get the next page"""
+        query = "SELECT * FROM scans WHERE history_id = ?"
+        params = [history_id]
+        if before_id is not None:
+            query += " AND id < ?"
+            params.append(before_id)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._record(row) for row in rows]
+
+    def count(self, history_id):
+        return self.summary(history_id)['count']
+
+    # ------------------------------------------------------------------
+    # Analytics (read from the rollups: one row per disease and bucket,
+    # however long the history is)
+    # ------------------------------------------------------------------
+
+    def summary(self, history_id):
+        """Scan count and average confidence for one history"""
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COALESCE(SUM(scans), 0), COALESCE(SUM(confidence_sum), 0) FROM scan_rollups "
+                "WHERE history_id = ? AND granularity = 'all'", (history_id,)
+            ).fetchone()
+        return {'count': count, 'avg_confidence': total / count if count else 0.0}
+
+    def by_disease(self, history_id):
+        """{disease class: (scans, average confidence)}, most scanned first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT disease, scans, confidence_sum FROM scan_rollups "
+                "WHERE history_id = ? AND granularity = 'all' ORDER BY scans DESC", (history_id,)
+            ).fetchall()
+        return {disease: (scans, total / scans) for disease, scans, total in rows}
+
+    def timeline(self, history_id, granularity='day', buckets=30):
+        """{bucket: {disease class: scans}} for the latest ``buckets`` buckets, oldest first"""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity '{granularity}'")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT bucket, disease, scans FROM scan_rollups "
+                "WHERE history_id = ? AND granularity = ? AND bucket >= COALESCE(("
+                "  SELECT DISTINCT bucket FROM scan_rollups WHERE history_id = ? AND granularity = ? "
+                "  ORDER BY bucket DESC LIMIT 1 OFFSET ?), '') ORDER BY bucket",
+                (history_id, granularity, history_id, granularity, buckets - 1)
+            ).fetchall()
+        timeline = {}
+        for bucket, disease, scans in rows:
+            timeline.setdefault(bucket, {})[disease] = scans
+        return timeline
+
+    def confidence_histogram(self, history_id):
+        """Scans per confidence bin (CONFIDENCE_BINS counts, lowest bin first)"""
+        counts = [0] * CONFIDENCE_BINS
+        with self._lock:
+            for bin_, scans in self._conn.execute(
+                "SELECT bin, SUM(scans) FROM confidence_histogram WHERE history_id = ? GROUP BY bin", (history_id,)
+            ):
+                counts[bin_] = scans
+        return counts
+
+    def iter_records(self, history_id, chunk_size=1000):
+        """Yield every record of a history, newest first, one page at a time"""
+        before_id = None
+        while True:
+            rows = self.page(history_id, chunk_size, before_id)
+            if not rows:
+                return
+            yield from rows
+            before_id = rows[-1]['id']
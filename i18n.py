@@ -0,0 +1,72 @@
+# ============================================================================
+# LEAF GUARD AI - Translations
+# UI strings live in one JSON catalog per language (locales/<language>.json)
+# listed in locales/languages.json. A catalog is read the first time its
+# language is used, merged over the default language so missing keys fall
+# back to English, and kept as a read-only mapping shared by every session.
+# With hot reload on, an edited file is picked up on the next lookup.
+# ============================================================================
+
+import json
+import os
+import threading
+from types import MappingProxyType
+
+DEFAULT_LANGUAGE = 'english'
+MANIFEST = 'languages'
+
+
+class Catalogs:
+    """Lazily loaded, shared translation catalogs
+
+    ``catalog(language)`` returns a read-only mapping of message key to
+    text; only languages that have been asked for are held in memory.
+    """
+
+    def __init__(self, directory, hot_reload=True, default_language=DEFAULT_LANGUAGE):
+        self.directory = directory
+        self.hot_reload = hot_reload
+        self.default_language = default_language
+        self._lock = threading.Lock()
+        # name -> (mtime_ns, fallback mapping or None, compiled value)
+        self._entries = {}
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.json")
+
+    def _get(self, name, compile_fn, fallback=None):
+        """Return the cached value for ``name``, (re)loading it if needed"""
+        entry = self._entries.get(name)
+        if entry is not None and not self.hot_reload:
+            return entry[2]
+        mtime = os.stat(self._path(name)).st_mtime_ns
+        if entry is not None and entry[0] == mtime and entry[1] is fallback:
+            return entry[2]
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry[0] != mtime or entry[1] is not fallback:
+                with open(self._path(name), encoding='utf-8') as f:
+                    data = json.load(f)
+                entry = (mtime, fallback, compile_fn(data, fallback))
+                self._entries[name] = entry
+            return entry[2]
+
+    @staticmethod
+    def _compile(messages, fallback):
+        merged = dict(fallback) if fallback else {}
+        merged.update(messages)
+        return MappingProxyType(merged)
+
+    def languages(self):
+        """Ordered mapping of language name to its short selector label"""
+        return self._get(MANIFEST, lambda data, _: MappingProxyType(dict(data)))
+
+    def catalog(self, language):
+        """Messages for ``language``, falling back to the default language"""
+        if language == self.default_language:
+            return self._get(language, self._compile)
+        return self._get(language, self._compile, fallback=self.catalog(self.default_language))
+
+    def loaded(self):
+        """Names of the catalogs currently held in memory"""
+        return [name for name in self._entries if name != MANIFEST]
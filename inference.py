@@ -0,0 +1,187 @@
+# ============================================================================
+# LEAF GUARD AI - Headless Inference Engine
+# Batch prediction without any Streamlit dependency, shared by the web app
+# and offline tools such as field-survey pipelines.
+# ============================================================================
+
+import os
+import threading
+import weakref
+from itertools import islice
+
+import numpy as np
+
+import preprocessing
+from preprocessing import IMG_SIZE
+
+MODEL_PATH = 'leaf_guard_best.h5'
+CLASS_NAMES_PATH = 'class_names.txt'
+DEFAULT_BATCH_SIZE = 32
+TOP_K = 3
+
+# Results whose top confidence (in %) falls below this are flagged as unreliable
+LOW_CONFIDENCE_THRESHOLD = 30
+
+
+# ============================================================================
+# LOADING
+# ============================================================================
+
+def load_model(path=MODEL_PATH):
+    """Load the trained disease detection model (raises on failure)"""
+    # Suppress TensorFlow warnings
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    from tensorflow import keras
+
+    # compile=False: the model is only used for inference
+    return keras.models.load_model(path, compile=False)
+
+
+def load_class_names(path=CLASS_NAMES_PATH):
+    """Load class names, one per line, from file"""
+    with open(path, 'r') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+# ============================================================================
+# PREPROCESSING
+# ============================================================================
+
+def preprocess_image(image):
+    """Convert a PIL image to a normalized (224, 224, 3) float32 array"""
+    return preprocessing.prepare(image).pixels
+
+
+def stack_batch(images):
+    """Preprocess a sequence of PIL images (or paths) into one (N, 224, 224, 3) batch"""
+    buffer = preprocessing.BatchBuffer(len(images))
+    for image in images:
+        buffer.add(image)
+    return buffer.view()
+
+
+def iter_batches(items, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield lists of at most ``batch_size`` items from any iterable"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, batch_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ============================================================================
+# PREDICTION
+# ============================================================================
+
+def top_k_predictions(probabilities, class_names, k=TOP_K):
+    """Turn one row of class probabilities into a ranked list of results"""
+    top_idx = np.argsort(probabilities)[-k:][::-1]
+    return [{
+        'index': int(idx),
+        'disease': class_names[idx],
+        'confidence': float(probabilities[idx]) * 100
+    } for idx in top_idx]
+
+
+def is_low_confidence(results):
+    """True if the top prediction is below LOW_CONFIDENCE_THRESHOLD"""
+    return results[0]['confidence'] < LOW_CONFIDENCE_THRESHOLD
+
+
+def artifact_version(kind, path):
+    """Identify a model artifact by kind, path, size and modification time"""
+    try:
+        stat = os.stat(path)
+        return f"{kind}:{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    except OSError:
+        return f"{kind}:{path}"
+
+
+def model_version(model):
+    """Version string used to key cached predictions for ``model``"""
+    return getattr(model, 'version', None) or f"{type(model).__name__}:{id(model)}"
+
+
+class InferenceBackend:
+    """Base class for runtime backends (see backends.py)
+
+    A backend owns a loaded network and maps a preprocessed
+    (N, 224, 224, 3) float32 batch to an (N, classes) probability array.
+    """
+
+    kind = 'base'
+
+    def __init__(self, path):
+        self.path = path
+        self.version = artifact_version(self.kind, path)
+
+    def predict_array(self, batch):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.path!r})"
+
+
+_compiled = weakref.WeakKeyDictionary()
+_compiled_lock = threading.Lock()
+
+
+def compiled_predictor(model):
+    """Return a traced forward function for ``model``, built once and reused
+
+    ``model.predict`` sets up a data pipeline and callbacks on every call,
+    which costs far more than the MobileNetV2 forward pass for small
+    batches. The returned ``tf.function`` has a fixed (None, 224, 224, 3)
+    signature, so it is traced once and serves every batch size. The
+    function only holds a weak reference to ``model``, so the cache entry
+    goes away with a replaced or reloaded model.
+    """
+    with _compiled_lock:
+        fn = _compiled.get(model)
+        if fn is None:
+            import tensorflow as tf
+
+            model_ref = weakref.ref(model)
+
+            @tf.function(input_signature=[
+                tf.TensorSpec([None, IMG_SIZE[1], IMG_SIZE[0], 3], tf.float32)
+            ])
+            def fn(batch):
+                return model_ref()(batch, training=False)
+
+            _compiled[model] = fn
+        return fn
+
+
+def predict_array(model, batch):
+    """Run one forward pass over an already preprocessed batch
+
+    ``model`` is either a Keras model or an InferenceBackend.
+    """
+    if isinstance(model, InferenceBackend):
+        return model.predict_array(batch)
+    return compiled_predictor(model)(batch).numpy()
+
+
+def predict_batch(model, images, class_names, k=TOP_K):
+    """Predict a list of PIL images with a single forward pass"""
+    if not images:
+        return []
+    probabilities = predict_array(model, stack_batch(images))
+    return [top_k_predictions(row, class_names, k) for row in probabilities]
+
+
+def predict_images(model, images, class_names, batch_size=DEFAULT_BATCH_SIZE, k=TOP_K):
+    """Lazily predict any iterable of PIL images, one forward pass per batch
+
+    Yields one top-k result list per input image, in input order.
+    """
+    for chunk in iter_batches(images, batch_size):
+        for results in predict_batch(model, chunk, class_names, k):
+            yield results
+
+
+def predict_single(model, image, class_names, k=TOP_K):
+    """Predict one PIL image (a batch of one)"""
+    return predict_batch(model, [image], class_names, k)[0]
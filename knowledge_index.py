@@ -0,0 +1,110 @@
+# ============================================================================
+# LEAF GUARD AI - Class Knowledge Index
+# Built once from class_names.txt and the disease database: one entry per
+# model output index holding the matched disease record, the display name
+# and the severity, so turning a prediction into UI content is a list
+# lookup instead of a substring scan over the database on every render.
+# ============================================================================
+
+import logging
+import re
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEY = 'default'
+
+# index: model output index
+# key: disease database key ('default' if nothing matched)
+# record: disease database entry for ``key``
+# display_name: 'Tomato Late Blight' for 'Tomato___Late_blight'
+# crop / disease: display names of the two halves of the class name
+# severity: 'High' / 'Medium' / 'Low', or None (healthy or not listed)
+# severity_key: translation key of the severity label, e.g. 'severity_high'
+ClassEntry = namedtuple('ClassEntry', [
+    'index', 'class_name', 'key', 'record', 'display_name',
+    'crop', 'disease', 'severity', 'severity_key'
+])
+
+
+def display_name(class_name):
+    """'Pepper,_bell___Bacterial_spot' -> 'Pepper, Bell Bacterial Spot'"""
+    return class_name.replace('___', ' ').replace('_', ' ').title()
+
+
+def match_disease_key(class_name, disease_db):
+    """First database key contained in the class name, else 'default'"""
+    lowered = class_name.lower()
+    for key in disease_db:
+        if key in lowered:
+            return key
+    return DEFAULT_KEY
+
+
+def crop_of(class_name):
+    """Leading crop word: 'Corn_(maize)___Common_rust' -> 'Corn'"""
+    return re.split(r'[^A-Za-z]', class_name, maxsplit=1)[0].title()
+
+
+def severity_table(detectable_diseases):
+    """{(crop, disease name): severity} from the detectable diseases listing"""
+    return {
+        (crop, entry['name']): entry['severity']
+        for crop, entries in detectable_diseases.items()
+        for entry in entries
+    }
+
+
+class KnowledgeIndex:
+    """Class index -> ClassEntry, plus a by-name map for stored records
+
+    ``missing`` lists class names that matched no database entry and fall
+    back to the generic 'default' record.
+    """
+
+    def __init__(self, class_names, disease_db, detectable_diseases=None):
+        severities = severity_table(detectable_diseases or {})
+        self.entries = [
+            self._build(idx, name, disease_db, severities)
+            for idx, name in enumerate(class_names)
+        ]
+        self.by_name = {entry.class_name: entry for entry in self.entries}
+        self.missing = [entry.class_name for entry in self.entries if entry.key == DEFAULT_KEY]
+        self._disease_db = disease_db
+        self._severities = severities
+
+    @staticmethod
+    def _build(idx, class_name, disease_db, severities):
+        key = match_disease_key(class_name, disease_db)
+        crop = crop_of(class_name)
+        disease = display_name(class_name.split('___')[-1])
+        severity = severities.get((crop, disease))
+        return ClassEntry(
+            idx, class_name, key, disease_db[key], display_name(class_name),
+            crop, disease, severity, f"severity_{severity.lower()}" if severity else None
+        )
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, idx):
+        return self.entries[idx]
+
+    def lookup(self, class_name):
+        """Entry for a class name, e.g. one stored in the scan history
+
+        Names the current model does not know (history written by an older
+        model) are resolved the slow way rather than raising.
+        """
+        entry = self.by_name.get(class_name)
+        if entry is None:
+            entry = self._build(None, class_name, self._disease_db, self._severities)
+        return entry
+
+    def report(self):
+        """One line per class without a disease database entry"""
+        return [f"{name}: no disease database entry, using '{DEFAULT_KEY}'" for name in self.missing]
+
+    def log_report(self):
+        for line in self.report():
+            logger.warning(line)
@@ -0,0 +1,322 @@
+# ============================================================================
+# LEAF GUARD AI - Metrics
+# In-process counters, gauges and histograms for the scan path, rendered in
+# the Prometheus text exposition format on GET /metrics of the probe server
+# (and of api_server.py, which serves the same routes).
+#
+#   LEAF_GUARD_PROBE_PORT=8502 python serve.py
+#   curl localhost:8502/metrics
+#
+# Recording is a lock and a few additions, cheap enough to leave on for
+# every request; gauges backed by a function are only evaluated on scrape.
+# ============================================================================
+
+import bisect
+import math
+import sys
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds, from a cached validation (~1 ms) to a cold model load
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Metric:
+    """Base class: one metric family with optional labels
+
+    Children are keyed by the tuple of label values, in ``labelnames``
+    order; every recording call must pass exactly those labels.
+    """
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        self._functions = {}
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames) or set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set_function(self, fn, **labels):
+        """Read this child's value from ``fn()`` at scrape time"""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = fn
+
+    def samples(self):
+        """(suffix, label names, label values, extra labels, value) tuples"""
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, fn in functions.items():
+            try:
+                values[key] = float(fn())
+            except Exception:
+                # A failing callback must not break the whole scrape
+                continue
+        return [('', self.labelnames, key, (), value) for key, value in sorted(values.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, names, values, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(names, values, extra)} {_format_value(value)}")
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """Value that can go up and down"""
+
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(Metric):
+    """Distribution of observations over fixed upper bounds"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (the last one is +Inf), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the ``with`` block (also when it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def samples(self):
+        with self._lock:
+            states = {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+        samples = []
+        for key, (counts, total, count) in sorted(states.items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket
+                samples.append(('_bucket', self.labelnames, key, (('le', _format_value(bound)),), cumulative))
+            samples.append(('_sum', self.labelnames, key, (), total))
+            samples.append(('_count', self.labelnames, key, (), count))
+        return samples
+
+
+class Registry:
+    """Ordered collection of metric families"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def render():
+    """All metrics in the Prometheus text format"""
+    return REGISTRY.render()
+
+
+# ============================================================================
+# SCAN PATH METRICS
+# ============================================================================
+
+# decode, preprocess, validate, inference (batch wait + forward pass), model
+# (one batched forward pass), history_save
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'leaf_guard_stage_seconds', "Wall time of one scan path stage", ['stage']
+))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    'leaf_guard_stage_errors_total', "Scan path stages that raised", ['stage']
+))
+# invalid_image (size/brightness checks), low_confidence (below the model
+# threshold), or an upload gate reason (see upload_gate.py)
+REJECTIONS = REGISTRY.register(Counter(
+    'leaf_guard_rejections_total', "Scans rejected before or after inference", ['reason']
+))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    'leaf_guard_prediction_cache_lookups_total', "Prediction cache lookups", ['result']
+))
+CACHE_ENTRIES = REGISTRY.register(Gauge(
+    'leaf_guard_prediction_cache_entries', "Predictions currently cached"
+))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    'leaf_guard_scheduler_queue_depth', "Requests waiting for a batch", ['scheduler']
+))
+BATCH_SIZE = REGISTRY.register(Histogram(
+    'leaf_guard_batch_size', "Images per forward pass", ['scheduler'], buckets=(1, 2, 4, 8, 16, 32, 64)
+))
+DECODE_PIXELS = REGISTRY.register(Gauge(
+    'leaf_guard_decode_pixels_in_flight', "Pixels reserved in the shared decode budget"
+))
+SESSIONS = REGISTRY.register(Gauge(
+    'leaf_guard_sessions', "Streamlit sessions seen within the idle window"
+))
+SESSION_STATE_BYTES = REGISTRY.register(Gauge(
+    'leaf_guard_session_state_bytes', "Approximate session_state memory summed over those sessions"
+))
+
+
+@contextmanager
+def stage(name):
+    """Time a scan path stage and count it as an error if it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=name)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=name)
+
+
+def track_cache(cache):
+    """Export the size of a PredictionCache (hits/misses are counted by callers)"""
+    CACHE_ENTRIES.set_function(lambda: len(cache))
+
+
+def track_scheduler(scheduler, name):
+    """Export a MicroBatchScheduler's queue depth without keeping it alive"""
+    ref = weakref.ref(scheduler)
+
+    def depth():
+        alive = ref()
+        return alive.queue_depth if alive is not None else 0
+
+    QUEUE_DEPTH.set_function(depth, scheduler=name)
+
+
+def deep_sizeof(obj, _seen=None):
+    """Approximate memory held by ``obj`` and the containers inside it"""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    nbytes = getattr(obj, 'nbytes', None)
+    if isinstance(nbytes, int):
+        # NumPy arrays (and views) report their buffer size
+        return sys.getsizeof(obj) + nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, _seen) + deep_sizeof(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, _seen) for item in obj)
+    return size
+
+
+class SessionMemory:
+    """Latest session_state size per session, forgotten after ``idle_s``
+
+    Streamlit gives no callback when a session ends, so sessions that have
+    not rerun within the idle window drop out of the totals.
+    """
+
+    def __init__(self, idle_s=3600.0, clock=time.monotonic):
+        self.idle_s = idle_s
+        self._clock = clock
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def record(self, session_id, nbytes):
+        with self._lock:
+            self._sessions[session_id] = (self._clock(), nbytes)
+
+    def _active(self):
+        cutoff = self._clock() - self.idle_s
+        with self._lock:
+            for session_id in [s for s, (seen, _) in self._sessions.items() if seen < cutoff]:
+                del self._sessions[session_id]
+            return [nbytes for _, nbytes in self._sessions.values()]
+
+    def count(self):
+        return len(self._active())
+
+    def total_bytes(self):
+        return sum(self._active())
+
+
+SESSION_MEMORY = SessionMemory()
+SESSIONS.set_function(SESSION_MEMORY.count)
+SESSION_STATE_BYTES.set_function(SESSION_MEMORY.total_bytes)
@@ -0,0 +1,355 @@
+# ============================================================================
+# LEAF GUARD AI - Model Replica Pool
+# Runs N copies of the model in separate processes, each pinned to its own
+# slice of CPU cores with a matching intra-op thread count, so concurrent
+# batches do not fight over the same cores the way calls into one shared
+# TensorFlow runtime do. The pool is a backend: callers use predict_array()
+# and it is routed to an idle replica.
+#
+#   python model_pool.py --autotune            # find the best split for this host
+#   LEAF_GUARD_MODEL_REPLICAS=2 python serve.py
+# ============================================================================
+
+import argparse
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+import config
+from inference import IMG_SIZE, InferenceBackend
+
+logger = logging.getLogger(__name__)
+
+
+def available_cores():
+    """CPU ids this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def partition_cores(cores, replicas):
+    """Split ``cores`` into ``replicas`` contiguous, near-equal slices
+
+    With more replicas than cores, slices wrap around and share cores.
+    """
+    if replicas <= len(cores):
+        size, extra = divmod(len(cores), replicas)
+        slices, start = [], 0
+        for i in range(replicas):
+            end = start + size + (1 if i < extra else 0)
+            slices.append(cores[start:end])
+            start = end
+        return slices
+    return [[cores[i % len(cores)]] for i in range(replicas)]
+
+
+def pin_to_cores(cores):
+    """Restrict the calling process to ``cores`` (no-op where unsupported)"""
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+
+
+def configure_threads(kind, threads):
+    """Size the runtime's thread pools; must run before the first TF op"""
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    config.TFLITE_THREADS = threads
+    if kind != 'tflite':
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+# ============================================================================
+# REPLICA PROCESS
+# ============================================================================
+
+def _replica_main(conn, cores, threads, kind, path, warmup_batch_sizes):
+    """Replica process: load the backend, then answer batches until told to stop"""
+    try:
+        pin_to_cores(cores)
+        configure_threads(kind or config.BACKEND, threads)
+        import backends
+        backend = backends.load_backend(kind, path)
+        for size in warmup_batch_sizes:
+            backend.predict_array(np.zeros((size, IMG_SIZE[1], IMG_SIZE[0], 3), dtype=np.float32))
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+        return
+    conn.send(('ready', (backend.kind, backend.path, backend.version)))
+
+    while True:
+        try:
+            batch = conn.recv()
+        except EOFError:
+            return
+        if batch is None:
+            return
+        try:
+            conn.send(('ok', backend.predict_array(batch)))
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+
+
+class ReplicaDied(RuntimeError):
+    """The replica process exited or its pipe broke; it cannot be reused"""
+
+
+class Replica:
+    """Parent-side handle of one replica process (one request at a time)"""
+
+    def __init__(self, ctx, index, cores, threads, kind, path, warmup_batch_sizes):
+        self.index = index
+        self.cores = cores
+        self.threads = threads
+        self._conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_replica_main, args=(child, cores, threads, kind, path, warmup_batch_sizes),
+            name=f'leaf-guard-replica-{index}', daemon=True
+        )
+        self.process.start()
+        child.close()
+
+    def wait_ready(self):
+        """Block until the replica has loaded; returns (kind, path, version)"""
+        status, payload = self._recv()
+        if status != 'ready':
+            raise RuntimeError(f"Replica {self.index} failed to load: {payload}")
+        return payload
+
+    def _recv(self):
+        try:
+            return self._conn.recv()
+        except (EOFError, OSError):
+            self.process.join(timeout=1)
+            raise ReplicaDied(f"Replica {self.index} exited (code {self.process.exitcode})")
+
+    def predict_array(self, batch):
+        try:
+            self._conn.send(batch)
+        except (BrokenPipeError, OSError):
+            raise ReplicaDied(f"Replica {self.index} is gone (code {self.process.exitcode})")
+        status, payload = self._recv()
+        if status != 'ok':
+            raise RuntimeError(f"Replica {self.index}: {payload}")
+        return payload
+
+    def close(self):
+        try:
+            self._conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self._conn.close()
+
+
+# ============================================================================
+# POOL / DISPATCHER
+# ============================================================================
+
+class ModelPool(InferenceBackend):
+    """N replica processes behind one predict_array()
+
+    Each call takes an idle replica (blocking while all are busy), so up to
+    ``concurrency`` batches run in parallel; MicroBatchScheduler uses that
+    attribute to keep every replica fed. ``threads`` defaults to the size
+    of each replica's core slice. A replica whose process dies is never
+    handed out again: it is replaced by a fresh one in the background, and
+    if that fails the pool shrinks. Once no replica is left, waiting and
+    later calls raise RuntimeError instead of blocking.
+    """
+
+    kind = 'pool'
+
+    def __init__(self, replicas, threads=None, kind=None, path=None, cores=None,
+                 warmup_batch_sizes=None):
+        cores = list(cores or available_cores())
+        slices = partition_cores(cores, replicas)
+        warmup = config.WARMUP_BATCH_SIZES if warmup_batch_sizes is None else warmup_batch_sizes
+        # Spawn: forking a process that has already touched TensorFlow is unsafe
+        self._ctx = multiprocessing.get_context('spawn')
+        self._spawn_args = (kind, path, warmup)
+        self._closed = False
+        self._idle = queue.Queue()
+        # Guards replicas, concurrency and _closed against respawn threads
+        self._lock = threading.Lock()
+        self.replicas = [
+            Replica(self._ctx, i, cores_slice, threads or len(cores_slice), kind, path, warmup)
+            for i, cores_slice in enumerate(slices)
+        ]
+        try:
+            infos = [replica.wait_ready() for replica in self.replicas]
+        except Exception:
+            self.close()
+            raise
+        self.backend_kind, self.path, self.version = infos[0]
+        self.concurrency = len(self.replicas)
+        for replica in self.replicas:
+            self._idle.put(replica)
+        logger.info("Model pool ready: %s", self.describe())
+
+    def describe(self):
+        with self._lock:
+            replicas = list(self.replicas)
+        return ', '.join(f"replica {r.index}: cores {r.cores} x{r.threads} threads" for r in replicas)
+
+    def predict_array(self, batch):
+        replica = self._idle.get()
+        if replica is None:
+            # Sentinel: the pool is closed or every replica is gone; pass it on
+            # so the next waiter wakes up too
+            self._idle.put(None)
+            raise RuntimeError("Model pool has no live replicas")
+        try:
+            result = replica.predict_array(batch)
+        except ReplicaDied:
+            threading.Thread(target=self._respawn, args=(replica,), daemon=True).start()
+            raise
+        except BaseException:
+            self._idle.put(replica)
+            raise
+        self._idle.put(replica)
+        return result
+
+    def _respawn(self, dead):
+        """Replace a dead replica with a new process on the same cores"""
+        logger.warning("Replica %d died (exit code %s); respawning", dead.index, dead.process.exitcode)
+        dead.close()
+        replica = None
+        try:
+            replica = Replica(self._ctx, dead.index, dead.cores, dead.threads, *self._spawn_args)
+            replica.wait_ready()
+        except Exception as e:
+            logger.error("Could not respawn replica %d: %s", dead.index, e)
+            if replica is not None:
+                replica.close()
+            with self._lock:
+                self.replicas = [r for r in self.replicas if r is not dead]
+                self.concurrency = len(self.replicas)
+                if not self.replicas:
+                    self._idle.put(None)
+            return
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self.replicas = [replica if r is dead else r for r in self.replicas]
+                self._idle.put(replica)
+        if closed:
+            replica.close()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            replicas = list(self.replicas)
+        for replica in replicas:
+            replica.close()
+        self._idle.put(None)
+
+    def __repr__(self):
+        return f"ModelPool({len(self.replicas)} x {self.backend_kind!r} {self.path!r})"
+
+
+def load_pool(kind=None, path=None):
+    """Pool sized from LEAF_GUARD_MODEL_REPLICAS / LEAF_GUARD_REPLICA_THREADS"""
+    return ModelPool(config.MODEL_REPLICAS, config.REPLICA_THREADS or None, kind, path)
+
+
+# ============================================================================
+# AUTO-TUNE
+# ============================================================================
+
+def candidate_plans(cores):
+    """(replicas, threads per replica) combinations worth measuring"""
+    plans = []
+    replicas = 1
+    while replicas <= cores:
+        threads = cores // replicas
+        plans.append((replicas, threads))
+        # Oversubscribed variant: two threads per core slot
+        if replicas > 1 and threads == 1:
+            plans.append((replicas, 2))
+        replicas *= 2
+    if (cores, 1) not in plans:
+        plans.append((cores, 1))
+    return plans
+
+
+def measure(pool, batch_size, duration, clients):
+    """Closed-loop throughput (images/s) and p50/p95 latency (ms)"""
+    batch = np.random.default_rng(0).random((batch_size, IMG_SIZE[1], IMG_SIZE[0], 3), dtype=np.float32)
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            pool.predict_array(batch)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    p50, p95 = np.percentile(np.array(latencies) * 1000, [50, 95])
+    return len(latencies) * batch_size / elapsed, p50, p95
+
+
+def autotune(kind=None, path=None, batch_size=None, duration=10.0, cores=None):
+    """Benchmark every plan on this host and return them best-first"""
+    cores = list(cores or available_cores())
+    batch_size = batch_size or config.MAX_BATCH_SIZE
+    results = []
+    print(f"{len(cores)} cores, batch size {batch_size}, {duration:.0f}s per plan")
+    print(f"{'replicas':>8} {'threads':>8} {'img/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for replicas, threads in candidate_plans(len(cores)):
+        pool = ModelPool(replicas, threads, kind, path, cores, warmup_batch_sizes=[batch_size])
+        try:
+            # Two clients per replica so a replica never idles between calls
+            throughput, p50, p95 = measure(pool, batch_size, duration, clients=2 * replicas)
+        finally:
+            pool.close()
+        print(f"{replicas:>8} {threads:>8} {throughput:>8.1f} {p50:>8.1f} {p95:>8.1f}")
+        results.append({'replicas': replicas, 'threads': threads, 'images_per_s': throughput,
+                        'p50_ms': p50, 'p95_ms': p95})
+    return sorted(results, key=lambda r: r['images_per_s'], reverse=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Model replica pool")
+    parser.add_argument('--autotune', action='store_true',
+                        help="Benchmark replica/thread splits and print the best settings")
+    parser.add_argument('--backend', default=None, help="keras, savedmodel or tflite (default: config)")
+    parser.add_argument('--model', default=None, help="Model artifact (default: per backend)")
+    parser.add_argument('--batch-size', type=int, default=None)
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per plan")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    if not args.autotune:
+        pool = load_pool(args.backend, args.model)
+        print(pool.describe())
+        pool.close()
+        return 0
+
+    best = autotune(args.backend, args.model, args.batch_size, args.duration)[0]
+    print(f"\nBest: {best['replicas']} replica(s) x {best['threads']} thread(s), "
+          f"{best['images_per_s']:.1f} img/s")
+    print(f"LEAF_GUARD_MODEL_REPLICAS={best['replicas']} LEAF_GUARD_REPLICA_THREADS={best['threads']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
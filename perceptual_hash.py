@@ -0,0 +1,91 @@
+# ============================================================================
+# LEAF GUARD AI - Perceptual Hashing
+# Tiny fingerprints that stay equal (or within a few bits) for images that
+# look the same, used to skip inference on near-identical frames and
+# photos. Hashes are plain Python ints; similarity is the Hamming distance.
+# dHash is the cheapest (video frames); pHash is steadier across burst
+# shots and small re-framings (bulk surveys, see hash_index.py).
+# ============================================================================
+
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 8
+
+# pHash works on the low frequencies of a PHASH_SIDE x PHASH_SIDE thumbnail
+PHASH_SIDE = 32
+
+# ITU-R 601 luma weights (the same ones PIL uses for mode 'L')
+LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+_DCT = None
+
+
+def _gray_thumbnail(image, size):
+    """(height, width) float32 grayscale thumbnail of a PIL image or RGB array"""
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    # Box-reduce in colour first: converting the full-size frame to L costs more
+    small = image.resize(size, Image.BOX, reducing_gap=2.0)
+    return np.asarray(small.convert('L'), dtype=np.float32)
+
+
+def _gray_array(image, size):
+    """Grayscale thumbnail; RGB arrays that tile evenly are box-averaged in NumPy
+
+    Model inputs (224x224 float32) reduce to 32x32 as a reshape and mean,
+    without a round trip through PIL.
+    """
+    width, height = size
+    if (isinstance(image, np.ndarray) and image.ndim == 3
+            and image.shape[0] % height == 0 and image.shape[1] % width == 0):
+        gray = image.astype(np.float32, copy=False) @ LUMA
+        return gray.reshape(height, gray.shape[0] // height, width, gray.shape[1] // width).mean(axis=(1, 3))
+    return _gray_thumbnail(image, size)
+
+
+def _dct_matrix(n):
+    """Orthonormal DCT-II basis, so ``D @ x @ D.T`` is the 2-D DCT"""
+    k = np.arange(n)[:, None]
+    basis = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    basis[0] /= np.sqrt(2.0)
+    return basis.astype(np.float32)
+
+
+def _pack(bits):
+    """Boolean array -> int, first element as the most significant bit"""
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+
+def dhash(image, hash_size=HASH_SIZE):
+    """Difference hash: whether brightness rises between neighbouring columns
+
+    ``hash_size``**2 bits (64 by default) from a (hash_size + 1) x hash_size
+    thumbnail. Robust to rescaling and compression, cheap enough per video
+    frame (one box-reduce of the frame dominates).
+    """
+    pixels = _gray_thumbnail(image, (hash_size + 1, hash_size))
+    return _pack(pixels[:, 1:] > pixels[:, :-1])
+
+
+def phash(image, hash_size=HASH_SIZE):
+    """DCT hash: which low-frequency coefficients are above their median
+
+    More tolerant than dHash of the small crops, shifts and exposure
+    changes between burst shots. Accepts PIL images, RGB uint8 arrays and
+    the (224, 224, 3) float32 model input.
+    """
+    global _DCT
+    if _DCT is None:
+        _DCT = _dct_matrix(PHASH_SIDE)
+    pixels = _gray_array(image, (PHASH_SIDE, PHASH_SIDE))
+    low = (_DCT @ pixels @ _DCT.T)[:hash_size, :hash_size]
+    # The DC term only encodes overall brightness; keep it out of the median
+    return _pack(low > np.median(low.ravel()[1:]))
+
+
+def hamming(a, b):
+    """Number of differing bits between two hashes"""
+    return bin(a ^ b).count('1')
@@ -0,0 +1,91 @@
+# ============================================================================
+# LEAF GUARD AI - Prediction Cache
+# Content-addressed cache of model outputs. Keys hash the decoded model
+# input pixels together with the model version, so re-analyzing the same
+# photo (Streamlit reruns, repeat clicks, forwarded images) skips the
+# forward pass while a model swap invalidates everything automatically.
+# ============================================================================
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def cache_key(pixels, model_version):
+    """Digest of the (224, 224, 3) model input plus the model version"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(model_version).encode())
+    digest.update(str(pixels.shape).encode())
+    digest.update(memoryview(pixels).cast('B') if pixels.flags.c_contiguous else pixels.tobytes())
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with a per-entry time-to-live
+
+    Memory is bounded by ``max_entries`` (each entry is one small
+    probability row). Expired entries are dropped on access and when the
+    cache needs room; ``stats()`` exposes hit/miss/eviction counters.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached value or None (counts a hit or a miss)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._purge_expired()
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _purge_expired(self):
+        now = self._clock()
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        self.expirations += len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
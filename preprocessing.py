@@ -0,0 +1,224 @@
+# ============================================================================
+# LEAF GUARD AI - Image Preprocessing
+# One decode per image: JPEGs are downscaled during decoding (PIL draft),
+# the 224x224 result is normalized straight into a preallocated float32
+# batch buffer, and the statistics used by validation come from the same
+# pixels instead of a second convert/resize pass. Full-size decodes in all
+# sessions and threads share one pixel budget (DECODE_BUDGET).
+# ============================================================================
+
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image
+
+import config
+import metrics
+
+IMG_SIZE = (224, 224)
+
+# resize() first box-reduces by an integer factor while the image is more
+# than this many times larger than the target, then resamples precisely
+REDUCING_GAP = 3.0
+
+_SCALE = np.float32(1.0 / 255.0)
+
+# Formats Pillow can downscale while decoding (MPO: phone-camera JPEGs)
+DRAFT_FORMATS = ('JPEG', 'MPO')
+
+# pixels: (224, 224, 3) float32 view in [0, 1]
+# original_size: (width, height) before any downscaling
+# channel_means: per-channel RGB means on the 0-255 scale
+PreparedImage = namedtuple('PreparedImage', ['pixels', 'original_size', 'channel_means'])
+
+
+def draft_for_model(image):
+    """Enable downscale-on-decode for a not yet loaded JPEG
+
+    Only the DCT scale needed to stay at or above 224x224 is decoded, so a
+    4000x3000 photo is decoded at 500x375 instead of full size. Returns the
+    original (width, height), which validation still needs.
+    """
+    original_size = image.size
+    if image.format in DRAFT_FORMATS and getattr(image, 'tile', None):
+        # Only possible before the pixels have been loaded
+        image.draft('RGB', IMG_SIZE)
+    return original_size
+
+
+class DecodeBudgetExceeded(RuntimeError):
+    """No room in the decode budget within the timeout (server busy)"""
+
+
+class PixelBudget:
+    """Weighted semaphore over pixels being decoded at the same time
+
+    Each decode reserves the pixels it is about to materialize (after any
+    draft), so concurrent large uploads wait for each other instead of
+    stacking up in memory. A decode larger than the whole budget runs
+    alone rather than never.
+    """
+
+    def __init__(self, pixels, timeout_s=None):
+        self.capacity = max(1, int(pixels))
+        self.timeout_s = timeout_s
+        self.in_use = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def reserve(self, size):
+        """Hold (width * height) pixels of the budget for the block"""
+        pixels = min(size[0] * size[1], self.capacity)
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.in_use + pixels <= self.capacity, self.timeout_s):
+                raise DecodeBudgetExceeded("Too many large images are being processed; please try again")
+            self.in_use += pixels
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_use -= pixels
+                self._cond.notify_all()
+
+
+DECODE_BUDGET = PixelBudget(config.DECODE_BUDGET_MPX * 1e6, config.DECODE_TIMEOUT_S)
+metrics.DECODE_PIXELS.set_function(lambda: DECODE_BUDGET.in_use)
+
+
+def decode_size(image):
+    """Pixels ``image`` still has to decode: its (drafted) size, or nothing if loaded"""
+    return image.size if getattr(image, 'tile', None) else (0, 0)
+
+
+def to_model_pixels(image):
+    """Resize a PIL image to a 224x224 RGB uint8 array"""
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    if image.size != IMG_SIZE:
+        image = image.resize(IMG_SIZE, Image.BICUBIC, reducing_gap=REDUCING_GAP)
+    return np.asarray(image)
+
+
+def normalize_into(pixels, out):
+    """Scale uint8 RGB pixels to [0, 1] float32, writing into ``out``"""
+    return np.multiply(pixels, _SCALE, out=out)
+
+
+def _prepare_image(image, out):
+    original_size = draft_for_model(image)
+    with DECODE_BUDGET.reserve(decode_size(image)):
+        if getattr(image, 'tile', None):
+            # Load explicitly so decoding and resizing are timed apart
+            with metrics.stage('decode'):
+                image.load()
+        with metrics.stage('preprocess'):
+            pixels = to_model_pixels(image)
+            normalize_into(pixels, out)
+            channel_means = pixels.reshape(-1, 3).mean(axis=0)
+    return PreparedImage(out, original_size, channel_means)
+
+
+def prepare_into(source, out):
+    """Decode ``source`` once and write normalized pixels into ``out``
+
+    ``source`` is a path, file object or PIL image; ``out`` is a
+    preallocated (224, 224, 3) float32 array, typically one slot of a
+    BatchBuffer. Returns a PreparedImage whose ``pixels`` is ``out``.
+    """
+    if isinstance(source, Image.Image):
+        return _prepare_image(source, out)
+    with Image.open(source) as image:
+        return _prepare_image(image, out)
+
+
+def prepare(source):
+    """Decode and normalize one image into a freshly allocated array"""
+    return prepare_into(source, np.empty((IMG_SIZE[1], IMG_SIZE[0], 3), dtype=np.float32))
+
+
+# Validation bounds shared by the app, CLI tools and services
+MIN_SIDE = 50
+MAX_SIDE = 4000
+DARK_THRESHOLD = 50
+
+
+def check_size(width, height):
+    """Size bounds alone, usable on a header before decoding; ``(is_valid, message)``"""
+    if width < MIN_SIDE or height < MIN_SIDE:
+        return False, f"Image is too small. Please upload a larger image (minimum {MIN_SIDE}x{MIN_SIDE} pixels)."
+
+    if width > MAX_SIDE or height > MAX_SIDE:
+        return False, f"Image is too large. Please upload a smaller image (maximum {MAX_SIDE}x{MAX_SIDE} pixels)."
+
+    return True, "Image size accepted"
+
+
+def validate_prepared(prepared):
+    """Check size bounds and brightness of a PreparedImage
+
+    Returns ``(is_valid, message)``. The brightness check reuses the
+    channel means computed while preparing instead of re-decoding.
+    """
+    is_valid, message = check_size(*prepared.original_size)
+    if not is_valid:
+        return is_valid, message
+
+    # Very basic check: a leaf photo should not be almost black
+    if all(mean < DARK_THRESHOLD for mean in prepared.channel_means):
+        return False, "⚠️ Warning: Image appears very dark. Please upload a well-lit image."
+
+    return True, "Image validated successfully"
+
+
+class BatchBuffer:
+    """Preallocated (capacity, 224, 224, 3) float32 batch filled in place
+
+    Validation and inference share the slots: ``add`` returns the
+    PreparedImage (a view into the buffer) and ``view`` returns the filled
+    prefix to hand to the model without copying.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.array = np.empty((capacity, IMG_SIZE[1], IMG_SIZE[0], 3), dtype=np.float32)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def full(self):
+        return self.count == self.capacity
+
+    def slot(self, index):
+        return self.array[index]
+
+    def add(self, source):
+        """Prepare ``source`` into the next free slot"""
+        if self.full:
+            raise IndexError("BatchBuffer is full")
+        prepared = prepare_into(source, self.array[self.count])
+        self.count += 1
+        return prepared
+
+    def add_pixels(self, pixels):
+        """Normalize uint8 RGB pixels (e.g. a tile view) into the next free slot"""
+        if self.full:
+            raise IndexError("BatchBuffer is full")
+        normalize_into(pixels, self.array[self.count])
+        self.count += 1
+
+    def add_array(self, pixels):
+        """Copy already prepared pixels into the next free slot"""
+        if self.full:
+            raise IndexError("BatchBuffer is full")
+        self.array[self.count] = pixels
+        self.count += 1
+
+    def view(self):
+        return self.array[:self.count]
+
+    def reset(self):
+        self.count = 0
@@ -0,0 +1,88 @@
+# ============================================================================
+# LEAF GUARD AI - Health & Readiness Probes
+# A tiny HTTP server running next to the Streamlit app (same process) so a
+# load balancer only routes traffic to replicas whose model is warm:
+#
+#   GET /healthz  -> 200 while the process is up
+#   GET /readyz   -> 200 once the model is loaded and warmed, else 503
+#   GET /metrics  -> scan path metrics in the Prometheus text format
+# ============================================================================
+
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+import metrics
+from runtime import default_runtime
+
+logger = logging.getLogger(__name__)
+
+# path -> callable returning (status, content type, body bytes)
+ROUTES = {}
+
+
+def route(path):
+    """Register a GET handler on the probe server"""
+    def register(handler):
+        ROUTES[path] = handler
+        return handler
+    return register
+
+
+def _json(status, payload):
+    return status, 'application/json', json.dumps(payload).encode()
+
+
+@route('/healthz')
+def healthz():
+    return _json(200, {'status': 'ok'})
+
+
+@route('/readyz')
+def readyz():
+    status = default_runtime().status()
+    return _json(200 if status['ready'] else 503, status)
+
+
+@route('/metrics')
+def prometheus_metrics():
+    return 200, metrics.CONTENT_TYPE, metrics.render().encode()
+
+
+class ProbeHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        handler = ROUTES.get(self.path.split('?', 1)[0])
+        if handler is None:
+            status, content_type, body = _json(404, {'error': 'not found'})
+        else:
+            status, content_type, body = handler()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Probes hit every few seconds; keep them out of the app log
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_probe_server(port=None, host=None):
+    """Start the probe server once per process (no-op when the port is 0)"""
+    global _server
+    port = config.PROBE_PORT if port is None else port
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host or config.PROBE_HOST, port), ProbeHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name='leaf-guard-probes', daemon=True).start()
+            logger.info("Probe server listening on %s:%s", *_server.server_address[:2])
+        return _server
@@ -0,0 +1,201 @@
+# ============================================================================
+# LEAF GUARD AI - Model Runtime Lifecycle
+# Defers the TensorFlow import and model load until the first analysis
+# request (or a background thread, if enabled), warms the model up with
+# dummy batches and records how long each cold-start phase took.
+#
+#   python runtime.py          # print a cold-start report for this host
+# ============================================================================
+
+import logging
+import sys
+import threading
+import time
+
+import config
+
+logger = logging.getLogger(__name__)
+
+PROCESS_START = time.perf_counter()
+
+
+class ModelRuntime:
+    """Lazily load a model exactly once, optionally in the background
+
+    ``loader`` is a zero-argument callable returning the model/backend.
+    After loading, one dummy batch of each size in ``warmup_batch_sizes``
+    is run so graph tracing and kernel selection do not land on the first
+    real request; the runtime only reports ``ready`` after that.
+    Concurrent callers of ``get()`` block on the same load; a failed load
+    is remembered and re-raised until ``retry_after_s`` has passed, so it is
+    not retried on every rerun but a transient failure does not stick.
+    ``import_tensorflow`` times the TensorFlow import as its own phase; it
+    is off for loaders that never touch TensorFlow in this process (TFLite
+    runtimes, a replica pool whose processes load the model).
+    """
+
+    def __init__(self, loader, warmup_batch_sizes=(), retry_after_s=None, import_tensorflow=True):
+        self._loader = loader
+        self.import_tensorflow = import_tensorflow
+        self.warmup_batch_sizes = sorted(set(warmup_batch_sizes))
+        self.retry_after_s = config.MODEL_RETRY_S if retry_after_s is None else retry_after_s
+        self._lock = threading.Lock()
+        self._model = None
+        self._error = None
+        self._error_at = None
+        self.failed_attempts = 0
+        self._thread = None
+        self.timings = {}
+
+    @property
+    def ready(self):
+        """True once the model is loaded and warmed up"""
+        return self._model is not None
+
+    @property
+    def error(self):
+        return self._error
+
+    def retry_in(self):
+        """Seconds until a failed load may be retried (None if it has not failed)"""
+        if self._error is None:
+            return None
+        return max(0.0, self._error_at + self.retry_after_s - time.monotonic())
+
+    def status(self):
+        """Readiness summary for probes"""
+        retry_in = self.retry_in()
+        return {
+            'ready': self.ready,
+            'loading': self._model is None and self._error is None and self._lock.locked(),
+            'error': str(self._error) if self._error is not None else None,
+            'failed_attempts': self.failed_attempts,
+            'retry_in_s': round(retry_in, 1) if retry_in is not None else None,
+            'timings': self.startup_report(),
+        }
+
+    def start_background(self):
+        """Begin loading in a daemon thread so the first request finds it ready"""
+        if (self._thread is None or not self._thread.is_alive()) and not self.ready:
+            self._thread = threading.Thread(target=self._background_load, name='leaf-guard-loader', daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def _background_load(self):
+        # Keep retrying so readiness recovers without waiting for a request
+        while not self.ready:
+            try:
+                self.get()
+            except Exception:
+                logger.exception("Background model load failed; retrying in %.0fs", self.retry_after_s)
+                time.sleep(self.retry_in() or self.retry_after_s)
+
+    def get(self):
+        """Return the loaded model, importing TensorFlow and loading on first use"""
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            if self._model is None:
+                if self._error is not None:
+                    if self.retry_in() > 0:
+                        raise self._error
+                    logger.info("Retrying model load (%d failed attempts)", self.failed_attempts)
+                    self._error = None
+                try:
+                    self._load()
+                except Exception as e:
+                    self._error = e
+                    self._error_at = time.monotonic()
+                    self.failed_attempts += 1
+                    raise
+            return self._model
+
+    def _load(self):
+        start = time.perf_counter()
+        if self.import_tensorflow:
+            already_imported = 'tensorflow' in sys.modules
+            import tensorflow  # noqa: F401  (timed separately from the model load)
+            imported = time.perf_counter()
+            self.timings['tensorflow_import_s'] = 0.0 if already_imported else imported - start
+        else:
+            imported = start
+        model = self._loader()
+        loaded = time.perf_counter()
+        self._warm_up(model)
+        warmed = time.perf_counter()
+
+        self.timings['model_load_s'] = loaded - imported
+        self.timings['warmup_s'] = warmed - loaded
+        self.timings['ready_since_process_start_s'] = warmed - PROCESS_START
+        # Publish only after warm-up so the fast path in get() never sees a cold model
+        self._model = model
+        logger.info("Model ready: %s", self.format_report())
+
+    def _warm_up(self, model):
+        import numpy as np
+
+        import inference
+
+        for size in self.warmup_batch_sizes:
+            batch = np.zeros((size, inference.IMG_SIZE[1], inference.IMG_SIZE[0], 3), dtype=np.float32)
+            inference.predict_array(model, batch)
+
+    def record_inference(self, seconds):
+        """Record the latency of the first inference (later calls are ignored)"""
+        self.timings.setdefault('first_inference_s', seconds)
+
+    def startup_report(self):
+        """Cold-start phases in seconds (only phases that have happened)"""
+        return dict(self.timings)
+
+    def format_report(self):
+        return ', '.join(f"{name}={seconds:.3f}" for name, seconds in self.startup_report().items())
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_runtime():
+    """Process-wide runtime for the configured backend
+
+    Shared by the Streamlit app, the probe server and the launcher, which
+    all run in the same process.
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            pooled = config.MODEL_REPLICAS > 1
+            if pooled:
+                from model_pool import load_pool as loader
+            else:
+                from backends import load_backend as loader
+            _default = ModelRuntime(loader, config.WARMUP_BATCH_SIZES,
+                                    import_tensorflow=not pooled and config.BACKEND != 'tflite')
+            if config.BACKGROUND_LOAD:
+                _default.start_background()
+        return _default
+
+
+def main():
+    """Measure a cold start of the configured backend in this process"""
+    import numpy as np
+
+    import backends
+    import inference
+
+    runtime = ModelRuntime(backends.load_backend, config.WARMUP_BATCH_SIZES,
+                           import_tensorflow=config.BACKEND != 'tflite')
+    model = runtime.get()
+    batch = np.zeros((1, inference.IMG_SIZE[1], inference.IMG_SIZE[0], 3), dtype=np.float32)
+    start = time.perf_counter()
+    inference.predict_array(model, batch)
+    runtime.record_inference(time.perf_counter() - start)
+
+    print(f"{'phase':<32} {'seconds':>8}")
+    for name, seconds in runtime.startup_report().items():
+        print(f"{name:<32} {seconds:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# ============================================================================
+# LEAF GUARD AI - Micro-Batching Inference Scheduler
+# Collects single-image requests from concurrent sessions for a few
+# milliseconds and runs them through the shared model as one batch.
+# ============================================================================
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+
+import numpy as np
+
+import config
+import metrics
+
+
+class MicroBatchScheduler:
+    """Coalesce concurrent prediction requests into batched forward passes
+
+    ``predict_fn`` receives a stacked (N, ...) float32 array and must return
+    one row of outputs per input. Each caller gets a Future resolving to its
+    own row. A batch is dispatched as soon as ``max_batch_size`` requests are
+    waiting or the oldest request has waited ``max_wait_ms``, so an idle
+    server adds at most ``max_wait_ms`` of latency.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=None, max_wait_ms=None, name='leaf-guard-batcher',
+                 concurrency=1):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size or config.MAX_BATCH_SIZE
+        self.max_wait = (config.MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000.0
+        # Batches allowed in flight at once (e.g. one per model replica);
+        # while all are busy, waiting requests accumulate into the next batch
+        self.concurrency = max(1, concurrency)
+        self._slots = threading.Semaphore(self.concurrency)
+        self._executor = ThreadPoolExecutor(self.concurrency, thread_name_prefix=name) \
+            if self.concurrency > 1 else None
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self.name = name
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        metrics.track_scheduler(self, name)
+
+    @property
+    def queue_depth(self):
+        """Number of requests waiting for a batch slot"""
+        return self._queue.qsize()
+
+    def submit(self, array):
+        """Queue one preprocessed input (without batch dimension)"""
+        if self._stopped.is_set():
+            raise RuntimeError("Scheduler has been shut down")
+        future = Future()
+        self._queue.put((array, future))
+        return future
+
+    def predict(self, array, timeout=None):
+        """Submit one input and block until its output row is ready
+
+        On timeout the request is cancelled, so a batch that has not picked
+        it up yet skips it instead of running a forward pass nobody reads.
+        """
+        future = self.submit(array)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def shutdown(self, wait=True):
+        """Stop accepting work; pending requests are still served"""
+        self._stopped.set()
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+    def _collect(self):
+        """Block for the first request, then gather more until full or timed out"""
+        first = self._queue.get()
+        if first is None:
+            return None
+        pending = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(pending) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Shutdown sentinel: serve what we have, then stop
+                self._queue.put(None)
+                break
+            pending.append(item)
+        return pending
+
+    def _run(self):
+        while True:
+            self._slots.acquire()
+            pending = self._collect()
+            if pending is None:
+                self._slots.release()
+                return
+            # Skip requests whose caller has already given up
+            pending = [(a, f) for a, f in pending if f.set_running_or_notify_cancel()]
+            if not pending:
+                self._slots.release()
+            elif self._executor is None:
+                self._dispatch(pending)
+            else:
+                self._executor.submit(self._dispatch, pending)
+
+    def _dispatch(self, pending):
+        """Run one batch and resolve its futures, then free the slot"""
+        try:
+            metrics.BATCH_SIZE.observe(len(pending), scheduler=self.name)
+            with metrics.stage('model'):
+                outputs = self.predict_fn(np.stack([array for array, _ in pending]))
+            if len(outputs) != len(pending):
+                raise RuntimeError(f"Model returned {len(outputs)} rows for a batch of {len(pending)}")
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+        for (_, future), row in zip(pending, outputs):
+            future.set_result(row)
@@ -0,0 +1,32 @@
+# ============================================================================
+# LEAF GUARD AI - Production Launcher
+# Starts model loading + warm-up and the readiness probe server *before*
+# Streamlit accepts sessions, then hands over to `streamlit run app.py` in
+# the same process. (A plain `streamlit run` only executes app.py once the
+# first browser session connects, so a fresh replica would never warm up.)
+#
+#   LEAF_GUARD_PROBE_PORT=8502 python serve.py --server.port 8501
+# ============================================================================
+
+import logging
+import os
+import sys
+
+import probes
+from runtime import default_runtime
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    default_runtime().start_background()
+    probes.start_probe_server()
+
+    from streamlit.web import cli as stcli
+    sys.argv = ['streamlit', 'run', APP_PATH] + sys.argv[1:]
+    return stcli.main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
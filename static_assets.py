@@ -0,0 +1,80 @@
+# ============================================================================
+# LEAF GUARD AI - Static Assets
+# The app stylesheet is minified and content-hashed once per process and
+# written to ./static, which Streamlit serves at app/static/ when
+# server.enableStaticServing is on. Each rerun then only sends a short
+# <link> tag; the browser fetches the file once and caches it, and a
+# stylesheet change produces a new file name so stale copies are never used.
+# ============================================================================
+
+import glob
+import hashlib
+import os
+import re
+import tempfile
+from collections import namedtuple
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+STATIC_URL = 'app/static'
+
+# css: minified text, used when the file cannot be served
+# filename: '<name>.<hash>.min.css' inside STATIC_DIR, or None if it could not be written
+Stylesheet = namedtuple('Stylesheet', ['name', 'css', 'filename'])
+
+_COMMENTS = re.compile(r'/\*.*?\*/', re.S)
+_WHITESPACE = re.compile(r'\s+')
+# Spaces around these are never significant. Spaces before ':' are kept
+# because 'a :hover' and 'a:hover' are different selectors.
+_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+_AFTER_COLON = re.compile(r':\s+')
+
+
+def minify_css(css):
+    """Strip comments and insignificant whitespace from a stylesheet"""
+    css = _COMMENTS.sub('', css)
+    css = _WHITESPACE.sub(' ', css)
+    css = _PUNCTUATION.sub(r'\1', css)
+    css = _AFTER_COLON.sub(':', css)
+    return css.replace(';}', '}').strip()
+
+
+def content_hash(data, length=12):
+    return hashlib.sha256(data).hexdigest()[:length]
+
+
+def _write_once(path, data):
+    """Write ``data`` to ``path`` unless it is already there"""
+    if os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def build_stylesheet(name, css, out_dir=STATIC_DIR):
+    """Minify ``css`` and write it under a content-hashed file name
+
+    Older builds of the same stylesheet are removed. If the directory is
+    not writable the stylesheet is still returned (with ``filename=None``)
+    so callers can inline it instead.
+    """
+    css = minify_css(css)
+    data = css.encode('utf-8')
+    filename = f"{name}.{content_hash(data)}.min.css"
+    try:
+        _write_once(os.path.join(out_dir, filename), data)
+        for stale in glob.glob(os.path.join(out_dir, f"{name}.*.min.css")):
+            if os.path.basename(stale) != filename:
+                os.remove(stale)
+    except OSError:
+        filename = None
+    return Stylesheet(name, css, filename)
+
+
+def stylesheet_tag(sheet, static_serving=True):
+    """HTML that applies ``sheet``: a <link> if it can be served, else inline"""
+    if static_serving and sheet.filename:
+        return f'<link rel="stylesheet" href="{STATIC_URL}/{sheet.filename}">'
+    return f"<style>{sheet.css}</style>"
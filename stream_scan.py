@@ -0,0 +1,303 @@
+# ============================================================================
+# LEAF GUARD AI - Video / Camera Stream Scanning
+# Continuous scanning of a recorded video, a webcam or a phone camera
+# stream (RTSP / MJPEG URL). Frames are sampled at a fixed rate, frames
+# that look like the previous kept one (perceptual hash) are dropped, and
+# the rest are preprocessed on a reader thread and batched into the model.
+# The queue between the two is bounded: on a live source the oldest frame
+# is shed when inference falls behind, so results never lag the camera.
+#
+#   python stream_scan.py field_walk.mp4 -o field_walk.jsonl
+#   python stream_scan.py rtsp://phone.local:8554/live --fps 2
+#   python stream_scan.py 0                       # first local camera
+#
+# Decoding video needs OpenCV (pip install opencv-python-headless).
+# ============================================================================
+
+import argparse
+import importlib.util
+import json
+import queue
+import sys
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+from PIL import Image
+
+import config
+import inference
+import preprocessing
+from perceptual_hash import dhash, hamming
+
+# index: position among the frames read from the source
+# timestamp: seconds from the start of the video (or of the live capture)
+# results: top-k predictions
+# preview: small RGB uint8 copy of the frame (None if previews are off)
+FrameResult = namedtuple('FrameResult', ['index', 'timestamp', 'results', 'preview'])
+
+
+class StreamStats:
+    """Frame counters for one stream"""
+
+    def __init__(self):
+        self.read = 0
+        self.sampled = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.shed = 0
+        self.scanned = 0
+        self.batches = 0
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+# ============================================================================
+# SOURCES
+# ============================================================================
+
+def is_live(source):
+    """Camera indices and network URLs are live; anything else is a file"""
+    source = str(source)
+    return source.isdigit() or '://' in source
+
+
+class FrameSampler:
+    """Keeps one frame per 1/fps seconds of source time (0 = every frame)"""
+
+    def __init__(self, fps):
+        self.interval = 1.0 / fps if fps else 0.0
+        self._next = None
+
+    def due(self, timestamp):
+        if self._next is not None and timestamp < self._next:
+            return False
+        # Step on the schedule so frame timing jitter does not drift the
+        # rate, restarting it after a gap (stalled camera, seek)
+        step = timestamp if self._next is None else self._next
+        step += self.interval
+        self._next = step if step > timestamp else timestamp + self.interval
+        return True
+
+
+def sample_frames(frames, fps, stats=None):
+    """Sample any iterable of (timestamp, RGB frame) at ``fps``"""
+    sampler = FrameSampler(fps)
+    for index, (timestamp, frame) in enumerate(frames):
+        if stats is not None:
+            stats.read += 1
+        if sampler.due(timestamp):
+            yield index, timestamp, frame
+
+
+def video_available():
+    """Whether OpenCV, needed to decode video, is installed"""
+    return importlib.util.find_spec('cv2') is not None
+
+
+def video_frames(source, fps=None, stats=None):
+    """Yield (index, timestamp, RGB frame) sampled at ``fps`` through OpenCV
+
+    ``source`` is a video file, a camera index or a stream URL. Skipped
+    frames are only grabbed, never converted, which keeps high frame-rate
+    sources cheap.
+    """
+    try:
+        import cv2
+    except ImportError:
+        raise RuntimeError("Video scanning needs OpenCV: pip install opencv-python-headless")
+
+    live = is_live(source)
+    capture = cv2.VideoCapture(int(source) if str(source).isdigit() else source)
+    if not capture.isOpened():
+        raise RuntimeError(f"Cannot open video source {source!r}")
+    sampler = FrameSampler(config.STREAM_SAMPLE_FPS if fps is None else fps)
+    start = time.monotonic()
+    index = -1
+    try:
+        while capture.grab():
+            index += 1
+            if stats is not None:
+                stats.read += 1
+            timestamp = time.monotonic() - start if live else capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            if not sampler.due(timestamp):
+                continue
+            ok, frame = capture.retrieve()
+            if ok:
+                yield index, timestamp, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    finally:
+        capture.release()
+
+
+# ============================================================================
+# PIPELINE
+# ============================================================================
+
+def make_preview(frame, side):
+    """Small RGB copy of a frame for display"""
+    image = Image.fromarray(frame)
+    scale = min(side / max(image.size), 1.0)
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return np.asarray(image.resize(size, Image.BILINEAR, reducing_gap=preprocessing.REDUCING_GAP))
+
+
+class StreamScanner:
+    """Dedup, preprocess and batch sampled frames into ``predict_fn``
+
+    A reader thread hashes each sampled frame, drops it if it is within
+    ``dedup_distance`` bits of the last kept frame, and preprocesses the
+    rest into a bounded queue. The calling thread drains the queue in
+    batches of up to ``batch_size`` (waiting at most ``max_wait_ms`` for
+    company). With ``live=True`` a full queue sheds its oldest frame;
+    otherwise the reader blocks, so a file is scanned completely.
+    """
+
+    def __init__(self, predict_fn, class_names, dedup_distance=None, queue_size=None,
+                 batch_size=None, max_wait_ms=None, top_k=inference.TOP_K, preview_side=0):
+        self.predict_fn = predict_fn
+        self.class_names = class_names
+        self.dedup_distance = config.STREAM_DEDUP_DISTANCE if dedup_distance is None else dedup_distance
+        self.queue_size = queue_size or config.STREAM_QUEUE_SIZE
+        self.batch_size = batch_size or config.STREAM_BATCH_SIZE
+        self.max_wait = (config.MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000.0
+        self.top_k = top_k
+        self.preview_side = preview_side
+        self.stats = StreamStats()
+
+    def _read(self, frames, out, live, stop):
+        """Reader thread: hash, dedup and preprocess frames into ``out``"""
+        last_hash = None
+        try:
+            for index, timestamp, frame in frames:
+                if stop.is_set():
+                    return
+                self.stats.sampled += 1
+                frame_hash = dhash(frame)
+                if last_hash is not None and hamming(frame_hash, last_hash) <= self.dedup_distance:
+                    self.stats.duplicates += 1
+                    continue
+                last_hash = frame_hash
+
+                prepared = preprocessing.prepare(Image.fromarray(frame))
+                if not preprocessing.validate_prepared(prepared)[0]:
+                    # Lens covered, pointing at the ground in the dark, ...
+                    self.stats.invalid += 1
+                    continue
+                preview = make_preview(frame, self.preview_side) if self.preview_side else None
+                self._put(out, (index, timestamp, prepared.pixels, preview), live, stop)
+        except Exception as e:
+            self._error = e
+        finally:
+            self._put(out, None, False, stop)
+
+    def _put(self, out, item, shed, stop):
+        if shed:
+            while True:
+                try:
+                    out.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        out.get_nowait()
+                        self.stats.shed += 1
+                    except queue.Empty:
+                        pass
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _next_batch(self, pending):
+        """Block for one frame, then take more until full or timed out; None at the end"""
+        first = pending.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = pending.get(timeout=remaining) if remaining > 0 else pending.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                pending.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def scan(self, frames, live=False):
+        """Yield a FrameResult per kept frame of ``frames`` (index, timestamp, RGB)"""
+        pending = queue.Queue(self.queue_size)
+        stop = threading.Event()
+        self._error = None
+        reader = threading.Thread(target=self._read, args=(frames, pending, live, stop),
+                                  name='leaf-guard-stream-reader', daemon=True)
+        reader.start()
+        buffer = preprocessing.BatchBuffer(self.batch_size)
+        try:
+            while True:
+                batch = self._next_batch(pending)
+                if batch is None:
+                    break
+                buffer.reset()
+                for _, _, pixels, _ in batch:
+                    buffer.add_array(pixels)
+                probabilities = self.predict_fn(buffer.view())
+                self.stats.batches += 1
+                self.stats.scanned += len(batch)
+                for (index, timestamp, _, preview), row in zip(batch, probabilities):
+                    results = inference.top_k_predictions(row, self.class_names, self.top_k)
+                    yield FrameResult(index, timestamp, results, preview)
+        finally:
+            stop.set()
+            reader.join(timeout=1)
+        if self._error is not None:
+            raise self._error
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan a video file, camera or stream URL")
+    parser.add_argument('source', help="Video file, camera index (0) or RTSP/HTTP stream URL")
+    parser.add_argument('-o', '--output', default='-', help="JSONL output (default: stdout)")
+    parser.add_argument('--fps', type=float, default=None, help="Frames sampled per second of video")
+    parser.add_argument('--dedup-distance', type=int, default=None,
+                        help="Skip frames within this many dHash bits of the last kept one")
+    parser.add_argument('--batch-size', type=int, default=None)
+    parser.add_argument('--backend', default=None, help="keras, savedmodel or tflite (default: config)")
+    parser.add_argument('--model', default=None, help="Model artifact (default: per backend)")
+    parser.add_argument('--class-names', default=inference.CLASS_NAMES_PATH)
+    args = parser.parse_args(argv)
+
+    import backends
+
+    model = backends.load_backend(args.backend, args.model)
+    scanner = StreamScanner(model.predict_array, inference.load_class_names(args.class_names),
+                            args.dedup_distance, batch_size=args.batch_size)
+    frames = video_frames(args.source, args.fps, scanner.stats)
+    stream = sys.stdout if args.output == '-' else open(args.output, 'w')
+    start = time.perf_counter()
+    try:
+        for result in scanner.scan(frames, live=is_live(args.source)):
+            stream.write(json.dumps({'frame': result.index, 'timestamp': round(result.timestamp, 3),
+                                     'predictions': result.results}) + '\n')
+            stream.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+    elapsed = time.perf_counter() - start
+    stats = scanner.stats
+    print(f"{stats.read} frames read, {stats.sampled} sampled, {stats.duplicates} near-duplicates, "
+          f"{stats.invalid} invalid, {stats.shed} shed, {stats.scanned} scanned in {stats.batches} "
+          f"batches ({stats.sampled / elapsed:.1f} sampled frames/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
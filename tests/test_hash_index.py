@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+import hash_index
+from hash_index import MultiIndexHash, popcount
+
+
+def brute_force(hashes, value, radius):
+    """Reference: every (entry, distance) within radius, closest first, ties by entry"""
+    distances = [bin(int(h) ^ value).count('1') for h in hashes]
+    return sorted(((i, d) for i, d in enumerate(distances) if d <= radius), key=lambda m: (m[1], m[0]))
+
+
+def flip_bits(value, bits):
+    for bit in bits:
+        value ^= 1 << int(bit)
+    return value
+
+
+@pytest.fixture
+def corpus():
+    """Random hashes plus near-duplicates at every distance up to 12 bits"""
+    rng = np.random.default_rng(7)
+    base = [int(h) for h in rng.integers(0, 2**63, 2000, dtype=np.uint64)]
+    near = []
+    for distance in range(13):
+        for anchor in base[:20]:
+            near.append(flip_bits(anchor, rng.choice(64, distance, replace=False)))
+    queries = base[:20] + [int(h) for h in rng.integers(0, 2**63, 20, dtype=np.uint64)]
+    return base + near, queries
+
+
+@pytest.mark.parametrize('radius', [0, 1, 3, 4, 5, 7, 8, 11, 12])
+def test_search_matches_brute_force(corpus, radius):
+    hashes, queries = corpus
+    index = MultiIndexHash(hashes)
+
+    for query in queries:
+        assert index.search(query, radius) == brute_force(hashes, query, radius)
+
+
+def test_unmerged_tail_is_searched(corpus, monkeypatch):
+    monkeypatch.setattr(hash_index, 'MIN_MERGE', 10**6)
+    hashes, queries = corpus
+    index = MultiIndexHash(hashes[:1000])
+    for value in hashes[1000:]:
+        index.add(value)
+    assert index._indexed == 1000
+
+    for query in queries:
+        assert index.search(query, 6) == brute_force(hashes, query, 6)
+
+
+def test_add_merges_the_tail_into_the_tables(monkeypatch):
+    monkeypatch.setattr(hash_index, 'MIN_MERGE', 8)
+    rng = np.random.default_rng(1)
+    hashes = [int(h) for h in rng.integers(0, 2**63, 50, dtype=np.uint64)]
+    index = MultiIndexHash()
+    for value in hashes:
+        index.add(value)
+
+    assert index._indexed >= 48
+    for query in hashes[::5]:
+        assert index.search(query, 5) == brute_force(hashes, query, 5)
+
+
+def test_radius_boundary_is_inclusive():
+    value = 0x0123_4567_89AB_CDEF
+    index = MultiIndexHash([flip_bits(value, range(8)), flip_bits(value, range(9))])
+
+    assert index.search(value, 8) == [(0, 8)]
+    assert index.nearest(value, 9) == (0, 8)
+    assert index.nearest(value, 7) is None
+
+
+def test_full_64_bit_values():
+    top = (1 << 64) - 1
+    index = MultiIndexHash([top, 0])
+
+    assert index.search(top, 0) == [(0, 0)]
+    assert index.nearest(flip_bits(top, [63]), 1) == (0, 1)
+
+
+def test_empty_index_finds_nothing():
+    assert MultiIndexHash().search(123, 10) == []
+    assert MultiIndexHash().nearest(123, 10) is None
+
+
+def test_popcount_matches_python():
+    values = np.array([0, 1, 0xFF, (1 << 64) - 1, 0x8000_0000_0000_0001], dtype=np.uint64)
+    assert popcount(values).tolist() == [bin(int(v)).count('1') for v in values]
+
+
+def test_popcount_without_bitwise_count(monkeypatch):
+    monkeypatch.delattr(np, 'bitwise_count', raising=False)
+    values = np.array([0, 0xF0F0, (1 << 64) - 1], dtype=np.uint64)
+    assert popcount(values).tolist() == [0, 8, 64]
@@ -0,0 +1,130 @@
+import os
+
+import pytest
+
+from history_store import CONFIDENCE_BINS, IMAGES, THUMBS, HistoryStore, confidence_bin, time_buckets
+
+# Week-boundary days (Sundays and Mondays, across a year end and a leap day)
+# and confidences on and around the histogram bin edges
+SCANS = [
+    ('a', '2025-12-28 23:59:59', 'Tomato___Late_blight', 0.0),
+    ('a', '2025-12-29 00:00:00', 'Tomato___Late_blight', 9.999),
+    ('a', '2025-12-29 00:30:00', 'Potato___Early_blight', 10.0),
+    ('a', '2026-01-04 12:00:00', 'Tomato___healthy', 55.5),
+    ('a', '2026-01-05 08:15:00', 'Tomato___Late_blight', 99.99),
+    ('a', '2024-02-29 17:45:00', 'Potato___Early_blight', 100.0),
+    ('b', '2026-01-04 12:00:00', 'Tomato___Late_blight', 70.0),
+    ('b', '2026-10-18 09:00:00', 'Tomato___Late_blight', 30.0),
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    yield store
+    store.close()
+
+
+def thumb(n):
+    return (f"thumb-{n}".encode(), 'webp')
+
+
+def add_all(store):
+    for n, (history_id, created_at, disease, confidence) in enumerate(SCANS):
+        store.add(history_id, disease, confidence, thumb(n), image=(f"image-{n}".encode(), 'jpg'),
+                  timestamp=created_at)
+
+
+def aggregates(store):
+    rollups = store._conn.execute(
+        "SELECT history_id, granularity, bucket, disease, scans, ROUND(confidence_sum, 6) "
+        "FROM scan_rollups ORDER BY 1, 2, 3, 4"
+    ).fetchall()
+    histogram = store._conn.execute("SELECT * FROM confidence_histogram ORDER BY 1, 2, 3").fetchall()
+    return [tuple(row) for row in rollups], [tuple(row) for row in histogram]
+
+
+def test_incremental_rollups_match_a_rebuild(store):
+    add_all(store)
+    incremental = aggregates(store)
+
+    store._rebuild_aggregates()
+
+    assert aggregates(store) == incremental
+
+
+def test_week_buckets_start_on_monday():
+    assert dict(time_buckets('2025-12-28 23:59:59'))['week'] == '2025-12-22'
+    assert dict(time_buckets('2025-12-29 00:00:00'))['week'] == '2025-12-29'
+    assert dict(time_buckets('2026-01-04 12:00:00'))['week'] == '2025-12-29'
+    assert dict(time_buckets('2024-02-29 17:45:00'))['week'] == '2024-02-26'
+
+
+def test_confidence_bins_are_clamped():
+    assert [confidence_bin(c) for c in (0.0, 9.999, 10.0, 55.5, 99.99, 100.0)] == [0, 0, 1, 5, 9, 9]
+
+
+def test_analytics_read_from_rollups(store):
+    add_all(store)
+
+    assert store.summary('a')['count'] == 6
+    assert store.summary('a')['avg_confidence'] == pytest.approx((0 + 9.999 + 10 + 55.5 + 99.99 + 100) / 6)
+    assert store.by_disease('b') == {'Tomato___Late_blight': (2, 50.0)}
+    assert store.timeline('a', 'week', buckets=2) == {
+        '2025-12-29': {'Tomato___Late_blight': 1, 'Potato___Early_blight': 1, 'Tomato___healthy': 1},
+        '2026-01-05': {'Tomato___Late_blight': 1},
+    }
+    assert list(store.timeline('a', 'week', buckets=10)) == ['2024-02-26', '2025-12-22', '2025-12-29', '2026-01-05']
+    histogram = store.confidence_histogram('a')
+    assert len(histogram) == CONFIDENCE_BINS
+    assert histogram == [2, 1, 0, 0, 0, 1, 0, 0, 0, 2]
+
+
+def test_keyset_pages_cover_every_scan_once(store):
+    for n in range(7):
+        store.add('a', 'Tomato___healthy', 90.0, thumb(n))
+    store.add('b', 'Tomato___healthy', 90.0, thumb(99))
+
+    pages, before_id = [], None
+    while True:
+        page = store.page('a', 3, before_id)
+        if not page:
+            break
+        pages.append([record['id'] for record in page])
+        before_id = page[-1]['id']
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    ids = [i for page in pages for i in page]
+    assert ids == sorted(ids, reverse=True)
+    assert [record['id'] for record in store.iter_records('a', chunk_size=2)] == ids
+
+
+def test_delete_history_removes_rows_rollups_and_unshared_blobs(store):
+    shared = store.add('a', 'Tomato___healthy', 80.0, thumb('shared'), image=(b'same upload', 'jpg'))
+    only_a = store.add('a', 'Tomato___Late_blight', 60.0, thumb('a'), image=(b'a upload', 'jpg'))
+    store.add('b', 'Tomato___healthy', 80.0, thumb('shared'), image=(b'same upload', 'jpg'))
+
+    assert store.delete_history('a') == 2
+
+    assert store.page('a') == []
+    assert store.summary('a')['count'] == 0
+    assert store.confidence_histogram('a') == [0] * CONFIDENCE_BINS
+    assert not os.path.exists(store.blob_path(only_a['thumb'], THUMBS))
+    assert not os.path.exists(store.blob_path(only_a['image'], IMAGES))
+    # Still referenced by history 'b'
+    assert store.read_blob(shared['thumb']) == b'thumb-shared'
+    assert store.read_blob(shared['image'], kind=IMAGES) == b'same upload'
+    assert store.summary('b')['count'] == 1
+
+
+def test_rollups_survive_reopening(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    add_all(store)
+    before = aggregates(store)
+    store.close()
+
+    reopened = HistoryStore(str(tmp_path))
+    try:
+        assert aggregates(reopened) == before
+    finally:
+        reopened.close()
@@ -0,0 +1,147 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import model_pool
+from model_pool import ModelPool, ReplicaDied
+
+
+class FakeReplica:
+    """Stands in for a replica process; ``gate`` pauses wait_ready()"""
+
+    instances = []
+    gate = None
+    fail_ready = False
+
+    def __init__(self, ctx, index, cores, threads, kind, path, warmup_batch_sizes):
+        self.index = index
+        self.cores = cores
+        self.threads = threads
+        self.process = SimpleNamespace(exitcode=-9)
+        self.dead = False
+        self.closed = False
+        FakeReplica.instances.append(self)
+
+    def wait_ready(self):
+        if FakeReplica.gate is not None:
+            FakeReplica.gate.wait(5)
+        if FakeReplica.fail_ready:
+            raise RuntimeError(f"Replica {self.index} failed to load")
+        return ('fake', 'model.bin', 'v1')
+
+    def predict_array(self, batch):
+        if self.dead:
+            raise ReplicaDied(f"Replica {self.index} exited")
+        return np.full((len(batch), 1), self.index, dtype=np.float32)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    monkeypatch.setattr(model_pool, 'Replica', FakeReplica)
+    monkeypatch.setattr(FakeReplica, 'instances', [])
+    monkeypatch.setattr(FakeReplica, 'gate', None)
+    monkeypatch.setattr(FakeReplica, 'fail_ready', False)
+    pools = []
+
+    def make(replicas):
+        pool = ModelPool(replicas, cores=list(range(replicas)), warmup_batch_sizes=[])
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+BATCH = np.zeros((1, 4), dtype=np.float32)
+
+
+def kill_all(pool):
+    """Mark every replica dead and hand each one out once so it is noticed"""
+    for replica in list(pool.replicas):
+        replica.dead = True
+    for _ in range(len(pool.replicas)):
+        with pytest.raises(ReplicaDied):
+            pool.predict_array(BATCH)
+
+
+def start_waiter(pool, errors):
+    def waiter():
+        try:
+            pool.predict_array(BATCH)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    return thread
+
+
+def test_dead_replicas_are_replaced(make_pool):
+    pool = make_pool(2)
+    dead = list(pool.replicas)
+    kill_all(pool)
+
+    wait_until(lambda: not set(pool.replicas) & set(dead))
+    assert all(replica.closed for replica in dead)
+    assert pool.concurrency == 2
+    assert pool.predict_array(BATCH).shape == (1, 1)
+
+
+def test_pool_shrinks_and_fails_fast_once_every_respawn_failed(make_pool):
+    pool = make_pool(2)
+    FakeReplica.fail_ready = True
+    kill_all(pool)
+
+    wait_until(lambda: not pool.replicas)
+    assert pool.concurrency == 0
+    # The dead replicas and the half-started replacements are all closed
+    assert len(FakeReplica.instances) == 4
+    assert all(replica.closed for replica in FakeReplica.instances)
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="no live replicas"):
+            pool.predict_array(BATCH)
+
+
+def test_waiting_caller_wakes_when_the_last_replica_is_lost(make_pool):
+    pool = make_pool(1)
+    FakeReplica.fail_ready = True
+    FakeReplica.gate = threading.Event()
+    kill_all(pool)
+
+    errors = []
+    thread = start_waiter(pool, errors)
+    time.sleep(0.05)
+    assert thread.is_alive()
+
+    FakeReplica.gate.set()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert errors == ["Model pool has no live replicas"]
+
+
+def test_close_wakes_waiting_callers(make_pool):
+    pool = make_pool(1)
+    pool._idle.get()  # the only replica is busy
+
+    errors = []
+    thread = start_waiter(pool, errors)
+    pool.close()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert errors == ["Model pool has no live replicas"]
@@ -0,0 +1,90 @@
+import numpy as np
+
+from prediction_cache import PredictionCache, cache_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2, ttl_seconds=60)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = PredictionCache(max_entries=4, ttl_seconds=10, clock=clock)
+    cache.put('a', 1)
+
+    clock.now = 9.9
+    assert cache.get('a') == 1
+    clock.now = 10.0
+    assert cache.get('a') is None
+    assert len(cache) == 0
+    assert cache.stats()['expirations'] == 1
+
+
+def test_expired_entries_make_room_before_live_ones_are_evicted():
+    clock = FakeClock()
+    cache = PredictionCache(max_entries=2, ttl_seconds=10, clock=clock)
+    cache.put('old', 1)
+    clock.now = 5
+    cache.put('live', 2)
+    clock.now = 12
+
+    cache.put('new', 3)
+
+    assert cache.get('live') == 2
+    assert cache.get('new') == 3
+    stats = cache.stats()
+    assert (stats['evictions'], stats['expirations']) == (0, 1)
+
+
+def test_put_refreshes_an_existing_key():
+    clock = FakeClock()
+    cache = PredictionCache(max_entries=2, ttl_seconds=10, clock=clock)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    clock.now = 8
+    cache.put('a', 10)
+
+    cache.put('c', 3)
+    clock.now = 15
+
+    assert cache.get('a') == 10
+    assert cache.get('b') is None
+
+
+def test_hit_rate_counts_lookups():
+    cache = PredictionCache()
+    cache.put('a', 1)
+    cache.get('a')
+    cache.get('missing')
+
+    assert cache.stats()['hit_rate'] == 0.5
+
+
+def test_cache_key_depends_on_pixels_and_model_version():
+    pixels = np.zeros((224, 224, 3), dtype=np.float32)
+    changed = pixels.copy()
+    changed[0, 0, 0] = 1
+
+    assert cache_key(pixels, 'v1') == cache_key(pixels.copy(), 'v1')
+    assert cache_key(pixels, 'v1') != cache_key(changed, 'v1')
+    assert cache_key(pixels, 'v1') != cache_key(pixels, 'v2')
+    # Non-contiguous views hash like their contiguous copy
+    assert cache_key(pixels[:, ::-1], 'v1') == cache_key(np.ascontiguousarray(pixels[:, ::-1]), 'v1')
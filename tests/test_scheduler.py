@@ -0,0 +1,118 @@
+import threading
+import time
+from concurrent.futures import TimeoutError
+
+import numpy as np
+import pytest
+
+from scheduler import MicroBatchScheduler
+
+
+def row_sums(batch):
+    return batch.reshape(len(batch), -1).sum(axis=1, keepdims=True)
+
+
+@pytest.fixture
+def make_scheduler():
+    schedulers = []
+
+    def make(predict_fn, **kwargs):
+        scheduler = MicroBatchScheduler(predict_fn, name=f'test-batcher-{len(schedulers)}', **kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.shutdown(wait=False)
+
+
+def test_concurrent_requests_share_one_batch(make_scheduler):
+    batches = []
+
+    def predict(batch):
+        batches.append(len(batch))
+        return row_sums(batch)
+
+    scheduler = make_scheduler(predict, max_batch_size=4, max_wait_ms=1000)
+    futures = [scheduler.submit(np.full(3, i, dtype=np.float32)) for i in range(4)]
+
+    assert [future.result(timeout=5)[0] for future in futures] == [0, 3, 6, 9]
+    assert batches == [4]
+
+
+def test_batch_is_dispatched_after_max_wait(make_scheduler):
+    scheduler = make_scheduler(row_sums, max_batch_size=16, max_wait_ms=10)
+    start = time.monotonic()
+
+    assert scheduler.predict(np.ones(2, dtype=np.float32), timeout=5)[0] == 2
+    assert time.monotonic() - start < 1
+
+
+def test_wrong_row_count_fails_every_request(make_scheduler):
+    scheduler = make_scheduler(lambda batch: row_sums(batch)[:1], max_batch_size=2, max_wait_ms=1000)
+    futures = [scheduler.submit(np.ones(2, dtype=np.float32)) for _ in range(2)]
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="1 rows for a batch of 2"):
+            future.result(timeout=5)
+
+
+def test_timed_out_request_is_cancelled_and_never_run(make_scheduler):
+    release = threading.Event()
+    seen = []
+
+    def predict(batch):
+        seen.extend(batch[:, 0].tolist())
+        release.wait(5)
+        return row_sums(batch)
+
+    scheduler = make_scheduler(predict, max_batch_size=1, max_wait_ms=0)
+    first = scheduler.submit(np.full(1, 1, dtype=np.float32))
+    while not seen:
+        time.sleep(0.001)
+
+    with pytest.raises(TimeoutError):
+        scheduler.predict(np.full(1, 2, dtype=np.float32), timeout=0.05)
+    release.set()
+
+    assert first.result(timeout=5)[0] == 1
+    assert scheduler.predict(np.full(1, 3, dtype=np.float32), timeout=5)[0] == 3
+    assert seen == [1, 3]
+
+
+def test_batches_run_in_parallel_up_to_concurrency(make_scheduler):
+    both_running = threading.Barrier(2, timeout=5)
+
+    def predict(batch):
+        both_running.wait()
+        return row_sums(batch)
+
+    scheduler = make_scheduler(predict, max_batch_size=1, max_wait_ms=0, concurrency=2)
+    futures = [scheduler.submit(np.ones(1, dtype=np.float32)) for _ in range(2)]
+
+    assert [future.result(timeout=5)[0] for future in futures] == [1, 1]
+
+
+def test_failed_batches_release_their_slot(make_scheduler):
+    calls = []
+
+    def predict(batch):
+        calls.append(len(batch))
+        if len(calls) <= 4:
+            raise ValueError("backend failure")
+        return row_sums(batch)
+
+    scheduler = make_scheduler(predict, max_batch_size=1, max_wait_ms=0, concurrency=2)
+    for _ in range(4):
+        with pytest.raises(ValueError):
+            scheduler.predict(np.ones(1, dtype=np.float32), timeout=5)
+
+    assert scheduler.predict(np.ones(1, dtype=np.float32), timeout=5)[0] == 1
+
+
+def test_submit_after_shutdown_is_refused(make_scheduler):
+    scheduler = make_scheduler(row_sums)
+    scheduler.shutdown()
+
+    with pytest.raises(RuntimeError):
+        scheduler.submit(np.ones(1, dtype=np.float32))
@@ -0,0 +1,265 @@
+# ============================================================================
+# LEAF GUARD AI - Tiled High-Resolution Inference
+# Squashing a 4000x4000 photo to 224x224 blurs away small early lesions.
+# Tiled mode finds the leaf region, resizes it to a working resolution of a
+# few tiles across, cuts overlapping 224x224 tiles as views into that one
+# array and runs them through the model as a single batch. Per-tile scores
+# are pooled into an image-level prediction and a coarse lesion map.
+#
+#   python tiling.py leaf.jpg --lesion-map leaf_lesions.png
+# ============================================================================
+
+import argparse
+import math
+import sys
+from collections import namedtuple
+
+import numpy as np
+from PIL import Image
+
+import config
+import preprocessing
+from preprocessing import IMG_SIZE
+
+TILE = IMG_SIZE[0]
+_TILE_BYTES = IMG_SIZE[0] * IMG_SIZE[1] * 3 * np.dtype(np.float32).itemsize
+
+# Excess green (2G - R - B, 0-255 scale) above which a pixel counts as leaf
+LEAF_EXG_THRESHOLD = 20
+# Fewer leaf pixels than this fraction: tile the whole image instead
+MIN_LEAF_FRACTION = 0.05
+# Extra border around the detected leaf, as a fraction of its size
+REGION_MARGIN = 0.05
+# Side of the thumbnail the leaf region is detected on
+REGION_THUMBNAIL = 128
+
+# probabilities: (classes,) image-level probabilities pooled over tiles
+# tile_probabilities: (tiles, classes), row-major over the tile grid
+# lesion_map: (rows, cols) float32 per-tile lesion score in [0, 1]
+# region: (left, top, right, bottom) tiled area in original image pixels
+# working_size: (width, height) the region was resized to before tiling
+# batches: forward passes used (1 unless the memory budget forced a split)
+TiledPrediction = namedtuple('TiledPrediction', [
+    'probabilities', 'tile_probabilities', 'lesion_map', 'region', 'working_size', 'batches'
+])
+
+
+# ============================================================================
+# LEAF REGION & WORKING IMAGE
+# ============================================================================
+
+def _rgb(image):
+    return image if image.mode == 'RGB' else image.convert('RGB')
+
+
+def leaf_region(image):
+    """Bounding box of the green leaf pixels, detected on a small thumbnail
+
+    Returns (left, top, right, bottom) in ``image`` coordinates; the whole
+    image when too little of it looks like leaf.
+    """
+    width, height = image.size
+    scale = min(REGION_THUMBNAIL / max(width, height), 1.0)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    thumb = np.asarray(_rgb(image).resize(size, Image.BOX), dtype=np.int16)
+    exg = 2 * thumb[..., 1] - thumb[..., 0] - thumb[..., 2]
+    mask = exg > LEAF_EXG_THRESHOLD
+    if mask.mean() < MIN_LEAF_FRACTION:
+        return 0, 0, width, height
+
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    margin_x = (cols[-1] - cols[0] + 1) * REGION_MARGIN
+    margin_y = (rows[-1] - rows[0] + 1) * REGION_MARGIN
+    return (
+        max(0, math.floor((cols[0] - margin_x) / scale)),
+        max(0, math.floor((rows[0] - margin_y) / scale)),
+        min(width, math.ceil((cols[-1] + 1 + margin_x) / scale)),
+        min(height, math.ceil((rows[-1] + 1 + margin_y) / scale)),
+    )
+
+
+def working_size(region, working_side):
+    """Size the region is resized to: long side at most ``working_side``
+
+    Regions are never upscaled, except that each side is at least one tile.
+    """
+    width, height = region[2] - region[0], region[3] - region[1]
+    scale = min(working_side / max(width, height), 1.0)
+    return max(round(width * scale), TILE), max(round(height * scale), TILE)
+
+
+def draft_for_tiling(image, working_side):
+    """Downscale-on-decode for a not yet loaded JPEG, keeping enough detail
+
+    Decodes at no less than twice the working side so the leaf region
+    (usually most of the photo) still has full working resolution.
+    """
+    if image.format in preprocessing.DRAFT_FORMATS and getattr(image, 'tile', None):
+        width, height = image.size
+        scale = min(2 * working_side / max(width, height), 1.0)
+        image.draft('RGB', (math.ceil(width * scale), math.ceil(height * scale)))
+
+
+# ============================================================================
+# TILES
+# ============================================================================
+
+def tile_starts(length, tile=TILE, overlap=0.25):
+    """Tile offsets along one axis, the last one flush with the edge"""
+    if length <= tile:
+        return [0]
+    stride = max(1, round(tile * (1 - overlap)))
+    starts = list(range(0, length - tile + 1, stride))
+    if starts[-1] != length - tile:
+        starts.append(length - tile)
+    return starts
+
+
+def tile_views(array, overlap=0.25):
+    """(ys, xs, views): every tile as a view into ``array``, row-major
+
+    Slicing never copies, so the tiles cost no memory until they are
+    normalized into a batch.
+    """
+    height, width = array.shape[:2]
+    ys = tile_starts(height, TILE, overlap)
+    xs = tile_starts(width, TILE, overlap)
+    return ys, xs, [array[y:y + TILE, x:x + TILE] for y in ys for x in xs]
+
+
+def tiles_per_batch(tiles, working_bytes, budget_bytes):
+    """Largest batch of float32 tiles that fits next to the working image"""
+    room = max(budget_bytes - working_bytes, _TILE_BYTES)
+    return max(1, min(tiles, int(room // _TILE_BYTES)))
+
+
+def lesion_scores(tile_probabilities, class_names):
+    """Per-tile probability of not being healthy (1 - healthy classes)"""
+    healthy = [i for i, name in enumerate(class_names) if 'healthy' in name.lower()]
+    if not healthy:
+        return tile_probabilities.max(axis=1)
+    return 1.0 - tile_probabilities[:, healthy].sum(axis=1)
+
+
+def pool(tile_probabilities, method='max'):
+    """Image-level probabilities from per-tile rows
+
+    'max' keeps each class's strongest tile (a lesion seen in one tile is
+    not averaged away) and renormalizes; 'mean' averages the tiles.
+    """
+    if method == 'mean':
+        return tile_probabilities.mean(axis=0)
+    if method != 'max':
+        raise ValueError(f"Unknown tile pooling method '{method}'")
+    pooled = tile_probabilities.max(axis=0)
+    return pooled / pooled.sum()
+
+
+# ============================================================================
+# PREDICTION
+# ============================================================================
+
+def predict_tiled(source, predict_fn, class_names, working_side=None, overlap=None,
+                  method=None, memory_mb=None):
+    """Tiled prediction for one image
+
+    ``source`` is a path, file object or PIL image; ``predict_fn`` maps an
+    (N, 224, 224, 3) float32 batch to (N, classes) probabilities. Only the
+    working image (uint8) and one float32 batch are held at a time, and the
+    batch is split only if all tiles would exceed ``memory_mb``.
+    """
+    working_side = working_side or config.TILE_WORKING_SIDE
+    overlap = config.TILE_OVERLAP if overlap is None else overlap
+    method = method or config.TILE_POOLING
+    budget = (memory_mb or config.TILE_MEMORY_MB) * 1024 * 1024
+
+    image = source if isinstance(source, Image.Image) else Image.open(source)
+    try:
+        original_size = image.size
+        draft_for_tiling(image, working_side)
+        with preprocessing.DECODE_BUDGET.reserve(preprocessing.decode_size(image)):
+            region = leaf_region(image)
+            size = working_size(region, working_side)
+            working = np.asarray(_rgb(image).resize(
+                size, Image.BICUBIC, box=region, reducing_gap=preprocessing.REDUCING_GAP
+            ))
+    finally:
+        if image is not source:
+            image.close()
+
+    ys, xs, views = tile_views(working, overlap)
+    per_batch = tiles_per_batch(len(views), working.nbytes, budget)
+    buffer = preprocessing.BatchBuffer(per_batch)
+    rows = []
+    for start in range(0, len(views), per_batch):
+        buffer.reset()
+        for view in views[start:start + per_batch]:
+            buffer.add_pixels(view)
+        rows.append(np.asarray(predict_fn(buffer.view())))
+    tile_probabilities = np.concatenate(rows)
+
+    # Region back in original pixels (the JPEG may have been decoded smaller)
+    sx, sy = original_size[0] / image.size[0], original_size[1] / image.size[1]
+    region = (round(region[0] * sx), round(region[1] * sy), round(region[2] * sx), round(region[3] * sy))
+    return TiledPrediction(
+        pool(tile_probabilities, method),
+        tile_probabilities,
+        lesion_scores(tile_probabilities, class_names).reshape(len(ys), len(xs)).astype(np.float32),
+        region,
+        size,
+        len(rows),
+    )
+
+
+def lesion_overlay(image, prediction, max_side=800, alpha=0.55):
+    """RGB preview of ``image`` with the lesion map tinted red over the leaf"""
+    scale = min(max_side / max(image.size), 1.0)
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    if image.format in preprocessing.DRAFT_FORMATS and getattr(image, 'tile', None):
+        # Not decoded yet: decode a JPEG at no more than twice the preview size
+        image.draft('RGB', size)
+    # Resizing straight from the source never copies the full-size image
+    with preprocessing.DECODE_BUDGET.reserve(preprocessing.decode_size(image)):
+        preview = _rgb(image).resize(size, Image.BILINEAR, reducing_gap=preprocessing.REDUCING_GAP)
+    left, top, right, bottom = (round(v * scale) for v in prediction.region)
+    size = (max(1, right - left), max(1, bottom - top))
+
+    heat = Image.fromarray(np.uint8(np.clip(prediction.lesion_map, 0, 1) * 255 * alpha), 'L')
+    mask = Image.new('L', preview.size, 0)
+    mask.paste(heat.resize(size, Image.BILINEAR), (left, top))
+    red = Image.new('RGB', preview.size, (220, 38, 38))
+    return Image.composite(red, preview, mask)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiled high-resolution prediction for one image")
+    parser.add_argument('image')
+    parser.add_argument('--backend', default=None, help="keras, savedmodel or tflite (default: config)")
+    parser.add_argument('--model', default=None, help="Model artifact (default: per backend)")
+    parser.add_argument('--class-names', default='class_names.txt')
+    parser.add_argument('--working-side', type=int, default=None)
+    parser.add_argument('--pooling', choices=('max', 'mean'), default=None)
+    parser.add_argument('--lesion-map', help="Write the lesion overlay to this image file")
+    args = parser.parse_args(argv)
+
+    import backends
+    import inference
+
+    model = backends.load_backend(args.backend, args.model)
+    class_names = inference.load_class_names(args.class_names)
+    prediction = predict_tiled(args.image, model.predict_array, class_names,
+                               args.working_side, method=args.pooling)
+    rows, cols = prediction.lesion_map.shape
+    print(f"{rows}x{cols} tiles over {prediction.region} at {prediction.working_size}, "
+          f"{prediction.batches} forward pass(es)")
+    for result in inference.top_k_predictions(prediction.probabilities, class_names):
+        print(f"{result['confidence']:6.2f}%  {result['disease']}")
+    if args.lesion_map:
+        with Image.open(args.image) as image:
+            lesion_overlay(image, prediction).save(args.lesion_map)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# ============================================================================
+# LEAF GUARD AI - Test-Time Augmentation
+# For borderline predictions, re-score the image as a batch of flipped,
+# rotated and cropped views and average the class probabilities. The views
+# are built with NumPy slicing and one fancy-index gather on the prepared
+# 224x224 pixels (no PIL round trips), and all of them go through the model
+# in a single forward pass.
+# ============================================================================
+
+import numpy as np
+
+import config
+import inference
+import metrics
+from prediction_cache import cache_key
+from preprocessing import IMG_SIZE
+
+# Side of the square crops, upscaled back to 224 (0.875 = 196 px)
+CROP_FRACTION = 0.875
+
+# name -> function from a (224, 224, 3) array to a (224, 224, 3) view
+GEOMETRIC = {
+    'identity': lambda pixels: pixels,
+    'hflip': lambda pixels: pixels[:, ::-1],
+    'vflip': lambda pixels: pixels[::-1],
+    'rot90': lambda pixels: np.rot90(pixels, 1),
+    'rot180': lambda pixels: np.rot90(pixels, 2),
+    'rot270': lambda pixels: np.rot90(pixels, 3),
+}
+
+# name -> (row, column) position of the crop: 0 = top/left, 0.5 = centre, 1 = bottom/right
+CROPS = {
+    'crop_center': (0.5, 0.5),
+    'crop_tl': (0.0, 0.0),
+    'crop_tr': (0.0, 1.0),
+    'crop_bl': (1.0, 0.0),
+    'crop_br': (1.0, 1.0),
+}
+
+AUGMENTATIONS = tuple(GEOMETRIC) + tuple(CROPS)
+
+
+def _crop_indices(names, size=IMG_SIZE[0], fraction=CROP_FRACTION):
+    """(K, size) row and column source indices for nearest-neighbour crops"""
+    crop = round(size * fraction)
+    grid = np.linspace(0, crop - 1, size).round().astype(np.intp)
+    rows, cols = [], []
+    for name in names:
+        y, x = CROPS[name]
+        rows.append(grid + round((size - crop) * y))
+        cols.append(grid + round((size - crop) * x))
+    return np.array(rows), np.array(cols)
+
+
+def augment(pixels, names=AUGMENTATIONS, out=None):
+    """Stack the named views of one prepared image into an (N, 224, 224, 3) batch
+
+    Flips and rotations are strided views copied into their batch slot;
+    all crops come from a single gather over precomputed index grids.
+    """
+    if out is None:
+        out = np.empty((len(names),) + pixels.shape, dtype=np.float32)
+    crops = [name for name in names if name in CROPS]
+    for slot, name in enumerate(names):
+        if name in GEOMETRIC:
+            out[slot] = GEOMETRIC[name](pixels)
+        elif name not in CROPS:
+            raise ValueError(f"Unknown augmentation '{name}'")
+    if crops:
+        rows, cols = _crop_indices(crops)
+        slots = [names.index(name) for name in crops]
+        out[slots] = pixels[rows[:, :, None], cols[:, None, :]]
+    return out
+
+
+def should_apply(results, mode=None, below=None, above=None):
+    """Whether a top-k result is borderline enough to re-score with TTA
+
+    In 'auto' mode only confidences in ``[above, below)`` qualify: lower
+    ones are junk that averaging should not promote.
+    """
+    mode = mode or config.TTA_MODE
+    if mode == 'off':
+        return False
+    if mode == 'always':
+        return True
+    below = config.TTA_BELOW_CONFIDENCE if below is None else below
+    above = config.TTA_ABOVE_CONFIDENCE if above is None else above
+    return above <= results[0]['confidence'] < below
+
+
+def predict(pixels, predict_fn, base=None, names=None):
+    """Mean class probabilities over the augmented views, in one forward pass
+
+    ``base`` is the already computed prediction for the unaugmented image;
+    when given, the identity view is not run again but averaged in as is.
+    """
+    names = [name for name in (names or config.TTA_AUGMENTATIONS)
+             if base is None or name != 'identity']
+    probabilities = np.asarray(predict_fn(augment(pixels, names)))
+    if base is None:
+        return probabilities.mean(axis=0)
+    return (probabilities.sum(axis=0) + base) / (len(names) + 1)
+
+
+def refine(model, pixels, probabilities, cache=None):
+    """Average ``probabilities`` with ``model``'s scores for the augmented views
+
+    Shared by the app and the HTTP API so both use the same ``:tta`` cache
+    entry; ``cache`` is a PredictionCache, or None when caching is off.
+    """
+    key = cache_key(pixels, f"{inference.model_version(model)}:tta")
+    refined = cache.get(key) if cache is not None else None
+    if refined is None:
+        with metrics.stage('tta'):
+            refined = predict(pixels, lambda batch: inference.predict_array(model, batch), base=probabilities)
+        if cache is not None:
+            cache.put(key, refined)
+    return refined
@@ -0,0 +1,114 @@
+# ============================================================================
+# LEAF GUARD AI - Upload Gate
+# Checks an upload from its header alone (format, dimensions, pixel count)
+# before any pixel is decoded, so oversized, malformed and decompression-
+# bomb files are turned away for the cost of reading a few hundred bytes.
+# Accepted uploads are only decoded as large as they will be shown: JPEG
+# previews decode straight at reduced size (DCT scaling), and every full
+# decode waits for room in preprocessing.DECODE_BUDGET.
+# ============================================================================
+
+import warnings
+from collections import namedtuple
+
+from PIL import Image, UnidentifiedImageError
+
+import config
+import metrics
+import preprocessing
+
+# What the uploader accepts; phone cameras often write JPEGs that Pillow
+# reads as MPO (JPEG plus an embedded second picture)
+ALLOWED_FORMATS = ('JPEG', 'MPO', 'PNG')
+
+# format: Pillow format name
+# size: (width, height) declared in the header
+# mode: Pillow mode the pixels would decode to
+ImageHeader = namedtuple('ImageHeader', ['format', 'size', 'mode'])
+
+
+class UploadRejected(ValueError):
+    """Upload refused by the gate; ``reason`` labels the rejections metric"""
+
+    def __init__(self, message, reason):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _rewind(source, position):
+    if position is not None:
+        source.seek(position)
+
+
+def inspect(source, max_pixels=None):
+    """Read only the header of ``source`` and check it against the limits
+
+    Returns an ImageHeader; raises UploadRejected (and counts the reason)
+    for unreadable files, other formats, out-of-range sizes and anything
+    over ``max_pixels``. File objects are rewound afterwards.
+    """
+    max_pixels = max_pixels or config.UPLOAD_MAX_PIXELS
+    position = source.tell() if hasattr(source, 'tell') else None
+    try:
+        with warnings.catch_warnings():
+            # Pillow only warns below twice its own limit; treat it as fatal
+            warnings.simplefilter('error', Image.DecompressionBombWarning)
+            with Image.open(source) as image:
+                header = ImageHeader(image.format, image.size, image.mode)
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning):
+        _reject("Image has too many pixels to process.", 'decompression_bomb')
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError, EOFError):
+        _reject("File is not a readable JPEG or PNG image.", 'malformed')
+    finally:
+        _rewind(source, position)
+
+    if header.format not in ALLOWED_FORMATS:
+        _reject(f"Unsupported image format ({header.format}). Please upload a JPEG or PNG.", 'unsupported_format')
+    is_valid, message = preprocessing.check_size(*header.size)
+    if not is_valid:
+        _reject(message, 'invalid_image')
+    if header.size[0] * header.size[1] > max_pixels:
+        _reject(f"Image has too many pixels (maximum {max_pixels / 1e6:.0f} megapixels).", 'pixel_budget')
+    return header
+
+
+def _reject(message, reason):
+    metrics.REJECTIONS.inc(reason=reason)
+    raise UploadRejected(message, reason)
+
+
+def open_reduced(source, side=None):
+    """Decode ``source`` for display with its long side at most ``side``
+
+    JPEGs are drafted to the smallest DCT scale that keeps both dimensions
+    at least ``side``, so with the default 800 a 4000x3000 photo decodes at
+    2000x1500 (a quarter of its 12 megapixels) before being shrunk to
+    800x600; other formats decode under the shared budget and are shrunk
+    right away.
+    """
+    side = side or config.UPLOAD_PREVIEW_SIDE
+    position = source.tell() if hasattr(source, 'tell') else None
+    try:
+        image = Image.open(source)
+        if image.format in preprocessing.DRAFT_FORMATS:
+            image.draft('RGB', (side, side))
+        with preprocessing.DECODE_BUDGET.reserve(preprocessing.decode_size(image)):
+            with metrics.stage('decode'):
+                image.load()
+            if max(image.size) > side:
+                image.thumbnail((side, side), Image.BILINEAR, reducing_gap=preprocessing.REDUCING_GAP)
+        return image
+    finally:
+        _rewind(source, position)
+
+
+def open_lazy(source):
+    """Open ``source`` with only the header parsed, for draft-aware consumers
+
+    preprocessing.prepare, tiling and thumbnails each draft the JPEG to the
+    size they need before decoding; handing them an already loaded
+    full-size image would defeat that.
+    """
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return Image.open(source)